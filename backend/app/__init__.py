@@ -0,0 +1,4 @@
+import time
+
+# Reference point of the startup time reported by the lifespan.
+STARTED_AT = time.perf_counter()
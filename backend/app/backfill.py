@@ -0,0 +1,245 @@
+"""Bulk backfill of the history store from FRED, BLS and BEA.
+
+    python -m app.backfill --start 1990 --source fred bls bea
+
+The work is split into chunks: one FRED request per series over the whole
+range, one BLS request per span of years for every registered series, and
+one BEA request per span of years. Each chunk is written to the store in a
+single batch and recorded in a state file, so an interrupted run, or one
+stopped by the BLS daily quota, resumes where it left off.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Awaitable, Callable
+
+from . import crud, history, quota, upstream
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Documented API limits, keyed by whether a registration key is set.
+FRED_PER_MINUTE = quota.LIMITS[quota.FRED_HOST][True].calls
+BEA_PER_MINUTE = quota.LIMITS[quota.BEA_HOST][True].calls
+BLS_DAILY_QUERIES = {
+    keyed: limit.calls for keyed, limit in quota.LIMITS[quota.BLS_HOST].items()
+}
+BLS_YEARS_PER_QUERY = {True: 20, False: 10}
+BEA_YEARS_PER_QUERY = 10
+
+Points = dict[str, list[tuple[float, float]]]
+
+
+class QuotaExhausted(Exception):
+    """The daily query budget of an upstream is used up."""
+
+
+@dataclass
+class Chunk:
+    """One upstream request and the history points it yields per series."""
+
+    key: str
+    source: str
+    run: Callable[[], Awaitable[Points]]
+
+
+class RateLimiter:
+    """Space calls at least ``60 / per_minute`` seconds apart."""
+
+    def __init__(self, per_minute: int):
+        self.interval = 60 / per_minute
+        self._next = 0.0
+
+    async def wait(self) -> None:
+        now = time.monotonic()
+        delay = self._next - now
+        self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class BackfillState:
+    """Completed chunks and BLS queries per day, persisted as JSON."""
+
+    def __init__(self, path: str):
+        self.path = path
+        data = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+        self.done: set[str] = set(data.get("done", []))
+        self.bls_queries: dict[str, int] = data.get("bls_queries", {})
+
+    def save(self) -> None:
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(
+                {"done": sorted(self.done), "bls_queries": self.bls_queries},
+                f,
+            )
+        os.replace(tmp, self.path)
+
+    def mark_done(self, key: str) -> None:
+        self.done.add(key)
+        self.save()
+
+    def bls_used_today(self) -> int:
+        return self.bls_queries.get(_today(), 0)
+
+    def count_bls_query(self) -> None:
+        today = _today()
+        self.bls_queries = {today: self.bls_queries.get(today, 0) + 1}
+        self.save()
+
+
+def _today() -> str:
+    return datetime.now(timezone.utc).date().isoformat()
+
+
+def _spans(start: int, end: int, size: int):
+    for first in range(start, end + 1, size):
+        yield first, min(first + size - 1, end)
+
+
+def _fred_chunk(series_id: str, start: int, end: int) -> Chunk:
+    async def run() -> Points:
+        observations = await crud.request_fred(
+            series_id,
+            observation_start=f"{start}-01-01",
+            observation_end=f"{end}-12-31",
+            sort_order="asc",
+        )
+        return {series_id: crud.fred_points(observations)}
+
+    return Chunk(f"fred:{series_id}:{start}-{end}", "fred", run)
+
+
+def _bls_chunk(first: int, last: int) -> Chunk:
+    async def run() -> Points:
+        series = list(crud.BLS_SERIES.values())
+        data_by_id = await crud.request_bls(series, first, last)
+        return {
+            spec.name: crud.bls_points(data_by_id.get(spec.series_id, []))
+            for spec in series
+        }
+
+    return Chunk(f"bls:{first}-{last}", "bls", run)
+
+
+def _bea_chunk(first: int, last: int) -> Chunk:
+    async def run() -> Points:
+        years = ",".join(str(year) for year in range(first, last + 1))
+        return {"PCE": crud.bea_points(await crud.request_bea_pce(years))}
+
+    return Chunk(f"bea:{first}-{last}", "bea", run)
+
+
+def plan(sources: list[str], start: int, end: int) -> list[Chunk]:
+    """Return the chunks covering ``start``-``end`` for ``sources``.
+
+    Sources whose API key is missing (FRED, BEA) are skipped.
+    """
+    chunks = []
+    if "fred" in sources:
+        if settings.fred_api_key:
+            chunks += [
+                _fred_chunk(series_id, start, end)
+                for series_id in crud.FRED_SERIES
+            ]
+        else:
+            logger.warning("FRED_API_KEY missing, skipping FRED")
+    if "bls" in sources:
+        size = BLS_YEARS_PER_QUERY[bool(settings.bls_api_key)]
+        chunks += [_bls_chunk(*span) for span in _spans(start, end, size)]
+    if "bea" in sources:
+        if settings.bea_api_key:
+            chunks += [
+                _bea_chunk(*span)
+                for span in _spans(start, end, BEA_YEARS_PER_QUERY)
+            ]
+        else:
+            logger.warning("BEA_API_KEY missing, skipping BEA")
+    return chunks
+
+
+async def backfill(
+    chunks: list[Chunk],
+    state: BackfillState,
+    store: history.HistoryStore,
+) -> int:
+    """Run every chunk not yet done; return the number that failed.
+
+    Raises :class:`QuotaExhausted` when the BLS daily quota is reached.
+    """
+    limiters = {
+        "fred": RateLimiter(FRED_PER_MINUTE),
+        "bea": RateLimiter(BEA_PER_MINUTE),
+    }
+    bls_quota = BLS_DAILY_QUERIES[bool(settings.bls_api_key)]
+    failed = 0
+    for chunk in chunks:
+        if chunk.key in state.done:
+            continue
+        if chunk.source == "bls":
+            if state.bls_used_today() >= bls_quota:
+                raise QuotaExhausted("BLS daily quota reached")
+            state.count_bls_query()
+        else:
+            await limiters[chunk.source].wait()
+        try:
+            points = await chunk.run()
+        except Exception as exc:
+            logger.error("Backfill of %s failed: %s", chunk.key, exc)
+            failed += 1
+            continue
+        for series, series_points in points.items():
+            count = store.append(series, series_points)
+            logger.info("%s: %d points stored", series, count)
+        state.mark_done(chunk.key)
+    return failed
+
+
+async def _run(args: argparse.Namespace) -> int:
+    chunks = plan(args.source, args.start, args.end)
+    state = BackfillState(args.state)
+    # The backfill paces itself and counts BLS queries across runs, which
+    # the per-process quotas of the API cannot do.
+    quota_enabled, settings.quota_enabled = settings.quota_enabled, False
+    try:
+        failed = await backfill(chunks, state, history.get_store())
+    except QuotaExhausted as exc:
+        logger.error("%s; run again tomorrow to resume", exc)
+        return 2
+    finally:
+        settings.quota_enabled = quota_enabled
+        await upstream.aclose()
+    return 1 if failed else 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--start", type=int, default=2000)
+    parser.add_argument(
+        "--end", type=int, default=datetime.now(timezone.utc).year
+    )
+    parser.add_argument(
+        "--source",
+        nargs="+",
+        choices=["fred", "bls", "bea"],
+        default=["fred", "bls", "bea"],
+    )
+    parser.add_argument("--state", default="backfill.json")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    return asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
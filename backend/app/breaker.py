@@ -0,0 +1,118 @@
+"""Circuit breakers of the upstream data providers.
+
+After ``settings.breaker_failures`` consecutive failed calls, the breaker of
+an upstream opens and calls fail immediately with :class:`CircuitOpen`, so a
+slow or broken provider no longer holds every miss for the full timeout;
+the cache then answers with the last known value. After
+``settings.breaker_reset`` seconds a single probe call is let through
+(half-open): its success closes the breaker, its failure opens it again.
+
+Breakers live in each worker process.
+"""
+
+import logging
+import time
+
+import httpx
+
+from . import metrics
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+
+# Values of the state gauge.
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpen(httpx.TransportError):
+    """The upstream's breaker is open; the call was not attempted."""
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker of one upstream."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+
+    def _set_state(self, state: str) -> None:
+        if state != self.state:
+            logger.warning("Circuit of %s is %s", self.name, state)
+        self.state = state
+        metrics.CIRCUIT_STATE.labels(self.name).set(_STATE_VALUES[state])
+
+    def retry_in(self, now: float | None = None) -> float:
+        """Seconds until the next call is let through (0 when closed)."""
+        if self.state == CLOSED:
+            return 0.0
+        now = time.monotonic() if now is None else now
+        return max(0.0, self.opened_at + settings.breaker_reset - now)
+
+    def allow(self) -> bool:
+        """Return whether a call may be made now.
+
+        Once the reset timeout has elapsed, one probe is let through and the
+        timeout restarts, so a probe that never reports back does not keep
+        the breaker half-open forever.
+        """
+        if self.state == CLOSED:
+            return True
+        now = time.monotonic()
+        if self.retry_in(now) > 0:
+            return False
+        self.opened_at = now
+        self._set_state(HALF_OPEN)
+        return True
+
+    def check(self) -> None:
+        """Raise :class:`CircuitOpen` unless a call may be made now."""
+        if not self.allow():
+            metrics.UPSTREAM_ERRORS.labels(self.name, "CircuitOpen").inc()
+            raise CircuitOpen(f"{self.name} circuit is open")
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._set_state(CLOSED)
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == HALF_OPEN or (
+            self.failures >= settings.breaker_failures
+        ):
+            self.opened_at = time.monotonic()
+            self._set_state(OPEN)
+
+    def snapshot(self) -> dict:
+        return {
+            "name": self.name,
+            "state": self.state,
+            "failures": self.failures,
+            "retry_in": round(self.retry_in(), 3),
+        }
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Return the breaker of upstream ``name`` (a host, or ``yfinance``)."""
+    breaker = _breakers.get(name)
+    if breaker is None:
+        breaker = _breakers[name] = CircuitBreaker(name)
+    return breaker
+
+
+def snapshot() -> list[dict]:
+    """Return the state of every breaker, sorted by upstream."""
+    return [_breakers[name].snapshot() for name in sorted(_breakers)]
+
+
+def reset() -> None:
+    """Forget every breaker."""
+    _breakers.clear()
@@ -0,0 +1,488 @@
+"""Caching helpers shared by the CRUD layer."""
+
+import asyncio
+import functools
+import logging
+import pickle
+import sqlite3
+import threading
+import time
+from collections.abc import MutableMapping
+from dataclasses import dataclass, field, replace
+from typing import Any, Awaitable, Callable, Hashable
+
+import redis
+from cachetools import TLRUCache
+from cachetools.keys import hashkey
+
+from . import encoding, lkg, metrics, timing
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _expires_at(value, ttl: float, now: float) -> float:
+    """Expiry of ``value``: its own ``expires_at`` if set, else ``now + ttl``.
+    """
+    expires_at = getattr(value, "expires_at", None)
+    return now + ttl if expires_at is None else expires_at
+
+
+class MemoryCache(TLRUCache):
+    """Per-process TTL cache, the default backend.
+
+    Entries live ``ttl`` seconds unless they carry their own ``expires_at``.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, name: str | None = None):
+        super().__init__(maxsize, self._ttu, timer=time.time)
+        self.ttl = ttl
+        self.name = name
+
+    def _ttu(self, key, value, now: float) -> float:
+        return _expires_at(value, self.ttl, now)
+
+    def claim(self, seconds: float) -> bool:
+        """Each process refreshes its own copy, so the claim always holds."""
+        return True
+
+    def release(self) -> None:
+        pass
+
+
+class SQLiteCache(MutableMapping):
+    """TTL cache namespace stored in a SQLite file shared by all workers.
+
+    Values are pickled. Each thread uses its own connection and the database
+    runs in WAL mode so readers in other processes are never blocked. A
+    write lock held longer than ``settings.sqlite_timeout`` is logged and
+    treated as a miss, as the calls run on the event loop.
+    """
+
+    def __init__(self, path: str, name: str, ttl: float):
+        self.path = path
+        self.name = name
+        self.ttl = ttl
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "namespace TEXT, key TEXT, value BLOB, expires REAL, "
+                "PRIMARY KEY (namespace, key))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS leases ("
+                "namespace TEXT PRIMARY KEY, expires REAL)"
+            )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.path, timeout=settings.sqlite_timeout
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def __getitem__(self, key):
+        try:
+            row = self._conn().execute(
+                "SELECT value FROM cache "
+                "WHERE namespace = ? AND key = ? AND expires > ?",
+                (self.name, repr(key), time.time()),
+            ).fetchone()
+        except sqlite3.Error as exc:
+            logger.warning("SQLite get failed: %s", exc)
+            row = None
+        if row is None:
+            raise KeyError(key)
+        return pickle.loads(row[0])
+
+    def __setitem__(self, key, value):
+        now = time.time()
+        try:
+            with self._conn() as conn:
+                conn.execute("DELETE FROM cache WHERE expires <= ?", (now,))
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)",
+                    (
+                        self.name,
+                        repr(key),
+                        pickle.dumps(value),
+                        _expires_at(value, self.ttl, now),
+                    ),
+                )
+        except sqlite3.Error as exc:
+            logger.warning("SQLite set failed: %s", exc)
+
+    def __delitem__(self, key):
+        with self._conn() as conn:
+            cur = conn.execute(
+                "DELETE FROM cache WHERE namespace = ? AND key = ?",
+                (self.name, repr(key)),
+            )
+        if cur.rowcount == 0:
+            raise KeyError(key)
+
+    def _keys(self) -> list[str]:
+        rows = self._conn().execute(
+            "SELECT key FROM cache WHERE namespace = ? AND expires > ?",
+            (self.name, time.time()),
+        )
+        return [row[0] for row in rows]
+
+    def __iter__(self):
+        return iter(self._keys())
+
+    def __len__(self):
+        return len(self._keys())
+
+    def clear(self):
+        with self._conn() as conn:
+            conn.execute("DELETE FROM cache WHERE namespace = ?", (self.name,))
+
+    def claim(self, seconds: float) -> bool:
+        """Atomically take the refresh lease for ``seconds`` if it is free."""
+        now = time.time()
+        with self._conn() as conn:
+            cur = conn.execute(
+                "INSERT INTO leases VALUES (?, ?) "
+                "ON CONFLICT (namespace) DO UPDATE SET expires = "
+                "excluded.expires WHERE leases.expires <= ?",
+                (self.name, now + seconds, now),
+            )
+        return cur.rowcount == 1
+
+    def release(self) -> None:
+        with self._conn() as conn:
+            conn.execute(
+                "DELETE FROM leases WHERE namespace = ?", (self.name,)
+            )
+
+
+class RedisCache(MutableMapping):
+    """TTL cache namespace stored in Redis (or any RESP-compatible server).
+
+    Values are pickled and expire server-side. Connection errors and
+    timeouts (``settings.redis_timeout``) are logged and treated as cache
+    misses so a Redis outage degrades to upstream calls.
+    """
+
+    def __init__(self, client, name: str, ttl: float):
+        self.client = client
+        self.name = name
+        self.ttl = ttl
+        self.prefix = f"goldapp:cache:{name}:"
+
+    def __getitem__(self, key):
+        try:
+            raw = self.client.get(self.prefix + repr(key))
+        except Exception as exc:
+            logger.warning("Redis get failed: %s", exc)
+            raw = None
+        if raw is None:
+            raise KeyError(key)
+        return pickle.loads(raw)
+
+    def __setitem__(self, key, value):
+        now = time.time()
+        px = int((_expires_at(value, self.ttl, now) - now) * 1000)
+        try:
+            self.client.set(
+                self.prefix + repr(key), pickle.dumps(value), px=max(1, px)
+            )
+        except Exception as exc:
+            logger.warning("Redis set failed: %s", exc)
+
+    def __delitem__(self, key):
+        try:
+            deleted = self.client.delete(self.prefix + repr(key))
+        except Exception as exc:
+            logger.warning("Redis delete failed: %s", exc)
+            deleted = 0
+        if not deleted:
+            raise KeyError(key)
+
+    def _keys(self) -> list:
+        try:
+            return list(self.client.scan_iter(match=self.prefix + "*"))
+        except Exception as exc:
+            logger.warning("Redis scan failed: %s", exc)
+            return []
+
+    def __iter__(self):
+        return (k[len(self.prefix):].decode() for k in self._keys())
+
+    def __len__(self):
+        return len(self._keys())
+
+    def clear(self):
+        keys = self._keys()
+        if keys:
+            try:
+                self.client.delete(*keys)
+            except Exception as exc:
+                logger.warning("Redis delete failed: %s", exc)
+
+    def claim(self, seconds: float) -> bool:
+        """Atomically take the refresh lease for ``seconds`` if it is free.
+
+        While Redis is unreachable the lease is granted, so each worker
+        refreshes on its own.
+        """
+        try:
+            return bool(
+                self.client.set(
+                    f"goldapp:lease:{self.name}",
+                    1,
+                    nx=True,
+                    px=int(seconds * 1000),
+                )
+            )
+        except Exception as exc:
+            logger.warning("Redis lease failed: %s", exc)
+            return True
+
+    def release(self) -> None:
+        try:
+            self.client.delete(f"goldapp:lease:{self.name}")
+        except Exception as exc:
+            logger.warning("Redis lease release failed: %s", exc)
+
+
+_redis_client = None
+
+
+def _get_redis_client():
+    global _redis_client
+    if _redis_client is None:
+        # The client is synchronous: bound how long it can block the loop.
+        _redis_client = redis.Redis.from_url(
+            settings.redis_url,
+            socket_timeout=settings.redis_timeout,
+            socket_connect_timeout=settings.redis_timeout,
+        )
+    return _redis_client
+
+
+def make_cache(
+    name: str, maxsize: int, ttl: float, backend: str | None = None
+):
+    """Create the cache for one indicator on the configured backend.
+
+    With the ``sqlite`` or ``redis`` backends every Gunicorn worker reads and
+    writes the same entries, so each upstream is queried once per TTL window
+    instead of once per worker.
+    """
+    backend = backend or settings.cache_backend
+    if backend == "memory":
+        return MemoryCache(maxsize=maxsize, ttl=ttl, name=name)
+    if backend == "sqlite":
+        return SQLiteCache(settings.cache_path, name, ttl)
+    if backend == "redis":
+        return RedisCache(_get_redis_client(), name, ttl)
+    raise ValueError(f"Unknown cache backend: {backend}")
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into a single execution.
+
+    The first caller for a key starts the coroutine as a task; callers
+    arriving while it is still running await the same task and receive its
+    result or exception. Cancelling one caller does not cancel the others.
+
+    Executions and coalesced callers are counted on the instance and, when
+    it has a ``name``, in the Prometheus metrics.
+    """
+
+    def __init__(self, name: str | None = None):
+        self.name = name
+        self._calls: dict[Hashable, asyncio.Task] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable]):
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+            self.executions += 1
+            if self.name is not None:
+                metrics.FETCH_EXECUTIONS.labels(self.name).inc()
+        else:
+            self.coalesced += 1
+            if self.name is not None:
+                metrics.FETCH_COALESCED.labels(self.name).inc()
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+
+
+@dataclass(frozen=True)
+class CacheEntry:
+    """A cached value and the wall-clock time it was stored at.
+
+    ``stale`` marks a last-known-good value served because the upstream
+    failed; ``expires_at`` overrides the cache TTL for this entry. ``body``
+    is the JSON encoding of ``value`` and ``variants`` its other encodings
+    (see :mod:`app.encoding`), computed once when the entry is created and
+    kept by :func:`dataclasses.replace`.
+    """
+
+    value: Any
+    stored_at: float
+    stale: bool = False
+    expires_at: float | None = None
+    body: bytes | None = field(default=None, repr=False)
+    variants: dict[str, bytes] | None = field(
+        default=None, repr=False, compare=False
+    )
+
+    def __post_init__(self):
+        if self.body is None:
+            object.__setattr__(self, "body", encoding.json_body(self.value))
+        if self.variants is None and self.body is not None:
+            object.__setattr__(
+                self, "variants", encoding.variants(self.value, self.body)
+            )
+
+    @property
+    def age(self) -> float:
+        return max(0.0, time.time() - self.stored_at)
+
+
+def cached(cache, key=hashkey, expires=None):
+    """Memoize a coroutine function in ``cache``, coalescing misses.
+
+    Async counterpart of ``cachetools.cached``: the wrapper exposes the same
+    ``cache``, ``cache_key`` and ``cache_clear`` attributes, plus
+    ``cache_flight`` (the :class:`SingleFlight` holding the coalescing
+    counters), ``cache_refresh`` to recompute an entry, ``cache_entry``
+    to get the :class:`CacheEntry` (value and storage time) of a call and
+    ``cache_peek`` to read that entry without fetching on a miss.
+
+    ``expires``, if given, is called with each new value and returns the
+    wall-clock time its entry expires at (``None`` keeps the cache TTL).
+
+    When ``cache`` has a ``name``, successful results are also written to
+    the last-known-good store. A miss whose fetch fails is then answered
+    with the stored value, marked stale and cached for
+    ``settings.stale_ttl`` seconds, and ``cache_warm`` preloads the cache
+    from the store at startup.
+    """
+    name = getattr(cache, "name", None)
+
+    def store():
+        return None if name is None else lkg.get_store()
+
+    def get(k) -> CacheEntry | None:
+        try:
+            return cache[k]
+        except KeyError:
+            return None
+
+    def put(k, entry: CacheEntry) -> None:
+        try:
+            cache[k] = entry
+        except ValueError:
+            pass  # value too large
+
+    def stale(entry: CacheEntry, now: float) -> CacheEntry:
+        return replace(entry, stale=True, expires_at=now + settings.stale_ttl)
+
+    def decorator(func):
+        label = name or func.__name__
+        flight = SingleFlight(label)
+
+        async def load(k, args, kwargs):
+            try:
+                with metrics.FETCHES_IN_PROGRESS.labels(
+                    label
+                ).track_inprogress():
+                    value = await func(*args, **kwargs)
+            except Exception as exc:
+                metrics.FETCH_ERRORS.labels(
+                    label, type(exc).__name__
+                ).inc()
+                raise
+            expires_at = None if expires is None else expires(value)
+            entry = CacheEntry(value, time.time(), expires_at=expires_at)
+            put(k, entry)
+            lkg_store = store()
+            if lkg_store is not None:
+                lkg_store.save(name, k, entry)
+            return entry
+
+        async def cache_entry(*args, **kwargs) -> CacheEntry:
+            k = key(*args, **kwargs)
+            with timing.stage("cache"):
+                entry = get(k)
+            if entry is not None:
+                metrics.CACHE_REQUESTS.labels(label, "hit").inc()
+                return entry
+            metrics.CACHE_REQUESTS.labels(label, "miss").inc()
+            try:
+                with timing.stage("fetch"):
+                    return await flight.do(k, lambda: load(k, args, kwargs))
+            except Exception:
+                # The failed flight may be a refresh that does not fall back.
+                lkg_store = store()
+                last = None if lkg_store is None else lkg_store.get(name, k)
+                if last is None:
+                    raise
+            logger.warning("Serving last known %s value", name)
+            metrics.CACHE_REQUESTS.labels(label, "stale").inc()
+            entry = stale(last, time.time())
+            put(k, entry)
+            return entry
+
+        def cache_peek(*args, **kwargs) -> CacheEntry | None:
+            return get(key(*args, **kwargs))
+
+        async def wrapper(*args, **kwargs):
+            return (await cache_entry(*args, **kwargs)).value
+
+        async def cache_refresh(*args, **kwargs):
+            k = key(*args, **kwargs)
+            entry = await flight.do(k, lambda: load(k, args, kwargs))
+            return entry.value
+
+        def cache_warm() -> int:
+            """Copy stored entries missing from the cache; return the count.
+
+            Entries older than the cache TTL are loaded as stale ones.
+            """
+            lkg_store = store()
+            if lkg_store is None:
+                return 0
+            now = time.time()
+            count = 0
+            for k, entry in lkg_store.load(name).items():
+                if get(k) is not None:
+                    continue
+                expires_at = entry.expires_at
+                if expires_at is None:
+                    expires_at = entry.stored_at + cache.ttl
+                if expires_at > now:
+                    entry = replace(entry, expires_at=expires_at)
+                else:
+                    entry = stale(entry, now)
+                put(k, entry)
+                count += 1
+            return count
+
+        wrapper.cache = cache
+        wrapper.cache_key = key
+        wrapper.cache_clear = cache.clear
+        wrapper.cache_flight = flight
+        wrapper.cache_refresh = cache_refresh
+        wrapper.cache_entry = cache_entry
+        wrapper.cache_peek = cache_peek
+        wrapper.cache_warm = cache_warm
+        return functools.update_wrapper(wrapper, func)
+
+    return decorator
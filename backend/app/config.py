@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings
 
 
@@ -6,6 +8,42 @@ class Settings(BaseSettings):
     bls_api_key: str | None = None
     bea_api_key: str | None = None
     fred_api_key: str | None = None
+    refresh_enabled: bool = True
+    refresh_margin: float = 0.1
+    cache_backend: Literal["memory", "sqlite", "redis"] = "memory"
+    cache_path: str = "cache.sqlite3"
+    sqlite_timeout: float = 0.5
+    redis_url: str = "redis://localhost:6379/0"
+    redis_timeout: float = 0.5
+    upstream_timeout: float = 10.0
+    upstream_pool_size: int = 10
+    upstream_deadline: float = 10.0
+    upstream_retries: int = 2
+    upstream_backoff: float = 0.25
+    breaker_failures: int = 5
+    breaker_reset: float = 30.0
+    quota_enabled: bool = True
+    quota_workers: int = 1
+    quota_reserve: float = 0.25
+    quote_timeout: float = 5.0
+    stream_interval: float = 2.0
+    stream_keepalive: float = 15.0
+    lkg_enabled: bool = True
+    lkg_path: str = "lkg.sqlite3"
+    stale_ttl: float = 60.0
+    release_poll_interval: float = 300.0
+    release_poll_window: float = 21600.0
+    history_path: str = "history"
+    warmup_timeout: float = 10.0
+    critical_indicators: list[str] = [
+        "market_indices",
+        "latest_macro",
+        "fed_rate",
+    ]
+    slow_request_seconds: float = 1.0
+    profile_interval: float = 0.005
+    profile_path: str = "profiles"
+    profile_max_files: int = 50
 
     class Config:
         env_file = ".env"
@@ -1,10 +1,20 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from dataclasses import dataclass
 from datetime import datetime, timezone
-from xml.etree import ElementTree
-from cachetools import cached, TTLCache
-import requests
-import yfinance as yf
+import httpx
+from pydantic import BaseModel
 
+from . import history, metrics, timing, upstream
+from .breaker import get_breaker
+from .cache import CacheEntry, SingleFlight, cached, make_cache
 from .config import settings
+from .events import EventIndex
+from .feeds import XMLFeed
+from .releases import near_release, release_expiry
 from .schemas import (
     MarketIndices,
     Indicator,
@@ -15,20 +25,60 @@ from .schemas import (
     VIXClose,
     FomcNext,
     PowellSpeech,
+    Dashboard,
+    DashboardItem,
+    EconomicEvent,
+    FredObservation,
+    History,
+    HistoryPoint,
 )
 
-CACHE = TTLCache(maxsize=8, ttl=settings.ttl)
-MACRO_CACHE = TTLCache(maxsize=2, ttl=86400)
-PCE_CACHE = TTLCache(maxsize=1, ttl=86400)
-FRED_RATE_CACHE = TTLCache(maxsize=1, ttl=21600)
-VIX_CACHE = TTLCache(maxsize=1, ttl=21600)
-FOMC_NEXT_CACHE = TTLCache(maxsize=1, ttl=86400)
-POWELL_SPEECH_CACHE = TTLCache(maxsize=1, ttl=43200)
+logger = logging.getLogger(__name__)
 
+
+@dataclass(frozen=True)
+class FredSeries:
+    """A FRED series served from cache and refreshed in the background."""
+
+    series_id: str
+    name: str
+    unit: str
+    ttl: int
+    schema: type[BaseModel] = FredObservation
+
+
+# Adding a series here makes it available on /api/v1/fred/{series_id}.
+FRED_SERIES = {
+    spec.series_id: spec
+    for spec in (
+        FredSeries("FEDFUNDS", "Federal funds rate", "%", 21600, FedRate),
+        FredSeries("VIXCLS", "VIX close", "index", 21600, VIXClose),
+        FredSeries("DFII10", "10-year TIPS real yield", "%", 21600),
+        FredSeries("T10YIE", "10-year breakeven inflation", "%", 21600),
+        FredSeries("M2SL", "M2 money stock", "bn USD", 86400),
+    )
+}
+
+CACHE = make_cache("market_indices", maxsize=8, ttl=settings.ttl)
+MACRO_CACHE = make_cache("latest_macro", maxsize=2, ttl=86400)
+PCE_CACHE = make_cache("pce", maxsize=1, ttl=86400)
+FRED_RATE_CACHE = make_cache(
+    "fed_rate", maxsize=1, ttl=FRED_SERIES["FEDFUNDS"].ttl
+)
+VIX_CACHE = make_cache("vix", maxsize=1, ttl=FRED_SERIES["VIXCLS"].ttl)
+FOMC_NEXT_CACHE = make_cache("fomc_next", maxsize=1, ttl=86400)
+POWELL_SPEECH_CACHE = make_cache("powell_speech", maxsize=1, ttl=43200)
+FOMC_EVENTS_CACHE = make_cache("fomc_events", maxsize=1, ttl=86400)
+POWELL_EVENTS_CACHE = make_cache("powell_events", maxsize=1, ttl=43200)
+
+MARKET_PRICE_SYMBOL = "UUP"
+MARKET_VOLUME_SYMBOLS = ("SPY", "QQQ")
 BLS_BASE_URL = "https://api.bls.gov/publicAPI/v2/timeseries/data/"
 BLS_CPI_SERIES = "CUUR0000SA0"
 BLS_NFP_SERIES = "CES0000000001"
 BEA_BASE_URL = "https://apps.bea.gov/api/data/"
+# Table T20807 has one line per PCE component; line 1 is headline PCE.
+BEA_PCE_LINE = "1"
 FRED_BASE_URL = "https://api.stlouisfed.org/fred/series/observations"
 
 
@@ -40,240 +90,671 @@ def _get_fast_info_value(info: dict, key_base: str):
     )
 
 
+def _read_fast_info(symbol: str, field: str):
+    # Imported on first use: yfinance pulls in pandas, which would add about
+    # a second to the boot of every worker.
+    import yfinance as yf
+
+    with metrics.observe_upstream("yfinance"):
+        return _get_fast_info_value(yf.Ticker(symbol).fast_info, field)
+
+
+async def fetch_quotes(fields: dict[str, str]) -> dict[str, float]:
+    """Read one ``fast_info`` field per symbol, all symbols concurrently.
+
+    yfinance is blocking, so each symbol is read in a worker thread with its
+    own timeout. Symbols that fail or time out are left out of the result
+    rather than failing the whole batch. While the yfinance circuit is
+    open, no thread is started and :class:`CircuitOpen` is raised.
+    """
+    breaker = get_breaker("yfinance")
+    breaker.check()
+
+    async def read(symbol: str, field: str):
+        return await asyncio.wait_for(
+            asyncio.to_thread(_read_fast_info, symbol, field),
+            settings.quote_timeout,
+        )
+
+    results = await asyncio.gather(
+        *(read(symbol, field) for symbol, field in fields.items()),
+        return_exceptions=True,
+    )
+    quotes = {}
+    for symbol, result in zip(fields, results):
+        if isinstance(result, BaseException) or result is None:
+            logger.warning("No quote for %s: %r", symbol, result)
+            continue
+        quotes[symbol] = float(result)
+    if quotes:
+        breaker.record_success()
+    else:
+        breaker.record_failure()
+    return quotes
+
+
 @cached(CACHE)
-def fetch_market_indices() -> MarketIndices:
+async def fetch_market_indices() -> MarketIndices:
     """Fetch UUP last price and aggregated US volume from SPY and QQQ."""
     try:
-        uup_info = yf.Ticker("UUP").fast_info
-        spy_info = yf.Ticker("SPY").fast_info
-        qqq_info = yf.Ticker("QQQ").fast_info
-
-        price = _get_fast_info_value(uup_info, "last_price")
-        vol_spy = _get_fast_info_value(spy_info, "last_volume")
-        vol_qqq = _get_fast_info_value(qqq_info, "last_volume")
+        fields = {MARKET_PRICE_SYMBOL: "last_price"}
+        fields.update({s: "last_volume" for s in MARKET_VOLUME_SYMBOLS})
+        with timing.stage("yfinance"):
+            quotes = await fetch_quotes(fields)
 
-        if price is None or vol_spy is None or vol_qqq is None:
+        if len(quotes) < len(fields):
             raise RuntimeError("Missing data from yfinance")
 
         now = datetime.utcnow()
+        t = now.replace(tzinfo=timezone.utc).timestamp()
+        volume = sum(quotes[s] for s in MARKET_VOLUME_SYMBOLS)
+        history.record(MARKET_PRICE_SYMBOL, [(t, quotes[MARKET_PRICE_SYMBOL])])
+        history.record("US_VOLUME", [(t, volume)])
         return MarketIndices(
             dxy_proxy_uup=Indicator(
-                symbol="UUP",
-                value=float(price),
+                symbol=MARKET_PRICE_SYMBOL,
+                value=quotes[MARKET_PRICE_SYMBOL],
                 unit="USD",
                 last_updated_utc=now,
             ),
             volume_aggregated=Indicator(
                 symbol="US_VOLUME",
-                value=float(vol_spy) + float(vol_qqq),
+                value=volume,
                 unit="shares",
                 last_updated_utc=now,
             ),
         )
     except Exception as exc:
-        # Clear cache entry on error
-        CACHE.clear()
         raise RuntimeError("yfinance unavailable") from exc
 
 
-def _fetch_bls_series(series_id: str, name: str, unit: str) -> MacroStat:
-    params = {"latest": "true"}
-    if settings.bls_api_key:
-        params["registrationKey"] = settings.bls_api_key
-    resp = requests.get(
-        f"{BLS_BASE_URL}{series_id}",
-        params=params,
-        timeout=10,
+@dataclass(frozen=True)
+class BLSSeries:
+    """A BLS series refreshed as part of the batched BLS request."""
+
+    series_id: str
+    name: str
+    unit: str
+
+
+# Every registered series is pulled in the same POST, so adding one here
+# (core CPI, unemployment rate, ...) costs no extra BLS query.
+BLS_SERIES = {
+    spec.series_id: spec
+    for spec in (
+        BLSSeries(BLS_CPI_SERIES, "CPI", "index"),
+        BLSSeries(BLS_NFP_SERIES, "NFP", "k jobs"),
     )
-    resp.raise_for_status()
-    json_data = resp.json()
-    item = json_data["Results"]["series"][0]["data"][0]
+}
+BLS_SERIES_CACHE = make_cache(
+    "bls_series", maxsize=len(BLS_SERIES), ttl=86400
+)
+_bls_flight = SingleFlight("bls_series")
+
+
+def _parse_bls_observation(spec: BLSSeries, item: dict) -> MacroStat:
     year = item["year"]
     month = item["period"].lstrip("M")
     return MacroStat(
-        name=name,
+        name=spec.name,
         value=float(item["value"]),
-        unit=unit,
+        unit=spec.unit,
         date=f"{year}-{month}",
         source="BLS",
     )
 
 
-@cached(MACRO_CACHE)
-def fetch_latest_macro() -> LatestMacro:
+async def request_bls(
+    series: list[BLSSeries], start_year: int, end_year: int
+) -> dict[str, list[dict]]:
+    """Return the observations of several series from one BLS query.
+
+    Observations are listed newest first, keyed by series id. Queries made
+    right after a release of one of the series are urgent for the quota.
+    """
+    payload = {
+        "seriesid": [spec.series_id for spec in series],
+        "startyear": str(start_year),
+        "endyear": str(end_year),
+    }
+    if settings.bls_api_key:
+        payload["registrationkey"] = settings.bls_api_key
+    with timing.stage("bls"):
+        resp = await upstream.post(
+            BLS_BASE_URL,
+            json=payload,
+            urgent=near_release(spec.name for spec in series),
+        )
+    resp.raise_for_status()
+    with timing.stage("bls_decode"):
+        json_data = resp.json()
+    if json_data.get("status") != "REQUEST_SUCCEEDED":
+        raise RuntimeError(f"BLS request failed: {json_data.get('message')}")
+    return {
+        item["seriesID"]: item["data"]
+        for item in json_data["Results"]["series"]
+    }
+
+
+def _number(raw) -> float | None:
+    """Parse an upstream value; ``None`` for a marker such as ``-``."""
+    try:
+        return float(raw)
+    except (TypeError, ValueError):
+        return None
+
+
+def bls_points(data: list[dict]) -> list[tuple[float, float]]:
+    """Convert BLS observations to history points.
+
+    Months without a value (``-`` while unpublished) are skipped.
+    """
+    points = []
+    for obs in data:
+        value = _number(obs["value"])
+        # M13 is the annual average, not a monthly observation.
+        if obs["period"] == "M13" or value is None:
+            continue
+        month = obs["period"].lstrip("M")
+        points.append(
+            (history.observation_time(f"{obs['year']}-{month}"), value)
+        )
+    return points
+
+
+async def _fetch_bls_batch(series: list[BLSSeries]) -> dict[str, MacroStat]:
+    """Fetch the latest observation of several series in one BLS query."""
+    year = datetime.now(timezone.utc).year
+    # The previous year covers January, when the latest print is December's.
+    data_by_id = await request_bls(series, year - 1, year)
+    stats = {}
+    for spec in series:
+        data = data_by_id.get(spec.series_id)
+        if data:
+            stats[spec.series_id] = _parse_bls_observation(spec, data[0])
+            history.record(spec.name, bls_points(data))
+    return stats
+
+
+async def _refresh_bls_series() -> dict[str, MacroStat]:
+    stats = await _fetch_bls_batch(list(BLS_SERIES.values()))
+    now = time.time()
+    for series_id, stat in stats.items():
+        BLS_SERIES_CACHE[series_id] = CacheEntry(
+            stat, now, expires_at=release_expiry({stat.name: stat.date})
+        )
+    return stats
+
+
+async def refresh_bls_series() -> dict[str, MacroStat]:
+    """Refresh every registered BLS series with a single request.
+
+    Concurrent callers share the same request, and each series gets its own
+    entry in ``BLS_SERIES_CACHE``.
+    """
+    return await _bls_flight.do("bls", _refresh_bls_series)
+
+
+async def fetch_bls_series(*series_ids: str) -> dict[str, MacroStat]:
+    """Return the latest observation of registered BLS series.
+
+    Series are served from ``BLS_SERIES_CACHE``; any miss triggers one
+    batched refresh of all registered series.
+    """
+    stats = {}
+    for series_id in series_ids:
+        entry = BLS_SERIES_CACHE.get(series_id)
+        if entry is not None:
+            stats[series_id] = entry.value
+    if len(stats) < len(series_ids):
+        fresh = await refresh_bls_series()
+        stats = {series_id: fresh[series_id] for series_id in series_ids}
+    return stats
+
+
+def _macro_expiry(value: LatestMacro) -> float | None:
+    # Expire at the next CPI or NFP release, whichever comes first.
+    periods = {}
+    for series_id in BLS_SERIES:
+        entry = BLS_SERIES_CACHE.get(series_id)
+        if entry is not None:
+            periods[entry.value.name] = entry.value.date
+    return release_expiry(periods)
+
+
+@cached(MACRO_CACHE, expires=_macro_expiry)
+async def fetch_latest_macro() -> LatestMacro:
     """
     Return the most recently published macro indicator between CPI and NFP.
     """
     try:
-        cpi = _fetch_bls_series(BLS_CPI_SERIES, "CPI", "index")
-        nfp = _fetch_bls_series(BLS_NFP_SERIES, "NFP", "k jobs")
+        # Recomputing the indicator always pulls fresh series, so that a
+        # scheduled refresh is not served from BLS_SERIES_CACHE.
+        stats = await refresh_bls_series()
+        cpi = stats[BLS_CPI_SERIES]
+        nfp = stats[BLS_NFP_SERIES]
         latest = cpi if cpi.date >= nfp.date else nfp
         return LatestMacro(latest_macro=latest)
     except Exception as exc:
-        MACRO_CACHE.clear()
         raise RuntimeError("BLS unavailable") from exc
 
 
-@cached(PCE_CACHE)
-def fetch_pce() -> PCEStat:
-    """Return the latest monthly PCE percent change from BEA."""
-    if not settings.bea_api_key:
-        raise RuntimeError("BEA API key missing")
+def _bea_month(period: str) -> str:
+    """Turn a BEA ``2024M06`` (or ``2024-06``) period into ``2024-06``."""
+    if "M" in period:
+        year, month = period.split("M")
+    else:
+        year, month = period.split("-")[:2]
+    return f"{year}-{month}"
+
 
+async def request_bea_pce(years: str = "latest") -> list[dict]:
+    """Return the monthly rows of the BEA PCE price table for ``years``.
+
+    ``years`` is ``latest`` or a comma-separated list of years.
+    """
     params = {
         "UserID": settings.bea_api_key,
         "method": "GetData",
         "datasetname": "NIPA",
         "TableName": "T20807",
         "Frequency": "M",
-        "Year": "latest",
+        "Year": years,
         "ResultFormat": "JSON",
     }
+    with timing.stage("bea"):
+        resp = await upstream.get(
+            BEA_BASE_URL, params=params, urgent=near_release(["PCE"])
+        )
+    resp.raise_for_status()
+    with timing.stage("bea_decode"):
+        return resp.json()["BEAAPI"]["Results"]["Data"]
+
+
+def _headline_pce(data: list[dict]) -> list[dict]:
+    """Keep the headline PCE rows of the T20807 table."""
+    return [item for item in data if item.get("LineNumber") == BEA_PCE_LINE]
+
+
+def bea_points(data: list[dict]) -> list[tuple[float, float]]:
+    """Convert the headline PCE rows of a BEA table to history points."""
+    points = []
+    for item in _headline_pce(data):
+        value = _number(item["DataValue"])
+        if value is not None:
+            month = _bea_month(item["TimePeriod"])
+            points.append((history.observation_time(month), value))
+    return points
+
+
+@cached(PCE_CACHE, expires=lambda value: release_expiry({"PCE": value.date}))
+async def fetch_pce() -> PCEStat:
+    """Return the latest monthly PCE percent change from BEA."""
+    if not settings.bea_api_key:
+        raise RuntimeError("BEA API key missing")
 
     try:
-        resp = requests.get(BEA_BASE_URL, params=params, timeout=10)
-        resp.raise_for_status()
-        json_data = resp.json()
-        data = json_data["BEAAPI"]["Results"]["Data"]
-        latest = max(data, key=lambda item: item["TimePeriod"])
-        period = latest["TimePeriod"]
-        if "M" in period:
-            year, month = period.split("M")
-        else:
-            year, month = period.split("-")[:2]
+        data = await request_bea_pce()
+        latest = max(_headline_pce(data), key=lambda item: item["TimePeriod"])
+        history.record("PCE", bea_points(data))
         return PCEStat(
             name="PCE",
             value=float(latest["DataValue"]),
             unit="%",
-            date=f"{year}-{month}",
+            date=_bea_month(latest["TimePeriod"]),
             source="BEA",
         )
     except Exception as exc:
-        PCE_CACHE.clear()
         raise RuntimeError("BEA unavailable") from exc
 
 
-@cached(FRED_RATE_CACHE)
-def fetch_fed_rate() -> FedRate:
-    """Return the latest federal funds rate from FRED."""
-    if not settings.fred_api_key:
-        raise RuntimeError("FRED API key missing")
+async def request_fred(series_id: str, **params) -> list[dict]:
+    """Return the valid observations of a FRED series.
 
+    Extra ``params`` are passed to the ``series/observations`` endpoint.
+    Days without a value (reported as ``"."``) are skipped.
+    """
     params = {
-        "series_id": "FEDFUNDS",
+        "series_id": series_id,
         "api_key": settings.fred_api_key,
         "file_type": "json",
-        "sort_order": "desc",
-        "limit": 1,
+        **params,
     }
+    with timing.stage("fred"):
+        resp = await upstream.get(FRED_BASE_URL, params=params)
+    resp.raise_for_status()
+    with timing.stage("fred_decode"):
+        observations = resp.json()["observations"]
+    return [o for o in observations if o["value"] != "."]
+
+
+def fred_points(observations: list[dict]) -> list[tuple[float, float]]:
+    """Convert FRED observations to history points."""
+    return [
+        (history.observation_time(o["date"]), float(o["value"]))
+        for o in observations
+    ]
+
+
+async def _fetch_fred_series(spec: FredSeries) -> FredObservation:
+    """Fetch the latest valid observation of a registered FRED series."""
+    if not settings.fred_api_key:
+        raise RuntimeError("FRED API key missing")
 
     try:
-        resp = requests.get(FRED_BASE_URL, params=params, timeout=10)
-        resp.raise_for_status()
-        json_data = resp.json()
-        obs = json_data["observations"][0]
-        return FedRate(value=float(obs["value"]), date=obs["date"])
+        # Daily series report "." on market holidays; look a few rows back.
+        valid = await request_fred(
+            spec.series_id, sort_order="desc", limit=10
+        )
+        obs = valid[0]
+        history.record(spec.series_id, fred_points(valid))
+        return spec.schema(
+            series_id=spec.series_id,
+            value=float(obs["value"]),
+            unit=spec.unit,
+            date=obs["date"],
+        )
     except Exception as exc:
-        FRED_RATE_CACHE.clear()
         raise RuntimeError("FRED unavailable") from exc
 
 
+@cached(FRED_RATE_CACHE)
+async def fetch_fed_rate() -> FedRate:
+    """Return the latest federal funds rate from FRED."""
+    return await _fetch_fred_series(FRED_SERIES["FEDFUNDS"])
+
+
 @cached(VIX_CACHE)
-def fetch_vix() -> VIXClose:
+async def fetch_vix() -> VIXClose:
     """Return the latest VIX closing value from FRED."""
-    if not settings.fred_api_key:
-        raise RuntimeError("FRED API key missing")
+    return await _fetch_fred_series(FRED_SERIES["VIXCLS"])
 
-    params = {
-        "series_id": "VIXCLS",
-        "api_key": settings.fred_api_key,
-        "file_type": "json",
-        "sort_order": "desc",
-        "limit": 1,
-    }
 
-    try:
-        resp = requests.get(FRED_BASE_URL, params=params, timeout=10)
-        resp.raise_for_status()
-        json_data = resp.json()
-        obs = json_data["observations"][0]
-        return VIXClose(value=float(obs["value"]), date=obs["date"])
-    except Exception as exc:
-        VIX_CACHE.clear()
-        raise RuntimeError("FRED unavailable") from exc
+def _make_fred_fetcher(spec: FredSeries):
+    cache = make_cache(f"fred_{spec.series_id}", maxsize=1, ttl=spec.ttl)
 
+    @cached(cache)
+    async def fetch_fred_series() -> FredObservation:
+        return await _fetch_fred_series(spec)
 
-@cached(FOMC_NEXT_CACHE)
-def fetch_fomc_next() -> FomcNext | None:
-    """Return the next scheduled FOMC meeting parsed from the RSS feed."""
-    url = "https://www.federalreserve.gov/feeds/meetingcalendar.xml"
-    try:
-        resp = requests.get(url, timeout=10)
-        resp.raise_for_status()
-        xml_text = resp.text
-    except Exception as exc:
-        FOMC_NEXT_CACHE.clear()
-        raise RuntimeError("Fed RSS unavailable") from exc
+    return fetch_fred_series
 
+
+# One cached fetcher per registered FRED series, keyed by series id.
+FRED_FETCHERS = {
+    "FEDFUNDS": fetch_fed_rate,
+    "VIXCLS": fetch_vix,
+}
+for _spec in FRED_SERIES.values():
+    if _spec.series_id not in FRED_FETCHERS:
+        FRED_FETCHERS[_spec.series_id] = _make_fred_fetcher(_spec)
+
+
+FOMC_FEED = XMLFeed("https://www.federalreserve.gov/feeds/meetingcalendar.xml")
+POWELL_FEED = XMLFeed("https://www.federalreserve.gov/feeds/press_all.xml")
+
+
+async def _read_fed_feed(feed: XMLFeed, select):
     try:
-        root = ElementTree.fromstring(xml_text)
-        items = root.findall(".//item")
-        now = datetime.now(timezone.utc)
-        for item in items:
-            start_text = item.findtext("start")
-            if not start_text:
-                continue
-            dt = datetime.fromisoformat(start_text.replace("Z", "+00:00"))
-            if dt > now:
-                title = item.findtext("title") or ""
-                link = item.findtext("link") or ""
-                return FomcNext(
-                    date=dt.strftime("%Y-%m-%d"),
-                    time=dt.strftime("%H:%M"),
-                    title=title,
-                    url=link,
-                )
-        return None
+        with timing.stage("fed_feed"):
+            return await feed.fetch(select)
+    except httpx.HTTPError as exc:
+        raise RuntimeError("Fed RSS unavailable") from exc
     except Exception as exc:
-        FOMC_NEXT_CACHE.clear()
         raise RuntimeError("RSS parse error") from exc
 
 
-@cached(POWELL_SPEECH_CACHE)
-def fetch_powell_speech() -> PowellSpeech | None:
-    """Return the next Powell speech parsed from the Fed press RSS feed."""
-    url = "https://www.federalreserve.gov/feeds/press_all.xml"
-    try:
-        resp = requests.get(url, timeout=10)
-        resp.raise_for_status()
-        xml_text = resp.text
-    except Exception as exc:
-        POWELL_SPEECH_CACHE.clear()
-        raise RuntimeError("Fed RSS unavailable") from exc
+async def _fomc_events(items) -> EventIndex:
+    events = []
+    async for item in items:
+        start_text = item.findtext("start")
+        if not start_text:
+            continue
+        events.append(
+            EconomicEvent(
+                kind="fomc",
+                starts_at=datetime.fromisoformat(
+                    start_text.replace("Z", "+00:00")
+                ),
+                title=item.findtext("title") or "",
+                url=item.findtext("link") or "",
+            )
+        )
+    return EventIndex(events)
+
+
+async def _powell_events(items) -> EventIndex:
+    events = []
+    async for item in items:
+        title = item.findtext("title") or ""
+        desc = item.findtext("description") or ""
+        if "powell" not in (title + desc).lower():
+            continue
+        pubdate_text = item.findtext("pubDate")
+        if not pubdate_text:
+            continue
+        dt = datetime.strptime(pubdate_text, "%a, %d %b %Y %H:%M:%S %z")
+        events.append(
+            EconomicEvent(
+                kind="powell_speech",
+                starts_at=dt.astimezone(timezone.utc),
+                title=title,
+                url=item.findtext("link") or "",
+            )
+        )
+    return EventIndex(events)
+
+
+@cached(FOMC_EVENTS_CACHE)
+async def fetch_fomc_events() -> EventIndex:
+    """Return every meeting of the FOMC calendar feed, indexed by time.
+
+    The feed is streamed and revalidated with a conditional GET, so it is
+    only parsed again when it changes.
+    """
+    return await _read_fed_feed(FOMC_FEED, _fomc_events)
+
+
+@cached(POWELL_EVENTS_CACHE)
+async def fetch_powell_events() -> EventIndex:
+    """Return every Powell item of the Fed press feed, indexed by time."""
+    return await _read_fed_feed(POWELL_FEED, _powell_events)
 
+
+def _until_start(ttl: float):
+    """Expire a next-event entry when the event starts (or after ``ttl``).
+    """
+
+    def expires(event) -> float | None:
+        if event is None:
+            return None
+        starts_at = datetime.fromisoformat(
+            f"{event.date}T{event.time}+00:00"
+        ).timestamp()
+        return min(starts_at, time.time() + ttl)
+
+    return expires
+
+
+def _next_event(index: EventIndex, schema):
+    event = index.next()
+    if event is None:
+        return None
+    return schema(
+        date=event.starts_at.strftime("%Y-%m-%d"),
+        time=event.starts_at.strftime("%H:%M"),
+        title=event.title,
+        url=event.url,
+    )
+
+
+@cached(FOMC_NEXT_CACHE, expires=_until_start(FOMC_NEXT_CACHE.ttl))
+async def fetch_fomc_next() -> FomcNext | None:
+    """Return the next scheduled FOMC meeting.
+
+    Answered from the event index; the entry expires when the meeting
+    starts, so the answer rolls forward to the following one.
+    """
+    return _next_event(await fetch_fomc_events(), FomcNext)
+
+
+@cached(
+    POWELL_SPEECH_CACHE, expires=_until_start(POWELL_SPEECH_CACHE.ttl)
+)
+async def fetch_powell_speech() -> PowellSpeech | None:
+    """Return the next Powell speech from the Fed press feed."""
+    return _next_event(await fetch_powell_events(), PowellSpeech)
+
+
+EVENT_FETCHERS = {
+    "fomc": fetch_fomc_events,
+    "powell_speech": fetch_powell_events,
+}
+
+
+def _as_utc(dt: datetime | None) -> datetime | None:
+    if dt is not None and dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
+async def fetch_events(
+    kinds=None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    limit: int = 10,
+) -> list[EconomicEvent]:
+    """Return scheduled events of the given kinds, earliest first.
+
+    Without ``start`` or ``end`` the next ``limit`` events are returned;
+    otherwise those starting in ``[start, end)``, up to ``limit``. Naive
+    datetimes are taken as UTC.
+    """
+    kinds = kinds or list(EVENT_FETCHERS)
+    indexes = await asyncio.gather(
+        *(EVENT_FETCHERS[kind]() for kind in kinds)
+    )
+    start, end = _as_utc(start), _as_utc(end)
+    if start is None and end is None:
+        groups = [index.upcoming(limit) for index in indexes]
+    else:
+        start = start or datetime.min.replace(tzinfo=timezone.utc)
+        groups = [index.between(start, end) for index in indexes]
+    merged = heapq.merge(*groups, key=lambda event: event.starts_at)
+    return list(itertools.islice(merged, limit))
+
+
+# Cached fetchers refreshed in the background by ``app.scheduler``.
+FETCHERS = {
+    "market_indices": fetch_market_indices,
+    "latest_macro": fetch_latest_macro,
+    "pce": fetch_pce,
+    "fed_rate": fetch_fed_rate,
+    "vix": fetch_vix,
+    "fomc_next": fetch_fomc_next,
+    "powell_speech": fetch_powell_speech,
+}
+
+# Everything the background scheduler keeps warm: the dashboard indicators,
+# the event indexes and the FRED series only served through
+# /api/v1/fred/{series_id}.
+REFRESH_TARGETS = {
+    **FETCHERS,
+    **{f"{kind}_events": func for kind, func in EVENT_FETCHERS.items()},
+    **{
+        f"fred_{series_id}": func
+        for series_id, func in FRED_FETCHERS.items()
+        if func not in FETCHERS.values()
+    },
+}
+
+
+# Setting of the API key each indicator cannot be fetched without.
+API_KEYS = {
+    "pce": "bea_api_key",
+    **{
+        name: "fred_api_key"
+        for name, func in REFRESH_TARGETS.items()
+        if func in FRED_FETCHERS.values()
+    },
+}
+
+
+# Dashboard names accepted by /api/v1/history besides the series names.
+HISTORY_ALIASES = {"fed_rate": "FEDFUNDS", "vix": "VIXCLS"}
+
+
+def read_history(
+    indicator: str,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    points: int | None = None,
+) -> History | None:
+    """Return the stored history of a series, or ``None`` if there is none.
+
+    Only the local store is read, never an upstream. ``points`` caps the
+    number of returned points by averaging consecutive observations.
+    """
+    series = HISTORY_ALIASES.get(indicator.lower(), indicator.upper())
+    start, end = _as_utc(start), _as_utc(end)
     try:
-        root = ElementTree.fromstring(xml_text)
-        items = root.findall(".//item")
-        now = datetime.now(timezone.utc)
-        for item in items:
-            title = item.findtext("title") or ""
-            desc = item.findtext("description") or ""
-            if "powell" not in (title + desc).lower():
-                continue
-            pubdate_text = item.findtext("pubDate")
-            if not pubdate_text:
-                continue
-            dt = datetime.strptime(pubdate_text, "%a, %d %b %Y %H:%M:%S %z")
-            dt_utc = dt.astimezone(timezone.utc)
-            if dt_utc > now:
-                link = item.findtext("link") or ""
-                return PowellSpeech(
-                    date=dt_utc.strftime("%Y-%m-%d"),
-                    time=dt_utc.strftime("%H:%M"),
-                    title=title,
-                    url=link,
-                )
+        data = history.get_store().read(
+            series,
+            None if start is None else start.timestamp(),
+            None if end is None else end.timestamp(),
+        )
+    except ValueError:
         return None
-    except Exception as exc:
-        POWELL_SPEECH_CACHE.clear()
-        raise RuntimeError("RSS parse error") from exc
+    if not len(data) and series not in history.get_store().series():
+        return None
+    if points:
+        data = history.downsample(data, points)
+    return History(
+        indicator=series,
+        points=[
+            HistoryPoint(
+                timestamp=datetime.fromtimestamp(t, timezone.utc), value=v
+            )
+            for t, v in data.tolist()
+        ],
+    )
+
+
+def coalescing_stats() -> dict[str, dict[str, int]]:
+    """Return upstream executions and coalesced waiters per fetcher."""
+    return {
+        name: {
+            "executions": func.cache_flight.executions,
+            "coalesced": func.cache_flight.coalesced,
+        }
+        for name, func in FETCHERS.items()
+    }
+
+
+def _dashboard_item(result) -> DashboardItem:
+    if isinstance(result, Exception):
+        return DashboardItem(status="error", error=str(result))
+    return DashboardItem(
+        status="ok",
+        data=result.value,
+        updated_at=datetime.fromtimestamp(result.stored_at, timezone.utc),
+        age_seconds=round(result.age, 3),
+        stale=result.stale,
+    )
+
+
+async def fetch_dashboard() -> Dashboard:
+    """Return every indicator at once, fetching cold ones concurrently.
+
+    A failing upstream only marks its own item as ``error``; the other
+    indicators are still returned.
+    """
+    results = await asyncio.gather(
+        *(func.cache_entry() for func in FETCHERS.values()),
+        return_exceptions=True,
+    )
+    items = {
+        name: _dashboard_item(result)
+        for name, result in zip(FETCHERS, results)
+    }
+    return Dashboard(generated_at=datetime.now(timezone.utc), **items)
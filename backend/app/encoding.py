@@ -0,0 +1,127 @@
+"""Encodings of indicator responses, negotiated with the request headers.
+
+Besides plain JSON, a response can be sent as MessagePack (``Accept:
+application/msgpack``), where datetimes are MessagePack timestamps instead
+of ISO strings, or as JSON compressed with brotli or gzip
+(``Accept-Encoding``). Cached indicators carry every variant, encoded once
+when the entry is stored.
+"""
+
+import gzip
+from datetime import datetime, timezone
+
+import brotli
+import msgpack
+from pydantic import BaseModel
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+_MSGPACK_TYPES = (MSGPACK, "application/x-msgpack")
+
+# Content type and content encoding of each variant.
+VARIANTS = {
+    "msgpack": (MSGPACK, None),
+    "br": (JSON, "br"),
+    "gzip": (JSON, "gzip"),
+}
+
+
+def json_body(value) -> bytes | None:
+    """Encode a model (or ``None``) as a JSON response body.
+
+    Other values, such as the event indexes, are never served as is and
+    have no body.
+    """
+    if value is None:
+        return b"null"
+    if isinstance(value, BaseModel):
+        return value.model_dump_json().encode()
+    return None
+
+
+def _default(obj):
+    if isinstance(obj, datetime):
+        if obj.tzinfo is None:
+            # Naive datetimes of the schemas are UTC.
+            obj = obj.replace(tzinfo=timezone.utc)
+        return msgpack.Timestamp.from_datetime(obj)
+    raise TypeError(f"Cannot pack {type(obj).__name__}")
+
+
+def pack(value) -> bytes:
+    """Encode a model (or ``None``) as MessagePack."""
+    data = None if value is None else value.model_dump()
+    return msgpack.packb(data, default=_default)
+
+
+def encode(value, body: bytes, variant: str) -> bytes:
+    """Return ``variant`` of a response whose JSON body is ``body``."""
+    if variant == "msgpack":
+        return pack(value)
+    if variant == "br":
+        return brotli.compress(body, mode=brotli.MODE_TEXT)
+    return gzip.compress(body, mtime=0)
+
+
+def variants(value, body: bytes) -> dict[str, bytes]:
+    """Return every variant of a response worth sending.
+
+    Compressed JSON is left out when it is not smaller than ``body``, which
+    happens with the shortest payloads.
+    """
+    encoded = {name: encode(value, body, name) for name in VARIANTS}
+    return {
+        name: data
+        for name, data in encoded.items()
+        if VARIANTS[name][1] is None or len(data) < len(body)
+    }
+
+
+def _weights(header: str | None) -> dict[str, float]:
+    weights = {}
+    for item in (header or "").split(","):
+        token, *params = item.split(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[token] = q
+    return weights
+
+
+def _media_weight(weights: dict[str, float], media_type: str) -> float:
+    kind = media_type.split("/")[0]
+    for candidate in (media_type, f"{kind}/*", "*/*"):
+        if candidate in weights:
+            return weights[candidate]
+    return 0.0
+
+
+def negotiate(
+    accept: str | None, accept_encoding: str | None, available
+) -> str | None:
+    """Return the variant to send, or ``None`` for plain JSON.
+
+    MessagePack is chosen only when the client prefers it to JSON, so
+    ``*/*`` keeps getting JSON. Otherwise brotli is preferred to gzip among
+    the encodings the client accepts.
+    """
+    if accept and "msgpack" in available:
+        weights = _weights(accept)
+        packed = max(_media_weight(weights, t) for t in _MSGPACK_TYPES)
+        if packed > 0 and packed > _media_weight(weights, JSON):
+            return "msgpack"
+    encodings = _weights(accept_encoding)
+    best, best_q = None, 0.0
+    for name in ("br", "gzip"):
+        q = encodings.get(name, encodings.get("*", 0.0))
+        if name in available and q > best_q:
+            best, best_q = name, q
+    return best
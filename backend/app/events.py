@@ -0,0 +1,44 @@
+"""Time-sorted index of scheduled events (FOMC meetings, Fed speeches)."""
+
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+
+from .schemas import EconomicEvent
+
+
+class EventIndex:
+    """Events sorted by start time and looked up by bisection.
+
+    Built once per feed change, then every query costs ``O(log n)`` plus the
+    size of its answer, so the next event is recomputed on each call instead
+    of being frozen at parse time.
+    """
+
+    def __init__(self, events=()):
+        self.events = sorted(events, key=lambda event: event.starts_at)
+        self._starts = [event.starts_at for event in self.events]
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def upcoming(
+        self, limit: int, now: datetime | None = None
+    ) -> list[EconomicEvent]:
+        """Return the next ``limit`` events starting after ``now``."""
+        now = datetime.now(timezone.utc) if now is None else now
+        i = bisect_right(self._starts, now)
+        return self.events[i:i + limit]
+
+    def next(self, now: datetime | None = None) -> EconomicEvent | None:
+        upcoming = self.upcoming(1, now)
+        return upcoming[0] if upcoming else None
+
+    def between(
+        self, start: datetime, end: datetime | None = None
+    ) -> list[EconomicEvent]:
+        """Return the events starting in ``[start, end)``."""
+        i = bisect_left(self._starts, start)
+        j = len(self._starts) if end is None else bisect_left(
+            self._starts, end
+        )
+        return self.events[i:j]
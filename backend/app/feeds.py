@@ -0,0 +1,70 @@
+"""Conditional, incrementally parsed XML feeds."""
+
+from typing import AsyncIterator, Awaitable, Callable
+from xml.etree import ElementTree
+
+from . import upstream
+
+_MISSING = object()
+
+
+async def iter_items(
+    chunks: AsyncIterator[bytes], tag: str = "item"
+) -> AsyncIterator[ElementTree.Element]:
+    """Yield every ``tag`` element as soon as its closing tag is parsed.
+
+    Yielded elements are cleared once the consumer moves on, so the document
+    is never held in memory as a whole. Raises ``ElementTree.ParseError`` if
+    the document is malformed or truncated.
+    """
+    parser = ElementTree.XMLPullParser(events=("end",))
+    async for chunk in chunks:
+        parser.feed(chunk)
+        for _, elem in parser.read_events():
+            if elem.tag == tag:
+                yield elem
+                elem.clear()
+    parser.close()
+    for _, elem in parser.read_events():
+        if elem.tag == tag:
+            yield elem
+
+
+class XMLFeed:
+    """An XML feed fetched with conditional GETs.
+
+    The ``ETag`` and ``Last-Modified`` of the last response are sent back so
+    an unchanged feed costs a ``304`` and the previous result is reused.
+    """
+
+    def __init__(self, url: str):
+        self.url = url
+        self.etag: str | None = None
+        self.last_modified: str | None = None
+        self._result = _MISSING
+
+    async def fetch(self, select: Callable[[AsyncIterator], Awaitable]):
+        """Return ``select(items)`` for the current feed.
+
+        ``select`` consumes the items of :func:`iter_items` and may stop
+        early, which closes the response without reading the rest.
+        """
+        headers = {}
+        if self._result is not _MISSING:
+            if self.etag:
+                headers["If-None-Match"] = self.etag
+            if self.last_modified:
+                headers["If-Modified-Since"] = self.last_modified
+        async with upstream.stream(self.url, headers=headers) as resp:
+            if resp.status_code == 304 and headers:
+                return self._result
+            resp.raise_for_status()
+            items = iter_items(resp.aiter_bytes())
+            try:
+                result = await select(items)
+            finally:
+                await items.aclose()
+        self.etag = resp.headers.get("ETag")
+        self.last_modified = resp.headers.get("Last-Modified")
+        self._result = result
+        return result
@@ -0,0 +1,152 @@
+"""Local time-series store of every observation seen by the fetchers."""
+
+import logging
+import os
+import re
+from datetime import datetime, timezone
+from typing import Iterable
+
+import numpy as np
+
+from . import timing
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# One row per observation: epoch seconds (UTC) and value.
+POINT = np.dtype([("t", "<f8"), ("v", "<f8")])
+
+_SERIES_NAME = re.compile(r"^[A-Z0-9_]+$")
+
+
+def observation_time(date: str) -> float:
+    """Return the epoch time of a ``YYYY-MM`` or ``YYYY-MM-DD`` date."""
+    if len(date) == 7:
+        date += "-01"
+    return datetime.fromisoformat(date).replace(
+        tzinfo=timezone.utc
+    ).timestamp()
+
+
+class HistoryStore:
+    """Time-sorted observations, one ``.npy`` file per series.
+
+    Files are memory-mapped for reads, so range queries only touch the
+    pages they need. Writes merge the new points into a copy that atomically
+    replaces the file; readers holding the previous mapping are unaffected.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._maps: dict[str, tuple[int, np.ndarray]] = {}
+
+    def _path(self, series: str) -> str:
+        if not _SERIES_NAME.match(series):
+            raise ValueError(f"Invalid series name: {series}")
+        return os.path.join(self.directory, f"{series}.npy")
+
+    def series(self) -> list[str]:
+        return sorted(
+            name[:-4]
+            for name in os.listdir(self.directory)
+            if name.endswith(".npy")
+        )
+
+    def read(
+        self,
+        series: str,
+        start: float | None = None,
+        end: float | None = None,
+    ) -> np.ndarray:
+        """Return the points of ``series`` with ``start <= t < end``."""
+        path = self._path(series)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return np.empty(0, dtype=POINT)
+        cached = self._maps.get(series)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, np.load(path, mmap_mode="r"))
+            self._maps[series] = cached
+        data = cached[1]
+        i = 0 if start is None else np.searchsorted(data["t"], start)
+        j = len(data) if end is None else np.searchsorted(data["t"], end)
+        return data[i:j]
+
+    def append(
+        self, series: str, points: Iterable[tuple[float, float]]
+    ) -> int:
+        """Merge ``(time, value)`` points into ``series``.
+
+        A point at an existing time replaces it (data revisions). Returns the
+        number of stored points, and leaves the file untouched when nothing
+        changed.
+        """
+        new = np.array(list(points), dtype=POINT)
+        existing = self.read(series)
+        if not len(new):
+            return len(existing)
+        merged = np.concatenate([existing, new])
+        # Stable sort keeps the new point last among equal times.
+        merged = merged[np.argsort(merged["t"], kind="stable")]
+        last = np.append(merged["t"][1:] != merged["t"][:-1], True)
+        merged = merged[last]
+        if np.array_equal(merged, existing):
+            return len(merged)
+        path = self._path(series)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, merged)
+        os.replace(tmp, path)
+        return len(merged)
+
+    def record(
+        self, series: str, points: Iterable[tuple[float, float]]
+    ) -> None:
+        """Like :meth:`append`, but log failures instead of raising them."""
+        try:
+            with timing.stage("history"):
+                self.append(series, points)
+        except (OSError, ValueError) as exc:
+            logger.warning("Could not record %s history: %s", series, exc)
+
+
+def downsample(data: np.ndarray, points: int) -> np.ndarray:
+    """Reduce ``data`` to at most ``points`` buckets of consecutive rows.
+
+    Each bucket keeps the time of its first row and the mean of its values.
+    """
+    if points <= 0 or len(data) <= points:
+        return data
+    starts = np.linspace(0, len(data), points, endpoint=False).astype(int)
+    counts = np.diff(np.append(starts, len(data)))
+    out = np.empty(points, dtype=POINT)
+    out["t"] = data["t"][starts]
+    out["v"] = np.add.reduceat(data["v"], starts) / counts
+    return out
+
+
+_store: HistoryStore | None = None
+
+
+def get_store() -> HistoryStore:
+    """Return the store in ``settings.history_path``."""
+    global _store
+    if _store is None or _store.directory != settings.history_path:
+        _store = HistoryStore(settings.history_path)
+    return _store
+
+
+def record(series: str, points: Iterable[tuple[float, float]]) -> None:
+    """Append ``points`` to ``series`` in the store, logging any failure.
+
+    Fetchers record their observations with this, so that a history
+    directory that cannot be created does not fail the fetch itself.
+    """
+    try:
+        store = get_store()
+    except OSError as exc:
+        logger.warning("Could not record %s history: %s", series, exc)
+        return
+    store.record(series, points)
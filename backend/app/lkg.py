@@ -0,0 +1,93 @@
+"""On-disk store of the last successfully fetched value of each indicator."""
+
+import logging
+import pickle
+import sqlite3
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LastKnownGoodStore:
+    """Persist cache entries in SQLite so they survive restarts.
+
+    Entries are written after every successful fetch and read back at
+    startup (warm start) or when an upstream fails (serve stale). The store
+    is best effort: its errors are logged and read as missing entries.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(
+            path, timeout=settings.sqlite_timeout, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS lkg ("
+                "name TEXT, key TEXT, raw_key BLOB, entry BLOB, "
+                "PRIMARY KEY (name, key))"
+            )
+
+    def save(self, name: str, key, entry) -> None:
+        try:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO lkg VALUES (?, ?, ?, ?)",
+                    (name, repr(key), pickle.dumps(key), pickle.dumps(entry)),
+                )
+        except sqlite3.Error as exc:
+            logger.warning("Could not persist %s: %s", name, exc)
+
+    def get(self, name: str, key):
+        # Rows pickled by an older release may no longer load.
+        try:
+            row = self._conn.execute(
+                "SELECT entry FROM lkg WHERE name = ? AND key = ?",
+                (name, repr(key)),
+            ).fetchone()
+            return None if row is None else pickle.loads(row[0])
+        except Exception as exc:
+            logger.warning("Could not read %s: %s", name, exc)
+            return None
+
+    def load(self, name: str) -> dict:
+        try:
+            rows = self._conn.execute(
+                "SELECT raw_key, entry FROM lkg WHERE name = ?", (name,)
+            )
+            return {pickle.loads(k): pickle.loads(e) for k, e in rows}
+        except Exception as exc:
+            logger.warning("Could not read %s: %s", name, exc)
+            return {}
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+_store: LastKnownGoodStore | None = None
+_unavailable: str | None = None
+
+
+def get_store() -> LastKnownGoodStore | None:
+    """Return the store configured by ``settings``, or ``None`` if off.
+
+    ``None`` is also returned when the store cannot be opened (e.g. a
+    read-only filesystem); the failure is logged once per path.
+    """
+    global _store, _unavailable
+    if not settings.lkg_enabled or settings.lkg_path == _unavailable:
+        return None
+    if _store is None or _store.path != settings.lkg_path:
+        try:
+            _store = LastKnownGoodStore(settings.lkg_path)
+        except sqlite3.Error as exc:
+            logger.warning(
+                "Last-known-good store %s unavailable: %s",
+                settings.lkg_path,
+                exc,
+            )
+            _unavailable = settings.lkg_path
+            return None
+    return _store
@@ -1,6 +1,32 @@
-from fastapi import FastAPI, HTTPException
+import logging
+import time
+from contextlib import asynccontextmanager
+from dataclasses import asdict
+from datetime import datetime
+from typing import Literal
 
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from . import (
+    STARTED_AT,
+    breaker,
+    encoding,
+    metrics,
+    quota,
+    timing,
+    upstream,
+    warmup,
+)
+from .config import settings
 from .crud import (
+    API_KEYS,
+    FETCHERS,
+    FRED_FETCHERS,
+    REFRESH_TARGETS,
+    fetch_dashboard,
+    fetch_events,
+    read_history,
     fetch_market_indices,
     fetch_latest_macro,
     fetch_pce,
@@ -10,96 +36,303 @@ from .crud import (
     fetch_powell_speech,
 )
 from .schemas import (
+    Dashboard,
+    EconomicEvent,
+    History,
     MarketIndices,
     LatestMacro,
     PCEStat,
     FedRate,
+    FredObservation,
     VIXClose,
     FomcNext,
     PowellSpeech,
+    UpstreamStatus,
 )
+from .responses import (
+    cache_headers,
+    entry_body,
+    entry_variants,
+    etag_matches,
+    representation,
+)
+from .scheduler import RefreshScheduler, build_jobs
+from .stream import IndicatorWatcher, sse_events
 
-app = FastAPI(title="Goldapp API")
+logger = logging.getLogger(__name__)
 
+watcher = IndicatorWatcher(FETCHERS, settings.stream_interval)
+readiness = warmup.Readiness(REFRESH_TARGETS, API_KEYS)
 
-# Returns UUP price and aggregated US equity volume.
-# Any error leads to a 503 response for the API client.
-#
-# NOTE: fetch_market_indices() is a synchronous function. The FastAPI handler
-# must therefore remain synchronous to ensure exceptions raised by the CRUD
-# layer propagate correctly to the client. Declaring this handler as
-# ``async`` would cause FastAPI to swallow sync exceptions and return HTTP 200
-# instead of 503 in tests.
-@app.get("/api/v1/market_indices", response_model=MarketIndices)
-def get_market_indices():
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    started = time.perf_counter()
+    # Serve the last values persisted before the restart while the first
+    # refresh runs.
+    warmed = sum(func.cache_warm() for func in REFRESH_TARGETS.values())
+    logger.info("Warm start: %d cached entries restored", warmed)
+    # Then fetch what is missing or stale, without holding the boot for more
+    # than warmup_timeout; slower fetches complete in the background.
+    readiness.reset()
+    report, prefetching = await warmup.prefetch(
+        REFRESH_TARGETS, settings.warmup_timeout
+    )
+    readiness.report = report
+    logger.info(
+        "Warm-up in %.2fs: %d fetched, stale %s, failed %s, pending %s",
+        report.seconds,
+        len(report.warmed),
+        report.stale,
+        list(report.failed),
+        report.pending,
+    )
+    readiness.check()
+    # Refresh every cached indicator shortly before its TTL lapses so that
+    # requests are served from the cache instead of waiting on upstreams.
+    scheduler = None
+    if settings.refresh_enabled:
+        scheduler = RefreshScheduler(
+            build_jobs(REFRESH_TARGETS, settings.refresh_margin)
+        )
+        scheduler.start()
+    watcher.start()
+    ready = time.perf_counter()
+    metrics.STARTUP_SECONDS.labels("import").set(started - STARTED_AT)
+    metrics.STARTUP_SECONDS.labels("ready").set(ready - STARTED_AT)
+    logger.info(
+        "Ready in %.2fs (imports %.2fs)",
+        ready - STARTED_AT,
+        started - STARTED_AT,
+    )
+    yield
+    for task in prefetching:
+        task.cancel()
+    await watcher.stop()
+    if scheduler is not None:
+        await scheduler.stop()
+    await upstream.aclose()
+
+
+app = FastAPI(title="Goldapp API", lifespan=lifespan)
+app.add_middleware(metrics.MetricsMiddleware)
+app.add_middleware(timing.TimingMiddleware)
+
+
+async def _serve(fetcher, request: Request, nullable=False):
+    """Return a cached indicator along with its HTTP caching headers.
+
+    The body is the JSON, MessagePack or compressed JSON negotiated with
+    the request headers, encoded once when the entry was stored and sent as
+    is rather than validated and serialized again on every request. Any
+    error leads to a 503 response for the API client, as does a missing
+    value unless the endpoint is ``nullable``. A matching ``If-None-Match``
+    short-circuits to 304 without a body.
+    """
     try:
-        data = fetch_market_indices()
+        entry = await fetcher.cache_entry()
     except Exception:
         raise HTTPException(status_code=503, detail="Service Unavailable")
-    if data is None:
+    if entry.value is None and not nullable:
         raise HTTPException(status_code=503, detail="Service Unavailable")
-    return data
+    with timing.stage("encode"):
+        headers = cache_headers(entry, fetcher.cache.ttl)
+        content, extra = representation(
+            entry_body(entry),
+            entry_variants(entry),
+            request.headers,
+            headers["ETag"],
+        )
+    headers.update(extra)
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(content, headers=headers)
+
+
+# Returns UUP price and aggregated US equity volume.
+@app.get("/api/v1/market_indices", response_model=MarketIndices)
+async def get_market_indices(request: Request):
+    return await _serve(fetch_market_indices, request)
 
 
 @app.get("/api/v1/latest_macro", response_model=LatestMacro)
-def get_latest_macro():
-    try:
-        data = fetch_latest_macro()
-    except Exception:
-        raise HTTPException(status_code=503, detail="Service Unavailable")
-    if data is None:
-        raise HTTPException(status_code=503, detail="Service Unavailable")
-    return data
+async def get_latest_macro(request: Request):
+    return await _serve(fetch_latest_macro, request)
 
 
 @app.get("/api/v1/pce", response_model=PCEStat)
-def get_pce():
-    try:
-        data = fetch_pce()
-    except Exception:
-        raise HTTPException(status_code=503, detail="Service Unavailable")
-    if data is None:
-        raise HTTPException(status_code=503, detail="Service Unavailable")
-    return data
+async def get_pce(request: Request):
+    return await _serve(fetch_pce, request)
 
 
 @app.get("/api/v1/fed_rate", response_model=FedRate)
-def get_fed_rate():
-    try:
-        data = fetch_fed_rate()
-    except Exception:
-        raise HTTPException(status_code=503, detail="Service Unavailable")
-    if data is None:
-        raise HTTPException(status_code=503, detail="Service Unavailable")
-    return data
+async def get_fed_rate(request: Request):
+    return await _serve(fetch_fed_rate, request)
 
 
 @app.get("/api/v1/vix", response_model=VIXClose)
-def get_vix():
-    try:
-        data = fetch_vix()
-    except Exception:
-        raise HTTPException(status_code=503, detail="Service Unavailable")
-    if data is None:
-        raise HTTPException(status_code=503, detail="Service Unavailable")
-    return data
+async def get_vix(request: Request):
+    return await _serve(fetch_vix, request)
 
 
 @app.get("/api/v1/fomc_next", response_model=FomcNext | None)
-def get_fomc_next():
+async def get_fomc_next(request: Request):
     """Return the next upcoming FOMC meeting."""
-    try:
-        data = fetch_fomc_next()
-    except Exception:
-        raise HTTPException(status_code=503, detail="Service Unavailable")
-    return data
+    return await _serve(fetch_fomc_next, request, nullable=True)
 
 
 @app.get("/api/v1/powell_speech", response_model=PowellSpeech | None)
-def get_powell_speech():
+async def get_powell_speech(request: Request):
     """Return details of the next Powell speech."""
+    return await _serve(
+        fetch_powell_speech, request, nullable=True
+    )
+
+
+@app.get(
+    "/api/v1/fred/{series_id}",
+    response_model=FedRate | VIXClose | FredObservation,
+)
+async def get_fred_series(series_id: str, request: Request):
+    """Return the latest observation of any registered FRED series."""
+    fetcher = FRED_FETCHERS.get(series_id.upper())
+    if fetcher is None:
+        raise HTTPException(status_code=404, detail="Unknown FRED series")
+    return await _serve(fetcher, request)
+
+
+@app.get("/api/v1/dashboard", response_model=Dashboard)
+async def get_dashboard(request: Request):
+    """Return all indicators with a per-indicator status.
+
+    Upstream failures are reported inside the payload rather than as 503.
+    The payload changes on every request (ages), so only the negotiated
+    encoding is produced.
+    """
+    dashboard = await fetch_dashboard()
+    with timing.stage("encode"):
+        body = dashboard.model_dump_json().encode()
+        name = encoding.negotiate(
+            request.headers.get("accept"),
+            request.headers.get("accept-encoding"),
+            encoding.VARIANTS,
+        )
+        variants = {}
+        if name is not None:
+            variants[name] = encoding.encode(dashboard, body, name)
+        content, headers = representation(body, variants, request.headers)
+    return Response(content, headers=headers)
+
+
+@app.get("/api/v1/events", response_model=list[EconomicEvent])
+async def get_events(
+    kind: Literal["fomc", "powell_speech"] | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    limit: int = Query(10, ge=1, le=100),
+):
+    """Return upcoming FOMC meetings and Powell speeches.
+
+    Without ``start``/``end`` the next ``limit`` events are returned,
+    otherwise the events starting within that window.
+    """
     try:
-        data = fetch_powell_speech()
+        return await fetch_events(
+            [kind] if kind else None, start, end, limit
+        )
     except Exception:
         raise HTTPException(status_code=503, detail="Service Unavailable")
-    return data
+
+
+@app.get("/api/v1/history/{indicator}", response_model=History)
+async def get_history(
+    indicator: str,
+    start: datetime | None = Query(None, alias="from"),
+    end: datetime | None = Query(None, alias="to"),
+    points: int | None = Query(None, ge=1, le=10000),
+):
+    """Return stored observations of a series, optionally downsampled.
+
+    ``indicator`` is a series name (``FEDFUNDS``, ``CPI``, ``PCE``, ``UUP``
+    ...) or the ``fed_rate``/``vix`` alias. Served from the local history
+    store only.
+    """
+    result = read_history(indicator, start, end, points)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Unknown indicator")
+    return result
+
+
+@app.get("/api/v1/upstreams", response_model=list[UpstreamStatus])
+async def get_upstreams():
+    """Return the breaker state and remaining quota of each upstream.
+
+    Lists the upstreams called so far and every rate-limited one. Breakers
+    and quotas are kept per worker, so this reflects the worker answering.
+    """
+    quotas = quota.snapshot()
+    for host in quotas:
+        breaker.get_breaker(host)
+    return [
+        {**status, "quota": quotas.get(status["name"])}
+        for status in breaker.snapshot()
+    ]
+
+
+@app.get("/ready", include_in_schema=False)
+async def get_ready():
+    """Readiness probe for the load balancer.
+
+    Answers 503 until every critical indicator is in cache, with the
+    missing ones and the startup warm-up report.
+    """
+    ready = readiness.check()
+    report = readiness.report
+    return JSONResponse(
+        {
+            "ready": ready,
+            "missing": [] if ready else readiness.missing(),
+            "warmup": None if report is None else asdict(report),
+        },
+        status_code=200 if ready else 503,
+    )
+
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Expose Prometheus metrics."""
+    payload, content_type = metrics.render()
+    return Response(payload, media_type=content_type)
+
+
+@app.get("/api/v1/stream")
+async def get_stream(request: Request, indicators: str | None = None):
+    """Push indicator values as Server-Sent Events.
+
+    ``indicators`` is a comma-separated subset of the dashboard keys
+    (all of them by default). The current values are sent on connect, then
+    an event is emitted only when a refreshed value actually changes.
+    """
+    names = set(indicators.split(",")) if indicators else set(FETCHERS)
+    unknown = names - set(FETCHERS)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown indicator: {', '.join(sorted(unknown))}",
+        )
+    sub = watcher.subscribe(names)
+
+    async def events():
+        try:
+            async for frame in sse_events(
+                sub, settings.stream_keepalive, request.is_disconnected
+            ):
+                yield frame
+        finally:
+            watcher.unsubscribe(sub)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
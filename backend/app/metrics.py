@@ -0,0 +1,144 @@
+"""Prometheus metrics of the cache, the upstream calls and the HTTP routes.
+
+Under Gunicorn, set ``PROMETHEUS_MULTIPROC_DIR`` so that ``/metrics``
+aggregates every worker instead of reporting the one that answered.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+CACHE_REQUESTS = Counter(
+    "goldapp_cache_requests_total",
+    "Cache lookups of cached fetchers, by result (hit, miss, stale).",
+    ["cache", "result"],
+)
+FETCH_ERRORS = Counter(
+    "goldapp_fetch_errors_total",
+    "Fetches that raised, by exception type.",
+    ["cache", "exception"],
+)
+FETCH_EXECUTIONS = Counter(
+    "goldapp_fetch_executions_total",
+    "Fetches started on a cache miss or refresh.",
+    ["cache"],
+)
+FETCH_COALESCED = Counter(
+    "goldapp_fetch_coalesced_total",
+    "Callers that awaited a fetch already running instead of starting one.",
+    ["cache"],
+)
+FETCHES_IN_PROGRESS = Gauge(
+    "goldapp_fetches_in_progress",
+    "Fetches currently running.",
+    ["cache"],
+    multiprocess_mode="livesum",
+)
+UPSTREAM_LATENCY = Histogram(
+    "goldapp_upstream_request_seconds",
+    "Latency of upstream calls until the response headers.",
+    ["upstream"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+UPSTREAM_ERRORS = Counter(
+    "goldapp_upstream_errors_total",
+    "Failed upstream calls, by exception type or HTTP status.",
+    ["upstream", "exception"],
+)
+CIRCUIT_STATE = Gauge(
+    "goldapp_upstream_circuit_state",
+    "Circuit breaker state per upstream: 0 closed, 1 half-open, 2 open.",
+    ["upstream"],
+    multiprocess_mode="livemax",
+)
+QUOTA_REMAINING = Gauge(
+    "goldapp_upstream_quota_remaining",
+    "Calls an upstream can take at once without exceeding its limit.",
+    ["upstream"],
+    multiprocess_mode="livesum",
+)
+STARTUP_SECONDS = Gauge(
+    "goldapp_startup_seconds",
+    "Seconds from the import of the app until the lifespan starts (import)"
+    " and until it is ready to serve (ready).",
+    ["phase"],
+    multiprocess_mode="livemax",
+)
+REQUEST_LATENCY = Histogram(
+    "goldapp_http_request_seconds",
+    "Latency of API requests, by route template.",
+    ["method", "route", "status"],
+)
+
+
+@contextmanager
+def observe_upstream(upstream: str):
+    """Time an upstream call and count it as an error if it raises."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as exc:
+        UPSTREAM_ERRORS.labels(upstream, type(exc).__name__).inc()
+        raise
+    finally:
+        UPSTREAM_LATENCY.labels(upstream).observe(
+            time.perf_counter() - start
+        )
+
+
+def count_status(upstream: str, status_code: int) -> None:
+    """Count an upstream response with an error status."""
+    if status_code >= 400:
+        UPSTREAM_ERRORS.labels(upstream, f"HTTP {status_code}").inc()
+
+
+def render() -> tuple[bytes, str]:
+    """Return the exposition payload and its content type."""
+    registry = REGISTRY
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording the latency of every HTTP request.
+
+    Requests are labelled with the matched route template (e.g.
+    ``/api/v1/fred/{series_id}``) to keep the label set bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = getattr(scope.get("route"), "path", "unmatched")
+            REQUEST_LATENCY.labels(
+                scope["method"], route, str(status)
+            ).observe(time.perf_counter() - start)
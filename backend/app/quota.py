@@ -0,0 +1,180 @@
+"""Query budgets of the rate-limited upstreams (BLS, BEA and FRED).
+
+Each upstream host gets a token bucket sized from its documented limit,
+which depends on whether its API key is set. The bucket holds a tenth of
+the limit as burst and refills the rest evenly over the limit's period, so
+no window of that period ever exceeds the limit. A call without a token
+waits for one if it arrives within its deadline, and otherwise fails with
+:class:`QuotaExceeded` before anything is sent.
+
+``settings.quota_reserve`` of every bucket is kept for urgent calls, made
+right after a scheduled release while the new print is being polled for,
+so routine refreshes never starve them.
+
+Buckets live in each worker process; with several workers calling the same
+upstreams, set ``settings.quota_workers`` to split the limits between them.
+"""
+
+import asyncio
+import math
+import time
+from dataclasses import dataclass
+
+import httpx
+
+from . import metrics
+from .config import settings
+
+BLS_HOST = "api.bls.gov"
+BEA_HOST = "apps.bea.gov"
+FRED_HOST = "api.stlouisfed.org"
+
+DAY = 86400.0
+MINUTE = 60.0
+
+# Share of each limit that can be spent at once.
+BURST = 0.1
+
+
+@dataclass(frozen=True)
+class Limit:
+    """At most ``calls`` calls per ``period`` seconds."""
+
+    calls: int
+    period: float
+
+
+# Documented limits, keyed by whether a registration key is set. FRED and
+# BEA cannot be queried without a key.
+LIMITS = {
+    BLS_HOST: {True: Limit(500, DAY), False: Limit(25, DAY)},
+    BEA_HOST: {True: Limit(100, MINUTE)},
+    FRED_HOST: {True: Limit(120, MINUTE)},
+}
+KEY_SETTINGS = {
+    BLS_HOST: "bls_api_key",
+    BEA_HOST: "bea_api_key",
+    FRED_HOST: "fred_api_key",
+}
+
+
+class QuotaExceeded(httpx.TransportError):
+    """No query budget is left for the call; it was not attempted."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Token bucket enforcing a :class:`Limit`."""
+
+    def __init__(self, limit: Limit, keyed: bool):
+        self.limit = limit
+        self.keyed = keyed
+        self.capacity = max(1, math.ceil(limit.calls * BURST))
+        self.rate = max(limit.calls - self.capacity, 1) / limit.period
+        self.tokens = float(self.capacity)
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def wait_time(self, urgent: bool = False) -> float:
+        """Seconds until a call of this priority may take a token."""
+        self._refill(time.monotonic())
+        needed = 1.0
+        if not urgent:
+            needed += self.capacity * settings.quota_reserve
+        return max(0.0, (needed - self.tokens) / self.rate)
+
+    def take(self) -> None:
+        self.tokens -= 1
+
+    def remaining(self) -> int:
+        self._refill(time.monotonic())
+        return max(0, math.floor(self.tokens))
+
+
+_buckets: dict[str, TokenBucket] = {}
+
+
+def _limit(host: str) -> tuple[Limit, bool] | None:
+    limits = LIMITS.get(host)
+    if limits is None:
+        return None
+    keyed = bool(getattr(settings, KEY_SETTINGS[host]))
+    limit = limits.get(keyed)
+    if limit is None:
+        return None
+    workers = max(1, settings.quota_workers)
+    return Limit(max(1, limit.calls // workers), limit.period), keyed
+
+
+def get_bucket(host: str) -> TokenBucket | None:
+    """Return the bucket of ``host``, or ``None`` if it is not limited.
+
+    The bucket is rebuilt when its limit changes, e.g. once a key is set.
+    """
+    if not settings.quota_enabled:
+        return None
+    found = _limit(host)
+    if found is None:
+        return None
+    limit, keyed = found
+    bucket = _buckets.get(host)
+    if bucket is None or bucket.limit != limit:
+        bucket = _buckets[host] = TokenBucket(limit, keyed)
+    return bucket
+
+
+async def acquire(host: str, urgent: bool = False, timeout: float = 0.0):
+    """Take a token for a call to ``host``, waiting up to ``timeout``.
+
+    The token is taken before waiting for it, so later callers queue behind
+    this one. Raises :class:`QuotaExceeded` when no token is available in
+    time.
+    """
+    bucket = get_bucket(host)
+    if bucket is None:
+        return
+    delay = bucket.wait_time(urgent)
+    if delay > timeout:
+        metrics.UPSTREAM_ERRORS.labels(host, "QuotaExceeded").inc()
+        raise QuotaExceeded(f"{host} quota exhausted", delay)
+    bucket.take()
+    metrics.QUOTA_REMAINING.labels(host).set(bucket.remaining())
+    if delay > 0:
+        await asyncio.sleep(delay)
+
+
+def snapshot() -> dict[str, dict]:
+    """Return the limit and remaining calls of every limited host."""
+    buckets = {host: get_bucket(host) for host in LIMITS}
+    return {
+        host: {
+            "calls": bucket.limit.calls,
+            "period": bucket.limit.period,
+            "keyed": bucket.keyed,
+            "remaining": bucket.remaining(),
+        }
+        for host, bucket in buckets.items()
+        if bucket is not None
+    }
+
+
+def reset() -> None:
+    """Forget every bucket."""
+    _buckets.clear()
+
+
+def retry_after(exc: BaseException | None) -> float | None:
+    """Return the wait of a :class:`QuotaExceeded` in ``exc``'s causes."""
+    while exc is not None:
+        if isinstance(exc, QuotaExceeded):
+            return exc.retry_after
+        exc = exc.__cause__ or exc.__context__
+    return None
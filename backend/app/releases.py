@@ -0,0 +1,120 @@
+"""Release calendar of the scheduled macro statistics.
+
+Cache entries of CPI, NFP and PCE expire at the next scheduled release
+instead of after a flat TTL, and are polled every few minutes right after a
+release until the new print is published.
+
+The schedule below is bundled with the application and must be extended
+from the BLS and BEA release calendars each year. Once it runs out, entries
+fall back to the TTL of their cache.
+"""
+
+import time
+from bisect import bisect_right
+from datetime import date, datetime, time as dt_time
+from zoneinfo import ZoneInfo
+
+from .config import settings
+
+RELEASE_TIME = dt_time(8, 30, tzinfo=ZoneInfo("America/New_York"))
+
+RELEASE_DATES = {
+    # BLS Employment Situation
+    "NFP": (
+        "2026-01-09", "2026-02-06", "2026-03-06", "2026-04-03",
+        "2026-05-01", "2026-06-05", "2026-07-02", "2026-08-07",
+        "2026-09-04", "2026-10-02", "2026-11-06", "2026-12-04",
+        "2027-01-08", "2027-02-05", "2027-03-05", "2027-04-02",
+        "2027-05-07", "2027-06-04", "2027-07-02", "2027-08-06",
+        "2027-09-03", "2027-10-01", "2027-11-05", "2027-12-03",
+    ),
+    # BLS Consumer Price Index
+    "CPI": (
+        "2026-01-14", "2026-02-11", "2026-03-11", "2026-04-15",
+        "2026-05-13", "2026-06-10", "2026-07-15", "2026-08-12",
+        "2026-09-16", "2026-10-14", "2026-11-12", "2026-12-16",
+        "2027-01-13", "2027-02-10", "2027-03-10", "2027-04-14",
+        "2027-05-12", "2027-06-16", "2027-07-14", "2027-08-11",
+        "2027-09-15", "2027-10-13", "2027-11-10", "2027-12-15",
+    ),
+    # BEA Personal Income and Outlays
+    "PCE": (
+        "2026-01-30", "2026-02-27", "2026-03-27", "2026-04-24",
+        "2026-05-29", "2026-06-26", "2026-07-31", "2026-08-28",
+        "2026-09-25", "2026-10-30", "2026-11-25", "2026-12-23",
+        "2027-01-29", "2027-02-26", "2027-03-26", "2027-04-30",
+        "2027-05-28", "2027-06-25", "2027-07-30", "2027-08-27",
+        "2027-09-24", "2027-10-29", "2027-11-24", "2027-12-22",
+    ),
+}
+
+
+def _timestamps(dates) -> list[float]:
+    return sorted(
+        datetime.combine(
+            date.fromisoformat(day), RELEASE_TIME
+        ).timestamp()
+        for day in dates
+    )
+
+
+RELEASES = {name: _timestamps(dates) for name, dates in RELEASE_DATES.items()}
+
+
+def expected_period(release: float) -> str:
+    """Return the ``YYYY-MM`` reference month published at ``release``.
+
+    Each of these statistics covers the month preceding its release.
+    """
+    day = datetime.fromtimestamp(release, RELEASE_TIME.tzinfo).date()
+    year, month = (day.year, day.month - 1) if day.month > 1 else (
+        day.year - 1,
+        12,
+    )
+    return f"{year}-{month:02d}"
+
+
+def release_expiry(
+    periods: dict[str, str], now: float | None = None
+) -> float | None:
+    """Return when an entry holding ``periods`` should expire.
+
+    ``periods`` maps a release name to the ``YYYY-MM`` reference month of
+    the cached observation. The entry lives until the earliest next release,
+    except right after a release whose print has not landed yet, where it
+    expires after ``settings.release_poll_interval`` seconds. ``None`` means
+    no scheduled release applies and the cache TTL should be used.
+    """
+    now = time.time() if now is None else now
+    expiries = []
+    for name, period in periods.items():
+        releases = RELEASES.get(name)
+        if not releases:
+            continue
+        i = bisect_right(releases, now)
+        if i > 0 and period < expected_period(releases[i - 1]):
+            # Still waiting for the last release: poll, or fall back to the
+            # TTL once the poll window is over.
+            if now - releases[i - 1] < settings.release_poll_window:
+                expiries.append(now + settings.release_poll_interval)
+                continue
+            return None
+        if i == len(releases):
+            return None
+        expiries.append(releases[i])
+    return min(expiries, default=None)
+
+
+def near_release(names, now: float | None = None) -> bool:
+    """Return whether one of ``names`` was released within the poll window.
+
+    Calls made then poll for a new print and get priority over routine
+    refreshes in the upstream quotas.
+    """
+    now = time.time() if now is None else now
+    for name in names:
+        releases = RELEASES.get(name, ())
+        i = bisect_right(releases, now)
+        if i and now - releases[i - 1] < settings.release_poll_window:
+            return True
+    return False
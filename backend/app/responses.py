@@ -0,0 +1,118 @@
+"""HTTP caching headers and representations of indicator responses."""
+
+import functools
+import hashlib
+import math
+import time
+from email.utils import formatdate
+
+from . import encoding
+from .cache import CacheEntry
+from .encoding import json_body
+
+
+def etag(value) -> str:
+    """Return a strong ETag for a cached model (or ``None``)."""
+    return body_etag(json_body(value))
+
+
+@functools.lru_cache(maxsize=256)
+def body_etag(body: bytes) -> str:
+    """Return the strong ETag of a JSON body.
+
+    Memoized: a cached body is the same ``bytes`` object on every request,
+    so the lookup does not rehash it.
+    """
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def entry_body(entry: CacheEntry) -> bytes:
+    """Return the JSON body of a cache entry.
+
+    Entries pickled before bodies were stored are encoded on the fly.
+    """
+    body = getattr(entry, "body", None)
+    return json_body(entry.value) if body is None else body
+
+
+def entry_variants(entry: CacheEntry) -> dict[str, bytes]:
+    """Return the encoded variants of a cache entry.
+
+    Entries pickled before variants were stored are encoded on the fly.
+    """
+    variants = getattr(entry, "variants", None)
+    if variants is None:
+        variants = encoding.variants(entry.value, entry_body(entry))
+    return variants
+
+
+def representation(
+    body: bytes,
+    variants: dict[str, bytes],
+    request_headers,
+    tag: str | None = None,
+) -> tuple[bytes, dict[str, str]]:
+    """Pick the encoding of a response from the request headers.
+
+    ``body`` is the JSON and ``variants`` its other encodings. Returns the
+    content and its headers; each variant gets its own ETag derived from
+    ``tag``.
+    """
+    name = encoding.negotiate(
+        request_headers.get("accept"),
+        request_headers.get("accept-encoding"),
+        variants,
+    )
+    headers = {
+        "Content-Type": encoding.JSON,
+        "Vary": "Accept, Accept-Encoding",
+    }
+    if tag:
+        headers["ETag"] = tag
+    if name is None:
+        return body, headers
+    content_type, content_encoding = encoding.VARIANTS[name]
+    headers["Content-Type"] = content_type
+    if content_encoding is not None:
+        headers["Content-Encoding"] = content_encoding
+    if tag:
+        headers["ETag"] = f'{tag[:-1]}-{name}"'
+    return variants[name], headers
+
+
+def etag_matches(if_none_match: str | None, tag: str) -> bool:
+    """Evaluate an ``If-None-Match`` header against ``tag``.
+
+    Uses the weak comparison required for ``If-None-Match``, so ``W/``
+    prefixes sent back by proxies still match.
+    """
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == tag:
+            return True
+    return False
+
+
+def cache_headers(entry: CacheEntry, ttl: float) -> dict[str, str]:
+    """Build validator and freshness headers for a cache entry.
+
+    ``max-age`` is the time left before the entry expires from the
+    server-side cache, so Nginx and clients never keep it longer than we do.
+    A stale last-known-good entry is flagged with ``X-Data-Stale`` and its
+    age in seconds with ``X-Data-Age``.
+    """
+    expires_at = entry.expires_at
+    if expires_at is None:
+        expires_at = entry.stored_at + ttl
+    max_age = max(0, math.floor(expires_at - time.time()))
+    headers = {
+        "ETag": body_etag(entry_body(entry)),
+        "Last-Modified": formatdate(entry.stored_at, usegmt=True),
+        "Cache-Control": f"public, max-age={max_age}",
+    }
+    if entry.stale:
+        headers["X-Data-Stale"] = "true"
+        headers["X-Data-Age"] = str(math.floor(entry.age))
+    return headers
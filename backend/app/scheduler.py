@@ -0,0 +1,201 @@
+"""Background refresh of cached indicators ahead of their TTL."""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from .quota import retry_after
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RefreshJob:
+    """A cached fetcher refreshed every ``interval`` seconds.
+
+    Entries carrying their own expiry are refreshed ``margin`` of their
+    lifetime before it instead.
+    """
+
+    name: str
+    func: Callable
+    interval: float
+    margin: float = 0.0
+    next_run: float = 0.0
+    running: bool = False
+
+
+async def refresh(func: Callable):
+    """Recompute a function decorated with ``app.cache.cached``.
+
+    The previous entry is left in place until the new value is written, so
+    callers keep getting a cache hit while the upstream is being queried.
+    """
+    return await func.cache_refresh()
+
+
+def build_jobs(fetchers: dict[str, Callable], margin: float) -> list:
+    """Create one job per fetcher, firing ``margin`` of the TTL early."""
+    return [
+        RefreshJob(
+            name, func, interval=func.cache.ttl * (1 - margin), margin=margin
+        )
+        for name, func in fetchers.items()
+    ]
+
+
+def _peek(job: RefreshJob):
+    peek = getattr(job.func, "cache_peek", None)
+    return None if peek is None else peek()
+
+
+def _entry_expiry(job: RefreshJob) -> float | None:
+    """Return the expiry carried by the job's cache entry, if any."""
+    return getattr(_peek(job), "expires_at", None)
+
+
+def _refresh_at(job: RefreshJob, entry) -> float:
+    """Return when ``entry``, which carries its own expiry, is due.
+
+    It is ``job.margin`` of its lifetime early: the cache evicts it at
+    expiry, and requests arriving before the refresh would block on it.
+    """
+    lifetime = max(0.0, entry.expires_at - entry.stored_at)
+    return entry.expires_at - job.margin * lifetime
+
+
+def _due_in(job: RefreshJob) -> float:
+    """Return the seconds until the job's current entry needs a refresh."""
+    entry = _peek(job)
+    if entry is None or getattr(entry, "stale", False):
+        return 0.0
+    if getattr(entry, "expires_at", None) is None:
+        due = entry.stored_at + job.interval
+    else:
+        due = _refresh_at(job, entry)
+    return max(0.0, due - time.time())
+
+
+def _claim(job: RefreshJob) -> bool:
+    """Take the refresh lease of the job's cache, if it has one.
+
+    A backend error grants the lease: without it, each worker refreshes.
+    """
+    claim = getattr(job.func.cache, "claim", None)
+    if claim is None:
+        return True
+    try:
+        return claim(job.interval)
+    except Exception as exc:
+        logger.warning("Refresh lease of %s unavailable: %s", job.name, exc)
+        return True
+
+
+def _release(job: RefreshJob) -> None:
+    release = getattr(job.func.cache, "release", None)
+    if release is None:
+        return
+    try:
+        release()
+    except Exception as exc:
+        logger.warning("Refresh lease of %s not released: %s", job.name, exc)
+
+
+class RefreshScheduler:
+    """Run refresh jobs on the event loop before their cache entry lapses.
+
+    Every job runs as soon as the scheduler starts, unless its entry is
+    already fresh (restored or prefetched at startup) in which case it first
+    runs when that entry is due. It then runs again after its interval, or
+    shortly before its entry expires if the entry sets its own expiry (e.g.
+    the next release poll). An entry due at a fixed time (e.g. the next
+    scheduled release) is unchanged by an early refresh, which is then
+    repeated at that time. A failed refresh is retried after
+    ``retry_delay`` seconds (or the job interval, whichever is shorter), or
+    once the upstream quota allows it again if that is later.
+    """
+
+    def __init__(
+        self,
+        jobs: list,
+        retry_delay: float = 60.0,
+        tick: float = 1.0,
+    ):
+        self.jobs = jobs
+        self.retry_delay = retry_delay
+        self.tick = tick
+        self._tasks: set[asyncio.Task] = set()
+        self._loop_task: asyncio.Task | None = None
+
+    def run_pending(self, now: float | None = None) -> list[asyncio.Task]:
+        """Start every due job that is not already running."""
+        now = time.monotonic() if now is None else now
+        tasks = []
+        for job in self.jobs:
+            if job.running or job.next_run > now:
+                continue
+            job.running = True
+            task = asyncio.ensure_future(self._run(job))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            tasks.append(task)
+        return tasks
+
+    async def _run(self, job: RefreshJob) -> None:
+        delay = min(job.interval, self.retry_delay)
+        try:
+            delay = await self._refresh(job)
+        except Exception:
+            logger.exception("Refresh job %s failed", job.name)
+        finally:
+            job.next_run = time.monotonic() + delay
+            job.running = False
+
+    async def _refresh(self, job: RefreshJob) -> float:
+        """Refresh the job's entry; return the delay until its next run."""
+        # Shared cache backends hand out a lease so that only one worker
+        # refreshes a given indicator per interval.
+        if not _claim(job):
+            expires_at = _entry_expiry(job)
+            if expires_at is None:
+                return job.interval
+            return max(expires_at - time.time(), self.retry_delay)
+        previous = _entry_expiry(job)
+        try:
+            await refresh(job.func)
+        except Exception as exc:
+            logger.warning("Refresh of %s failed: %s", job.name, exc)
+            _release(job)
+            delay = min(job.interval, self.retry_delay)
+            return max(delay, retry_after(exc) or 0.0)
+        entry = _peek(job)
+        expires_at = getattr(entry, "expires_at", None)
+        if expires_at is None:
+            return job.interval
+        # Let whichever worker comes first refresh when the entry is due.
+        _release(job)
+        if expires_at != previous:
+            expires_at = _refresh_at(job, entry)
+        return max(expires_at - time.time(), self.tick)
+
+    async def _loop(self) -> None:
+        while True:
+            self.run_pending()
+            await asyncio.sleep(self.tick)
+
+    def start(self) -> None:
+        """Start the scheduler on the running event loop."""
+        for job in self.jobs:
+            job.next_run = time.monotonic() + _due_in(job)
+        self._loop_task = asyncio.ensure_future(self._loop())
+
+    async def stop(self) -> None:
+        tasks = list(self._tasks)
+        if self._loop_task is not None:
+            tasks.append(self._loop_task)
+            self._loop_task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -1,5 +1,8 @@
 from pydantic import BaseModel
 from datetime import datetime
+from typing import Generic, Literal, TypeVar
+
+T = TypeVar("T")
 
 
 class Indicator(BaseModel):
@@ -46,6 +49,16 @@ class VIXClose(BaseModel):
     source: str = "FRED"
 
 
+class FredObservation(BaseModel):
+    """Latest observation of a registered FRED series."""
+
+    series_id: str
+    value: float
+    unit: str
+    date: str
+    source: str = "FRED"
+
+
 class FomcNext(BaseModel):
     """Represent the next scheduled FOMC meeting."""
 
@@ -62,3 +75,67 @@ class PowellSpeech(BaseModel):
     time: str  # HH:MM (UTC)
     title: str
     url: str
+
+
+class EconomicEvent(BaseModel):
+    """A scheduled FOMC meeting or Powell speech."""
+
+    kind: Literal["fomc", "powell_speech"]
+    starts_at: datetime
+    title: str
+    url: str
+
+
+class HistoryPoint(BaseModel):
+    timestamp: datetime
+    value: float
+
+
+class History(BaseModel):
+    """Stored observations of one series, oldest first."""
+
+    indicator: str
+    points: list[HistoryPoint]
+
+
+class DashboardItem(BaseModel, Generic[T]):
+    """Status of one indicator within the dashboard payload."""
+
+    status: Literal["ok", "error"]
+    data: T | None = None
+    updated_at: datetime | None = None
+    age_seconds: float | None = None
+    stale: bool = False
+    error: str | None = None
+
+
+class Dashboard(BaseModel):
+    """Every indicator in a single response, each with its own status."""
+
+    generated_at: datetime
+    market_indices: DashboardItem[MarketIndices]
+    latest_macro: DashboardItem[LatestMacro]
+    pce: DashboardItem[PCEStat]
+    fed_rate: DashboardItem[FedRate]
+    vix: DashboardItem[VIXClose]
+    fomc_next: DashboardItem[FomcNext]
+    powell_speech: DashboardItem[PowellSpeech]
+
+
+class QuotaStatus(BaseModel):
+    """Query budget of an upstream: ``calls`` per ``period`` seconds."""
+
+    calls: int
+    period: float
+    keyed: bool
+    remaining: int
+
+
+class UpstreamStatus(BaseModel):
+    """Circuit breaker and quota of an upstream in the answering worker."""
+
+    name: str
+    state: Literal["closed", "half_open", "open"]
+    failures: int
+    retry_in: float
+    quota: QuotaStatus | None = None
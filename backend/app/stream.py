@@ -0,0 +1,141 @@
+"""Server-Sent Events push of indicator changes."""
+
+import asyncio
+import json
+from typing import AsyncIterator, Awaitable, Callable
+
+from pydantic import BaseModel
+
+from .responses import body_etag, entry_body
+
+# Fields stamped with the time of the refresh rather than of the
+# observation (market indices): a new stamp alone is not a change.
+REFRESH_FIELDS = frozenset({"last_updated_utc"})
+
+
+def _without_refresh_fields(data):
+    if isinstance(data, dict):
+        return {
+            key: _without_refresh_fields(value)
+            for key, value in data.items()
+            if key not in REFRESH_FIELDS
+        }
+    return data
+
+
+def change_tag(entry, body: bytes) -> str:
+    """Return a tag of the indicator values of ``entry``.
+
+    Two entries get the same tag when only their refresh time differs.
+    """
+    if isinstance(entry.value, BaseModel):
+        data = _without_refresh_fields(entry.value.model_dump(mode="json"))
+        return json.dumps(data, sort_keys=True)
+    return body_etag(body)
+
+
+class Subscription:
+    """A client's set of indicators and the changes not yet sent to it.
+
+    Only the latest payload per indicator is kept, so a slow client never
+    accumulates a backlog.
+    """
+
+    def __init__(self, names: set[str]):
+        self.names = names
+        self.sent: dict[str, str] = {}
+        self.pending: dict[str, bytes] = {}
+        self._ready = asyncio.Event()
+
+    def push(self, name: str, tag: str, data: bytes) -> None:
+        self.sent[name] = tag
+        self.pending[name] = data
+        self._ready.set()
+
+    async def next(self, timeout: float) -> dict[str, bytes]:
+        """Wait up to ``timeout`` seconds and return pending changes."""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return {}
+        self._ready.clear()
+        pending, self.pending = self.pending, {}
+        return pending
+
+
+class IndicatorWatcher:
+    """Watch cached indicators and notify subscribers when a value changes.
+
+    The watcher only reads the cache (it never triggers an upstream call),
+    so it sees refreshes made by the scheduler of any worker sharing the
+    cache backend.
+    """
+
+    def __init__(self, fetchers: dict[str, Callable], interval: float):
+        self.fetchers = fetchers
+        self.interval = interval
+        self._subscriptions: set[Subscription] = set()
+        self._task: asyncio.Task | None = None
+
+    def subscribe(self, names: set[str]) -> Subscription:
+        sub = Subscription(names)
+        self._subscriptions.add(sub)
+        self.check([sub])
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        self._subscriptions.discard(sub)
+
+    def check(self, subscriptions=None) -> None:
+        """Push values that differ from what each subscriber last got.
+
+        An entry refreshed with the same values is not pushed again, even
+        if its payload carries a new refresh time.
+        """
+        if subscriptions is None:
+            subscriptions = list(self._subscriptions)
+        current = {}
+        for sub in subscriptions:
+            for name in sub.names:
+                if name not in current:
+                    entry = self.fetchers[name].cache_peek()
+                    if entry is None:
+                        current[name] = None
+                    else:
+                        body = entry_body(entry)
+                        current[name] = (change_tag(entry, body), body)
+                snapshot = current[name]
+                if snapshot is not None and sub.sent.get(name) != snapshot[0]:
+                    sub.push(name, *snapshot)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            self.check()
+
+    def start(self) -> None:
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+async def sse_events(
+    sub: Subscription,
+    keepalive: float,
+    is_disconnected: Callable[[], Awaitable[bool]],
+) -> AsyncIterator[bytes]:
+    """Yield SSE frames for a subscription until the client disconnects.
+
+    A comment line is sent every ``keepalive`` seconds without changes so
+    that proxies do not close the idle connection.
+    """
+    while not await is_disconnected():
+        pending = await sub.next(keepalive)
+        if not pending:
+            yield b": keepalive\n\n"
+        for name, data in pending.items():
+            yield b"event: " + name.encode() + b"\ndata: " + data + b"\n\n"
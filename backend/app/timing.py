@@ -0,0 +1,245 @@
+"""Per-stage timing of API requests.
+
+:class:`TimingMiddleware` gives each request a :class:`Timings` that the
+code serving it fills with :func:`stage` (cache lookup, upstream call, JSON
+decoding, response encoding...). The stages are sent back in the
+``Server-Timing`` header and logged as fields of one ``app.timing`` record
+per request. Outside a request, e.g. in a scheduled refresh, :func:`stage`
+records nothing.
+
+A request still running after ``settings.slow_request_seconds`` is
+profiled: the coroutines it is awaiting are sampled every
+``settings.profile_interval`` seconds until its response starts, and the
+samples are written to ``settings.profile_path`` as collapsed stacks, the
+input format of flame graph tools (``flamegraph.pl``, speedscope). Only the
+``settings.profile_max_files`` latest traces are kept.
+"""
+
+import asyncio
+import logging
+import os
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Timings:
+    """Seconds spent in each stage of a request, in first-seen order.
+
+    A stage entered several times, or by concurrent tasks (the dashboard),
+    adds up its durations, so the stages may add up to more than the
+    request itself.
+    """
+
+    def __init__(self):
+        self.stages: dict[str, float] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def header(self, total: float | None = None) -> str:
+        """Return the ``Server-Timing`` value, durations in milliseconds."""
+        stages = dict(self.stages)
+        if total is not None:
+            stages["app"] = total
+        return ", ".join(
+            f"{name};dur={seconds * 1000:.2f}"
+            for name, seconds in stages.items()
+        )
+
+
+_current: ContextVar[Timings | None] = ContextVar("timings", default=None)
+
+
+@contextmanager
+def stage(name: str):
+    """Time the enclosed block as stage ``name`` of the current request.
+
+    Tasks started by the request (e.g. a coalesced fetch) inherit its
+    timings, so their stages are recorded too.
+    """
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - start)
+
+
+def _frames(coro):
+    """Yield the frames of ``coro`` and of the coroutines it awaits."""
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(
+            coro, "ag_frame", None
+        ) or getattr(coro, "gi_frame", None)
+        if frame is None:
+            return
+        yield frame
+        coro = getattr(coro, "cr_await", None) or getattr(
+            coro, "ag_await", None
+        ) or getattr(coro, "gi_yieldfrom", None)
+
+
+def await_stack(task: asyncio.Task) -> str:
+    """Return where ``task`` is suspended as a collapsed stack.
+
+    Frames are ``module:function``, outermost first, separated by ``;``.
+    Functions are qualified by their class where Python (3.11+) allows.
+    """
+    return ";".join(
+        f"{frame.f_globals.get('__name__', '?')}:{_function_name(frame)}"
+        for frame in _frames(task.get_coro())
+    )
+
+
+def _function_name(frame) -> str:
+    code = frame.f_code
+    return getattr(code, "co_qualname", code.co_name)
+
+
+class Profiler:
+    """Samples the await stack of a request task once it runs too long."""
+
+    def __init__(self, task: asyncio.Task, threshold: float):
+        self.task = task
+        self.samples: Counter[str] = Counter()
+        self._loop = asyncio.get_running_loop()
+        self._handle = self._loop.call_later(threshold, self._sample)
+
+    def _sample(self) -> None:
+        if self.task.done():
+            return
+        self.samples[await_stack(self.task)] += 1
+        self._handle = self._loop.call_later(
+            settings.profile_interval, self._sample
+        )
+
+    def stop(self) -> None:
+        self._handle.cancel()
+
+    def save(self, route: str) -> str | None:
+        """Write the samples to ``settings.profile_path``; return the file.
+
+        The oldest traces beyond ``settings.profile_max_files`` are deleted.
+        Returns ``None`` when no sample was taken or the write failed.
+        """
+        if not self.samples or settings.profile_max_files <= 0:
+            return None
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_") or "root"
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S.%f")
+        path = os.path.join(settings.profile_path, f"{stamp}-{slug}.folded")
+        try:
+            os.makedirs(settings.profile_path, exist_ok=True)
+            with open(path, "w") as f:
+                for stack, count in self.samples.most_common():
+                    f.write(f"{stack} {count}\n")
+        except OSError as exc:
+            logger.warning("Could not write profile %s: %s", path, exc)
+            return None
+        _prune(settings.profile_path, settings.profile_max_files)
+        return path
+
+
+def _prune(directory: str, keep: int) -> None:
+    """Delete all but the ``keep`` latest traces of ``directory``."""
+    # Names start with the UTC time, so they sort chronologically.
+    traces = sorted(
+        name for name in os.listdir(directory) if name.endswith(".folded")
+    )
+    for name in traces[:-keep]:
+        try:
+            os.remove(os.path.join(directory, name))
+        except OSError:
+            pass  # already removed by another worker
+
+
+class TimingMiddleware:
+    """ASGI middleware timing the stages of every HTTP request.
+
+    A request lasts until its response starts, so a stream is not slow for
+    staying open. The ``Server-Timing`` header lists the stages completed by
+    then, plus ``app``, the duration of the request.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timings = Timings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        status = 500
+        duration = None
+        profiler = None
+        if settings.slow_request_seconds > 0:
+            profiler = Profiler(
+                asyncio.current_task(), settings.slow_request_seconds
+            )
+
+        async def send_with_timing(message):
+            nonlocal status, duration
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                duration = time.perf_counter() - start
+                if profiler is not None:
+                    profiler.stop()
+                header = timings.header(duration)
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"server-timing", header.encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            if duration is None:
+                duration = time.perf_counter() - start
+            route = getattr(scope.get("route"), "path", "unmatched")
+            trace = None
+            if profiler is not None:
+                profiler.stop()
+                if duration >= settings.slow_request_seconds:
+                    trace = profiler.save(route)
+            _log(scope["method"], route, status, duration, timings, trace)
+
+
+def _log(method, route, status, duration, timings, trace) -> None:
+    """Log a request, with its stages as fields of the record."""
+    slow = 0 < settings.slow_request_seconds <= duration
+    stages_ms = {
+        name: round(seconds * 1000, 2)
+        for name, seconds in timings.stages.items()
+    }
+    logger.log(
+        logging.WARNING if slow else logging.INFO,
+        "%s %s %d in %.2fms %s%s",
+        method,
+        route,
+        status,
+        duration * 1000,
+        " ".join(f"{k}={v}" for k, v in stages_ms.items()),
+        f" profile={trace}" if trace else "",
+        extra={
+            "method": method,
+            "route": route,
+            "status": status,
+            "duration_ms": round(duration * 1000, 2),
+            "stages_ms": stages_ms,
+            "profile": trace,
+        },
+    )
@@ -0,0 +1,142 @@
+"""Pooled async HTTP clients for the upstream data providers.
+
+Calls go through the circuit breaker and the query budget of their host.
+GET and POST requests (all of them reads) are retried on transport errors
+and on 429/5xx responses, with jittered exponential backoff, within a
+deadline of ``settings.upstream_deadline`` seconds for the call as a whole.
+"""
+
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+
+import httpx
+
+from . import metrics, quota
+from .breaker import get_breaker
+from .config import settings
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+_clients: dict[str, httpx.AsyncClient] = {}
+
+
+def get_client(url: str) -> httpx.AsyncClient:
+    """Return the shared keep-alive client for the host serving ``url``.
+
+    One client (and therefore one connection pool) is kept per upstream host
+    so BLS, BEA, FRED and federalreserve.gov each reuse their TLS sessions.
+    """
+    host = urlsplit(url).netloc
+    client = _clients.get(host)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            timeout=settings.upstream_timeout,
+            limits=httpx.Limits(
+                max_connections=settings.upstream_pool_size,
+                max_keepalive_connections=settings.upstream_pool_size,
+            ),
+        )
+        _clients[host] = client
+    return client
+
+
+async def _call(url: str, send, urgent: bool = False) -> httpx.Response:
+    """Run ``send()`` with the breaker, quota, retries and deadline of ``url``.
+
+    Every attempt takes a token from the host's quota; ``urgent`` calls may
+    use its reserve. The last response is returned even if its status is
+    an error, so the caller's ``raise_for_status`` reports it.
+    """
+    host = urlsplit(url).netloc
+    breaker = get_breaker(host)
+    breaker.check()
+    deadline = time.monotonic() + settings.upstream_deadline
+    attempt = 0
+    while True:
+        resp = error = None
+        await quota.acquire(host, urgent, deadline - time.monotonic())
+        try:
+            with metrics.observe_upstream(host):
+                resp = await asyncio.wait_for(
+                    send(), deadline - time.monotonic()
+                )
+            metrics.count_status(host, resp.status_code)
+        except asyncio.TimeoutError:
+            error = httpx.TimeoutException(f"{host} deadline exceeded")
+        except httpx.TransportError as exc:
+            error = exc
+        if resp is not None and resp.status_code not in RETRY_STATUSES:
+            breaker.record_success()
+            return resp
+        delay = random.uniform(0, settings.upstream_backoff * 2**attempt)
+        attempt += 1
+        if (
+            attempt > settings.upstream_retries
+            or time.monotonic() + delay >= deadline
+        ):
+            breaker.record_failure()
+            if resp is not None:
+                return resp
+            raise error
+        await asyncio.sleep(delay)
+
+
+async def get(
+    url: str, params: dict | None = None, urgent: bool = False
+) -> httpx.Response:
+    """Issue a GET request through the pooled client for ``url``."""
+    return await _call(
+        url, lambda: get_client(url).get(url, params=params), urgent
+    )
+
+
+async def post(
+    url: str, json: dict | None = None, urgent: bool = False
+) -> httpx.Response:
+    """Issue a POST request with a JSON body through the pooled client."""
+    return await _call(
+        url, lambda: get_client(url).post(url, json=json), urgent
+    )
+
+
+@asynccontextmanager
+async def stream(url: str, headers: dict | None = None):
+    """Open a streamed GET request; use as ``async with``.
+
+    The body is read lazily, so a caller can stop reading (and release the
+    connection) before the whole response has been downloaded. Streams are
+    not retried, as part of the body may already have been consumed.
+    """
+    host = urlsplit(url).netloc
+    breaker = get_breaker(host)
+    breaker.check()
+    start = time.perf_counter()
+    try:
+        async with get_client(url).stream(
+            "GET", url, headers=headers
+        ) as resp:
+            metrics.UPSTREAM_LATENCY.labels(host).observe(
+                time.perf_counter() - start
+            )
+            metrics.count_status(host, resp.status_code)
+            if resp.status_code in RETRY_STATUSES:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            yield resp
+    except httpx.HTTPError as exc:
+        metrics.UPSTREAM_ERRORS.labels(host, type(exc).__name__).inc()
+        if isinstance(exc, httpx.TransportError):
+            breaker.record_failure()
+        raise
+
+
+async def aclose() -> None:
+    """Close every pooled client, e.g. on application shutdown."""
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.aclose()
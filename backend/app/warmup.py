@@ -0,0 +1,129 @@
+"""Cache warm-up of a starting worker and its readiness for traffic."""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WarmupReport:
+    """Outcome of the prefetch, by indicator name."""
+
+    warmed: list[str] = field(default_factory=list)
+    stale: list[str] = field(default_factory=list)
+    failed: dict[str, str] = field(default_factory=dict)
+    pending: list[str] = field(default_factory=list)
+    seconds: float = 0.0
+
+
+async def _load(func: Callable) -> None:
+    entry = func.cache_peek()
+    if entry is None:
+        await func.cache_entry()
+    elif entry.stale:
+        await func.cache_refresh()
+
+
+async def prefetch(
+    fetchers: dict[str, Callable], timeout: float
+) -> tuple[WarmupReport, set[asyncio.Task]]:
+    """Fill the cache of every fetcher concurrently, for up to ``timeout``.
+
+    Fresh entries (e.g. restored from the last-known-good store) are kept,
+    missing ones are fetched and stale ones refreshed. Fetches still running
+    at the timeout carry on in the background; their tasks are returned
+    with the report.
+    """
+    start = time.perf_counter()
+    tasks = {
+        name: asyncio.ensure_future(_load(func))
+        for name, func in fetchers.items()
+    }
+    pending = set()
+    if tasks:
+        _, pending = await asyncio.wait(tasks.values(), timeout=timeout)
+    report = WarmupReport()
+    for name, task in tasks.items():
+        exc = None if task in pending else task.exception()
+        if task in pending:
+            report.pending.append(name)
+        elif exc is not None:
+            report.failed[name] = f"{type(exc).__name__}: {exc}"
+        elif getattr(fetchers[name].cache_peek(), "stale", False):
+            report.stale.append(name)
+        else:
+            report.warmed.append(name)
+    report.seconds = round(time.perf_counter() - start, 3)
+    return report, pending
+
+
+class Readiness:
+    """Whether the worker may receive traffic from the load balancer.
+
+    The worker becomes ready once every indicator listed in
+    ``settings.critical_indicators`` has an entry in cache, stale or not,
+    and stays ready afterwards: an upstream outage is answered from the
+    cache and must not take every worker out of rotation.
+
+    ``api_keys`` maps indicators to the setting of the API key they cannot
+    be fetched without. A critical indicator whose key is not set is left
+    out of the check, with a warning, rather than keeping the worker out
+    of rotation forever.
+    """
+
+    def __init__(
+        self,
+        fetchers: dict[str, Callable],
+        api_keys: dict[str, str] | None = None,
+    ):
+        self.fetchers = fetchers
+        self.api_keys = api_keys or {}
+        self.ready = False
+        self.report: WarmupReport | None = None
+        self._unconfigured: set[str] = set()
+
+    def critical(self) -> list[str]:
+        """Return the critical indicators the worker waits for."""
+        unknown = set(settings.critical_indicators) - set(self.fetchers)
+        if unknown:
+            raise ValueError(
+                f"Unknown critical indicator: {', '.join(sorted(unknown))}"
+            )
+        names = []
+        for name in settings.critical_indicators:
+            key = self.api_keys.get(name)
+            if key is not None and not getattr(settings, key):
+                if name not in self._unconfigured:
+                    logger.warning(
+                        "Readiness does not wait for %s: %s is not set",
+                        name,
+                        key.upper(),
+                    )
+                    self._unconfigured.add(name)
+                continue
+            names.append(name)
+        return names
+
+    def missing(self) -> list[str]:
+        """Return the critical indicators not in cache yet."""
+        return [
+            name
+            for name in self.critical()
+            if self.fetchers[name].cache_peek() is None
+        ]
+
+    def check(self) -> bool:
+        if not self.ready and not self.missing():
+            logger.info("Worker ready")
+            self.ready = True
+        return self.ready
+
+    def reset(self) -> None:
+        self.ready = False
+        self.report = None
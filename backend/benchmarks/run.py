@@ -0,0 +1,250 @@
+"""Load test of the API against local stub upstreams.
+
+    python -m benchmarks.run --rps 200 --duration 10 --latency 0.05
+
+Requests are sent at a fixed rate (open loop) to every indicator endpoint
+in turn, in three scenarios:
+
+* ``cold``: every cache is emptied before each request;
+* ``warm``: every cache is filled before the run;
+* ``expiry``: caches are filled, then all entries expire mid-run.
+
+p50/p95/p99 latency, throughput and error count per endpoint are printed
+and saved to ``benchmarks/results/<label>.json``; ``--compare`` prints the
+change against an earlier result file.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+from dataclasses import replace
+from datetime import datetime, timezone
+
+import httpx
+
+from app import crud, upstream
+from app.config import settings
+from app.main import app
+
+from . import stubs
+
+ENDPOINTS = (
+    "/api/v1/market_indices",
+    "/api/v1/latest_macro",
+    "/api/v1/pce",
+    "/api/v1/fed_rate",
+    "/api/v1/vix",
+    "/api/v1/fomc_next",
+    "/api/v1/powell_speech",
+    "/api/v1/dashboard",
+    "/api/v1/events",
+)
+SCENARIOS = ("cold", "warm", "expiry")
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def _fetchers():
+    return [*crud.REFRESH_TARGETS.values()]
+
+
+def clear_caches() -> None:
+    for fetcher in _fetchers():
+        fetcher.cache_clear()
+    crud.BLS_SERIES_CACHE.clear()
+
+
+async def warm_caches(client: httpx.AsyncClient) -> None:
+    clear_caches()
+    await asyncio.gather(*(client.get(path) for path in ENDPOINTS))
+
+
+def expire_caches_at(when: float) -> None:
+    for fetcher in _fetchers():
+        entry = fetcher.cache_peek()
+        if entry is not None:
+            fetcher.cache[fetcher.cache_key()] = replace(
+                entry, expires_at=when
+            )
+
+
+class Patches:
+    """Attribute changes, undone in reverse order by :meth:`undo`."""
+
+    def __init__(self):
+        self._saved = []
+
+    def setattr(self, target, name: str, value) -> None:
+        self._saved.append((target, name, getattr(target, name)))
+        setattr(target, name, value)
+
+    def undo(self) -> None:
+        while self._saved:
+            target, name, value = self._saved.pop()
+            setattr(target, name, value)
+
+
+def summarize(latencies: list[float], errors: int, elapsed: float) -> dict:
+    """Percentiles in milliseconds, throughput in requests per second."""
+    if len(latencies) > 1:
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+        p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+    else:
+        p50 = p95 = p99 = latencies[0] if latencies else 0.0
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(p50 * 1000, 2),
+        "p95_ms": round(p95 * 1000, 2),
+        "p99_ms": round(p99 * 1000, 2),
+    }
+
+
+async def drive(
+    client: httpx.AsyncClient,
+    rps: float,
+    duration: float,
+    before_request=None,
+) -> dict[str, dict]:
+    """Send ``rps`` requests per second for ``duration`` seconds."""
+    latencies = {path: [] for path in ENDPOINTS}
+    errors = dict.fromkeys(ENDPOINTS, 0)
+
+    async def one(path: str) -> None:
+        start = time.perf_counter()
+        try:
+            resp = await client.get(path)
+            failed = resp.status_code >= 500
+        except httpx.HTTPError:
+            failed = True
+        latencies[path].append(time.perf_counter() - start)
+        errors[path] += failed
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    tasks = []
+    for i in range(max(1, int(rps * duration))):
+        delay = start + i / rps - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if before_request is not None:
+            before_request()
+        tasks.append(asyncio.ensure_future(one(ENDPOINTS[i % len(ENDPOINTS)])))
+    await asyncio.gather(*tasks)
+    elapsed = loop.time() - start
+    return {
+        path: summarize(latencies[path], errors[path], elapsed)
+        for path in ENDPOINTS
+    }
+
+
+async def run_scenario(
+    client: httpx.AsyncClient, name: str, rps: float, duration: float
+) -> dict[str, dict]:
+    if name == "cold":
+        clear_caches()
+        return await drive(client, rps, duration, clear_caches)
+    await warm_caches(client)
+    if name == "expiry":
+        expire_caches_at(time.time() + duration / 2)
+    return await drive(client, rps, duration)
+
+
+async def run(args: argparse.Namespace) -> dict:
+    """Run the scenarios, then restore the settings and upstream clients."""
+    patches = Patches()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            patches.setattr(settings, "lkg_enabled", False)
+            patches.setattr(settings, "quota_enabled", False)
+            patches.setattr(settings, "history_path", tmp)
+            patches.setattr(settings, "fred_api_key", "bench")
+            patches.setattr(settings, "bea_api_key", "bench")
+            stubs.install(patches.setattr, args.latency, args.error_rate)
+            async with httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app),
+                base_url="http://bench",
+            ) as client:
+                results = {}
+                for name in args.scenario:
+                    results[name] = await run_scenario(
+                        client, name, args.rps, args.duration
+                    )
+    finally:
+        clear_caches()
+        # Drop the stub clients; real ones are created again on demand.
+        await upstream.aclose()
+        patches.undo()
+    return {
+        "meta": {
+            "label": args.label,
+            "date": datetime.now(timezone.utc).isoformat(),
+            "rps": args.rps,
+            "duration": args.duration,
+            "latency": args.latency,
+            "error_rate": args.error_rate,
+        },
+        "scenarios": results,
+    }
+
+
+def report(result: dict, previous: dict | None = None) -> str:
+    lines = []
+    for name, endpoints in result["scenarios"].items():
+        lines.append(f"\n[{name}]")
+        lines.append(
+            f"{'endpoint':<26}{'rps':>8}{'p50':>9}{'p95':>9}{'p99':>9}"
+            f"{'err':>6}"
+        )
+        for path, stats in endpoints.items():
+            line = (
+                f"{path:<26}{stats['rps']:>8}{stats['p50_ms']:>9}"
+                f"{stats['p95_ms']:>9}{stats['p99_ms']:>9}"
+                f"{stats['errors']:>6}"
+            )
+            before = (previous or {}).get("scenarios", {}).get(name, {})
+            if path in before and before[path]["p99_ms"]:
+                change = stats["p99_ms"] / before[path]["p99_ms"] - 1
+                line += f"  p99 {change:+.0%}"
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> dict:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rps", type=float, default=200)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument(
+        "--latency", type=float, default=0.05, help="stub delay in seconds"
+    )
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--scenario", nargs="+", choices=SCENARIOS, default=list(SCENARIOS)
+    )
+    parser.add_argument(
+        "--label", default=datetime.now(timezone.utc).strftime("%Y%m%dT%H%M")
+    )
+    parser.add_argument("--output", default=RESULTS_DIR)
+    parser.add_argument("--compare", help="earlier result file")
+    args = parser.parse_args(argv)
+
+    result = asyncio.run(run(args))
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+    print(report(result, previous))
+    os.makedirs(args.output, exist_ok=True)
+    path = os.path.join(args.output, f"{args.label}.json")
+    with open(path, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"\nSaved to {path}")
+    return result
+
+
+if __name__ == "__main__":
+    main()
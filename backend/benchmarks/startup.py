@@ -0,0 +1,63 @@
+"""Boot time of an API worker.
+
+    python -m benchmarks.startup --runs 5
+
+Imports ``app.main`` in fresh interpreters, as a Gunicorn worker does, and
+prints the median and best import time along with the heavy modules loaded
+at import.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ("yfinance", "pandas", "numpy", "curl_cffi")
+
+_PROBE = f"""
+import json, sys, time
+start = time.perf_counter()
+import app.main
+print(json.dumps({{
+    "seconds": time.perf_counter() - start,
+    "loaded": [m for m in {HEAVY_MODULES!r} if m in sys.modules],
+}}))
+"""
+
+
+def measure(runs: int) -> dict:
+    samples = []
+    loaded = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", _PROBE],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout
+        probe = json.loads(out.splitlines()[-1])
+        samples.append(probe["seconds"])
+        loaded = probe["loaded"]
+    return {
+        "median_s": round(statistics.median(samples), 3),
+        "min_s": round(min(samples), 3),
+        "loaded": loaded,
+    }
+
+
+def main(argv: list[str] | None = None) -> dict:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args(argv)
+    result = measure(args.runs)
+    print(
+        f"import app.main: median {result['median_s']}s, "
+        f"best {result['min_s']}s; heavy modules loaded: "
+        f"{', '.join(result['loaded']) or 'none'}"
+    )
+    return result
+
+
+if __name__ == "__main__":
+    main()
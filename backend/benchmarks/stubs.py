@@ -0,0 +1,115 @@
+"""Local stand-ins for the upstream data providers.
+
+A single ASGI app answers the BLS, BEA, FRED and Fed RSS requests with
+small valid payloads, after a configurable delay and with a configurable
+share of 503 errors. yfinance is replaced by a blocking sleep, as the real
+library blocks a worker thread.
+"""
+
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from fastapi import FastAPI, Request, Response
+
+from app import crud, upstream
+
+HOSTS = (
+    "api.bls.gov",
+    "apps.bea.gov",
+    "api.stlouisfed.org",
+    "www.federalreserve.gov",
+)
+
+
+def _future(days: int) -> datetime:
+    return datetime.now(timezone.utc) + timedelta(days=days)
+
+
+def _fomc_feed() -> str:
+    items = "".join(
+        f"<item><title>FOMC Meeting {i}</title><link>https://fed/{i}</link>"
+        f"<start>{_future(i * 42):%Y-%m-%dT%H:%M:%SZ}</start></item>"
+        for i in range(1, 9)
+    )
+    return f"<rss><channel>{items}</channel></rss>"
+
+
+def _press_feed() -> str:
+    items = "".join(
+        f"<item><title>Speech by Chair Powell {i}</title>"
+        f"<link>https://fed/p{i}</link><description></description>"
+        f"<pubDate>{_future(i):%a, %d %b %Y %H:%M:%S +0000}</pubDate></item>"
+        for i in range(1, 50)
+    )
+    return f"<rss><channel>{items}</channel></rss>"
+
+
+def make_stub_app(latency: float = 0.05, error_rate: float = 0.0) -> FastAPI:
+    stub = FastAPI()
+    fomc, press = _fomc_feed(), _press_feed()
+
+    @stub.middleware("http")
+    async def delay_and_fail(request: Request, call_next):
+        await asyncio.sleep(latency)
+        if random.random() < error_rate:
+            return Response(status_code=503)
+        return await call_next(request)
+
+    @stub.post("/publicAPI/v2/timeseries/data/")
+    async def bls(request: Request):
+        body = await request.json()
+        data = [{"year": "2026", "period": "M09", "value": "320.1"}]
+        return {
+            "status": "REQUEST_SUCCEEDED",
+            "Results": {
+                "series": [
+                    {"seriesID": series_id, "data": data}
+                    for series_id in body["seriesid"]
+                ]
+            },
+        }
+
+    @stub.get("/api/data/")
+    async def bea():
+        data = [
+            {"LineNumber": "1", "TimePeriod": "2026M09", "DataValue": "0.2"}
+        ]
+        return {"BEAAPI": {"Results": {"Data": data}}}
+
+    @stub.get("/fred/series/observations")
+    async def fred():
+        return {"observations": [{"date": "2026-10-01", "value": "4.33"}]}
+
+    @stub.get("/feeds/meetingcalendar.xml")
+    async def meeting_calendar():
+        return Response(fomc, media_type="application/xml")
+
+    @stub.get("/feeds/press_all.xml")
+    async def press_all():
+        return Response(press, media_type="application/xml")
+
+    return stub
+
+
+def install(patch, latency: float, error_rate: float) -> None:
+    """Route every upstream of the app to the stubs.
+
+    ``patch`` is a ``(target, attribute, value)`` setter such as
+    :meth:`benchmarks.run.Patches.setattr`, so the caller can undo the
+    change. The stub clients are put in the upstream client pool; close
+    them with :func:`app.upstream.aclose`.
+    """
+    transport = httpx.ASGITransport(app=make_stub_app(latency, error_rate))
+    for host in HOSTS:
+        upstream._clients[host] = httpx.AsyncClient(transport=transport)
+
+    def read_fast_info(symbol: str, field: str):
+        time.sleep(latency)
+        if random.random() < error_rate:
+            raise RuntimeError("stub yfinance error")
+        return 1_000_000.0 if field == "last_volume" else 27.5
+
+    patch(crud, "_read_fast_info", read_fast_info)
@@ -0,0 +1,22 @@
+import pytest
+
+from app import breaker, quota
+from app.config import settings
+
+
+@pytest.fixture(autouse=True)
+def _local_stores(tmp_path, mocker):
+    """Give each test its own, empty last-known-good and history stores."""
+    mocker.patch.object(settings, "lkg_path", str(tmp_path / "lkg.sqlite3"))
+    mocker.patch.object(settings, "history_path", str(tmp_path / "history"))
+    mocker.patch.object(settings, "profile_path", str(tmp_path / "profiles"))
+
+
+@pytest.fixture(autouse=True)
+def _fresh_upstream_state():
+    """Start each test with closed circuit breakers and full quotas."""
+    breaker.reset()
+    quota.reset()
+    yield
+    breaker.reset()
+    quota.reset()
@@ -0,0 +1,152 @@
+import httpx
+import pytest
+
+from app import backfill, history
+from app.backfill import BackfillState, Chunk, QuotaExhausted
+from app.config import settings
+from app.crud import BLS_CPI_SERIES, BLS_NFP_SERIES
+
+
+def _response(mocker, payload):
+    resp = mocker.Mock()
+    resp.json.return_value = payload
+    resp.raise_for_status.return_value = None
+    return resp
+
+
+def _chunk(key, source, points=None, error=None):
+    async def run():
+        if error is not None:
+            raise error
+        return points or {}
+
+    return Chunk(key, source, run)
+
+
+@pytest.fixture(autouse=True)
+def _no_sleep(mocker):
+    return mocker.patch("app.backfill.asyncio.sleep")
+
+
+def test_plan_splits_by_quota_limits(mocker):
+    mocker.patch.object(settings, "fred_api_key", "KEY")
+    mocker.patch.object(settings, "bea_api_key", None)
+    mocker.patch.object(settings, "bls_api_key", None)
+
+    keys = [c.key for c in backfill.plan(["fred", "bls", "bea"], 2000, 2024)]
+
+    assert "fred:FEDFUNDS:2000-2024" in keys
+    assert [k for k in keys if k.startswith("bls")] == [
+        "bls:2000-2009", "bls:2010-2019", "bls:2020-2024",
+    ]
+    assert not [k for k in keys if k.startswith("bea")]
+    mocker.patch.object(settings, "bls_api_key", "KEY")
+    mocker.patch.object(settings, "bea_api_key", "KEY")
+    mocker.patch.object(settings, "fred_api_key", None)
+    keys = [c.key for c in backfill.plan(["fred", "bls", "bea"], 2000, 2024)]
+    assert keys == [
+        "bls:2000-2019", "bls:2020-2024", "bea:2000-2009", "bea:2010-2019",
+        "bea:2020-2024",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_backfill_writes_batches_and_resumes(tmp_path):
+    state = BackfillState(str(tmp_path / "state.json"))
+    store = history.get_store()
+    chunks = [
+        _chunk("fred:A", "fred", {"FEDFUNDS": [(1.0, 5.0), (2.0, 5.25)]}),
+        _chunk("bea:B", "bea", error=RuntimeError("down")),
+    ]
+
+    assert await backfill.backfill(chunks, state, store) == 1
+    assert store.read("FEDFUNDS")["v"].tolist() == [5.0, 5.25]
+
+    resumed = BackfillState(state.path)
+    assert resumed.done == {"fred:A"}
+    chunks[0] = _chunk("fred:A", "fred", error=AssertionError("rerun"))
+    chunks[1] = _chunk("bea:B", "bea", {"PCE": [(1.0, 0.1)]})
+    assert await backfill.backfill(chunks, resumed, store) == 0
+    assert resumed.done == {"fred:A", "bea:B"}
+
+
+@pytest.mark.asyncio
+async def test_bls_daily_quota_stops_the_run(tmp_path, mocker):
+    mocker.patch.object(settings, "bls_api_key", None)
+    state = BackfillState(str(tmp_path / "state.json"))
+    state.bls_queries = {backfill._today(): 24}
+    chunks = [_chunk("bls:1", "bls"), _chunk("bls:2", "bls")]
+
+    with pytest.raises(QuotaExhausted):
+        await backfill.backfill(chunks, state, history.get_store())
+
+    assert state.done == {"bls:1"}
+    assert BackfillState(state.path).bls_used_today() == 25
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_spaces_calls(_no_sleep):
+    limiter = backfill.RateLimiter(per_minute=120)
+    await limiter.wait()
+    await limiter.wait()
+    assert _no_sleep.await_count == 1
+    assert 0 < _no_sleep.call_args.args[0] <= 0.5
+
+
+def test_main_backfills_every_source(tmp_path, mocker):
+    mocker.patch.object(settings, "fred_api_key", "KEY")
+    mocker.patch.object(settings, "bea_api_key", "KEY")
+    fred = {"observations": [{"date": "2024-06-01", "value": "5.33"}]}
+    bea = {
+        "BEAAPI": {
+            "Results": {
+                "Data": [
+                    {"LineNumber": "1", "TimePeriod": "2024M05",
+                     "DataValue": "1"},
+                    {"LineNumber": "2", "TimePeriod": "2024M05",
+                     "DataValue": "9"},
+                ]
+            }
+        }
+    }
+    bls = {
+        "status": "REQUEST_SUCCEEDED",
+        "Results": {
+            "series": [
+                {
+                    "seriesID": BLS_CPI_SERIES,
+                    "data": [
+                        {"year": "2024", "period": "M13", "value": "1"},
+                        {"year": "2024", "period": "M05", "value": "310"},
+                    ],
+                },
+                {"seriesID": BLS_NFP_SERIES, "data": []},
+            ]
+        },
+    }
+
+    def get(url, params=None, urgent=False):
+        return _response(mocker, fred if "stlouisfed" in url else bea)
+
+    mocker.patch("app.upstream.get", side_effect=get)
+    post = mocker.patch(
+        "app.upstream.post", return_value=_response(mocker, bls)
+    )
+    state = str(tmp_path / "state.json")
+
+    code = backfill.main(["--start", "2024", "--end", "2024", "--state", state])
+
+    assert code == 0
+    store = history.get_store()
+    assert store.read("CPI")["v"].tolist() == [310.0]
+    assert store.read("PCE")["v"].tolist() == [1.0]
+    assert store.read("DFII10")["v"].tolist() == [5.33]
+    assert post.call_args.kwargs["json"]["startyear"] == "2024"
+
+    mocker.patch("app.upstream.post", side_effect=httpx.ConnectError("x"))
+    assert backfill.main(["--source", "bls", "--state", state]) == 1
+    mocker.patch.object(settings, "bls_api_key", None)
+    mocker.patch.object(
+        BackfillState, "bls_used_today", return_value=25
+    )
+    assert backfill.main(["--source", "bls", "--state", state]) == 2
@@ -0,0 +1,66 @@
+import json
+
+from app import crud, upstream
+from app.config import settings
+from benchmarks import run
+
+
+def test_summarize_percentiles():
+    stats = run.summarize([i / 1000 for i in range(1, 101)], 2, 2.0)
+    assert stats["requests"] == 100
+    assert stats["errors"] == 2
+    assert stats["rps"] == 50.0
+    assert stats["p50_ms"] == 50.5
+    assert stats["p99_ms"] == 99.01
+
+
+def test_run_saves_results(tmp_path, capsys):
+    result = run.main(
+        [
+            "--rps", "45", "--duration", "0.2", "--latency", "0",
+            "--label", "smoke", "--output", str(tmp_path),
+        ]
+    )
+
+    saved = json.loads((tmp_path / "smoke.json").read_text())
+    assert saved == result
+    assert set(saved["scenarios"]) == {"cold", "warm", "expiry"}
+    for endpoints in saved["scenarios"].values():
+        assert set(endpoints) == set(run.ENDPOINTS)
+        assert all(s["errors"] == 0 for s in endpoints.values())
+
+
+def test_run_restores_upstreams_and_settings(tmp_path):
+    read_fast_info = crud._read_fast_info
+    history_path = settings.history_path
+
+    run.main(
+        [
+            "--rps", "20", "--duration", "0.1", "--latency", "0",
+            "--scenario", "warm", "--output", str(tmp_path),
+        ]
+    )
+
+    assert upstream._clients == {}
+    assert crud._read_fast_info is read_fast_info
+    assert settings.history_path == history_path
+    assert settings.quota_enabled
+
+
+def test_report_compares_p99():
+    current = {"scenarios": {"warm": {"/api/v1/vix": {
+        "rps": 10, "p50_ms": 1, "p95_ms": 2, "p99_ms": 3, "errors": 0,
+    }}}}
+    previous = {"scenarios": {"warm": {"/api/v1/vix": {"p99_ms": 2}}}}
+
+    assert "p99 +50%" in run.report(current, previous)
+
+
+def test_startup_does_not_import_market_data_libraries():
+    from benchmarks import startup
+
+    result = startup.measure(1)
+
+    assert result["median_s"] > 0
+    assert "yfinance" not in result["loaded"]
+    assert "pandas" not in result["loaded"]
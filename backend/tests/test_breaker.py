@@ -0,0 +1,87 @@
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app import crud
+from app.breaker import CircuitOpen, get_breaker
+from app.config import settings
+from app.main import app
+
+
+@pytest.fixture
+def clock(mocker):
+    now = [1000.0]
+    mocker.patch("app.breaker.time.monotonic", side_effect=lambda: now[0])
+    return now
+
+
+def test_breaker_opens_after_consecutive_failures(mocker, clock):
+    mocker.patch.object(settings, "breaker_failures", 3)
+    b = get_breaker("api.example.com")
+
+    b.record_failure()
+    b.record_failure()
+    b.record_success()
+    b.record_failure()
+    b.record_failure()
+    assert b.state == "closed"
+    b.record_failure()
+
+    assert b.state == "open"
+    with pytest.raises(CircuitOpen):
+        b.check()
+
+
+def test_breaker_half_open_probe(mocker, clock):
+    mocker.patch.object(settings, "breaker_failures", 1)
+    mocker.patch.object(settings, "breaker_reset", 30)
+    b = get_breaker("api.example.com")
+    b.record_failure()
+
+    clock[0] += 29
+    assert not b.allow()
+    clock[0] += 1
+    assert b.allow()
+    assert b.state == "half_open"
+    # Only one probe per reset timeout.
+    assert not b.allow()
+
+    b.record_failure()
+    assert b.state == "open"
+    assert b.retry_in() == 30
+
+    clock[0] += 30
+    assert b.allow()
+    b.record_success()
+    assert b.state == "closed"
+    assert b.failures == 0
+
+
+@pytest.mark.asyncio
+async def test_open_yfinance_circuit_skips_threads(mocker):
+    mocker.patch.object(settings, "breaker_failures", 1)
+    read = mocker.patch("app.crud._read_fast_info", return_value=None)
+
+    assert await crud.fetch_quotes({"UUP": "last_price"}) == {}
+    assert get_breaker("yfinance").state == "open"
+    with pytest.raises(CircuitOpen):
+        await crud.fetch_quotes({"UUP": "last_price"})
+    read.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_upstreams_endpoint(mocker):
+    mocker.patch.object(settings, "breaker_failures", 1)
+    get_breaker("api.bls.gov").record_failure()
+    get_breaker("api.stlouisfed.org").record_success()
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as ac:
+        resp = await ac.get("/api/v1/upstreams")
+
+    assert resp.status_code == 200
+    assert [(u["name"], u["state"]) for u in resp.json()] == [
+        ("api.bls.gov", "open"),
+        ("api.stlouisfed.org", "closed"),
+    ]
+    assert 0 < resp.json()[0]["retry_in"] <= settings.breaker_reset
@@ -1,26 +1,132 @@
-from app.crud import fetch_market_indices, CACHE, fetch_fomc_next, FOMC_NEXT_CACHE
+import asyncio
+from contextlib import asynccontextmanager
 
+import httpx
+import pytest
+from cachetools import TTLCache
 
-def test_market_indices_cache(mocker):
+from app.cache import cached
+from app.crud import (
+    fetch_market_indices,
+    CACHE,
+    fetch_fomc_next,
+    FOMC_NEXT_CACHE,
+    FOMC_EVENTS_CACHE,
+    FETCHERS,
+    coalescing_stats,
+)
+
+
+@pytest.mark.asyncio
+async def test_market_indices_cache(mocker):
     CACHE.clear()
     mock_ticker = mocker.patch("yfinance.Ticker")
     mock_ticker.return_value.fast_info = {"last_price": 42, "last_volume": 1}
-    first = fetch_market_indices()
-    second = fetch_market_indices()
+    first = await fetch_market_indices()
+    second = await fetch_market_indices()
     assert first is second
     assert mock_ticker.call_count == 3
 
 
-def test_fomc_next_cache(mocker):
+@pytest.mark.asyncio
+async def test_fomc_next_cache(mocker):
     FOMC_NEXT_CACHE.clear()
-    mock_get = mocker.patch("requests.get")
-    mock_get.return_value.text = (
+    FOMC_EVENTS_CACHE.clear()
+    xml = (
         "<rss><channel>"
         "<item><title>A</title><link>u</link><start>2099-01-01T00:00:00Z</start></item>"
         "</channel></rss>"
     )
-    mock_get.return_value.raise_for_status.return_value = None
-    first = fetch_fomc_next()
-    second = fetch_fomc_next()
+
+    @asynccontextmanager
+    async def stream(url, headers=None):
+        yield httpx.Response(
+            200, content=xml.encode(), request=httpx.Request("GET", url)
+        )
+
+    mock_get = mocker.patch("app.upstream.stream", side_effect=stream)
+    first = await fetch_fomc_next()
+    second = await fetch_fomc_next()
     assert first is second
     assert mock_get.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_are_coalesced():
+    release = asyncio.Event()
+    calls = []
+
+    @cached(TTLCache(maxsize=1, ttl=100))
+    async def fetch():
+        calls.append(1)
+        await release.wait()
+        return object()
+
+    tasks = [asyncio.ensure_future(fetch()) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*tasks)
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert fetch.cache_flight.executions == 1
+    assert fetch.cache_flight.coalesced == 4
+
+
+@pytest.mark.asyncio
+async def test_coalesced_waiters_receive_error():
+    release = asyncio.Event()
+
+    @cached(TTLCache(maxsize=1, ttl=100))
+    async def fetch():
+        await release.wait()
+        raise RuntimeError("down")
+
+    tasks = [asyncio.ensure_future(fetch()) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert fetch.cache_flight.executions == 1
+    assert len(fetch.cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_cancel_flight():
+    release = asyncio.Event()
+
+    @cached(TTLCache(maxsize=1, ttl=100))
+    async def fetch():
+        await release.wait()
+        return 1
+
+    first = asyncio.ensure_future(fetch())
+    second = asyncio.ensure_future(fetch())
+    await asyncio.sleep(0)
+    first.cancel()
+    release.set()
+
+    assert await second == 1
+    assert first.cancelled()
+
+
+@pytest.mark.asyncio
+async def test_cache_refresh_and_clear():
+    values = iter([1, 2])
+
+    @cached(TTLCache(maxsize=1, ttl=100))
+    async def fetch():
+        return next(values)
+
+    assert await fetch() == 1
+    assert await fetch.cache_refresh() == 2
+    assert await fetch() == 2
+    fetch.cache_clear()
+    assert len(fetch.cache) == 0
+
+
+def test_coalescing_stats_lists_fetchers():
+    stats = coalescing_stats()
+    assert set(stats) == set(FETCHERS)
+    assert set(stats["vix"]) == {"executions", "coalesced"}
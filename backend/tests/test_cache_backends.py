@@ -0,0 +1,248 @@
+import asyncio
+import socket
+import sqlite3
+import time
+
+import fakeredis
+import pytest
+
+from app import cache as cache_module
+from app.cache import (
+    MemoryCache,
+    RedisCache,
+    SQLiteCache,
+    cached,
+    make_cache,
+)
+from app.config import settings
+from app.scheduler import RefreshScheduler, build_jobs
+from app.schemas import FedRate
+
+
+def test_sqlite_cache_shared_between_workers(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    worker_a = SQLiteCache(path, "fed_rate", ttl=100)
+    worker_b = SQLiteCache(path, "fed_rate", ttl=100)
+    other = SQLiteCache(path, "vix", ttl=100)
+
+    worker_a[()] = FedRate(value=5.0, date="2024-06-13")
+
+    assert worker_b[()].value == 5.0
+    assert len(worker_b) == 1
+    assert list(worker_b) == ["()"]
+    assert len(other) == 0
+    del worker_b[()]
+    with pytest.raises(KeyError):
+        worker_a[()]
+    with pytest.raises(KeyError):
+        del worker_a[()]
+
+
+def test_sqlite_cache_expiry_and_clear(tmp_path, mocker):
+    cache = SQLiteCache(str(tmp_path / "c.sqlite3"), "x", ttl=10)
+    cache["k"] = 1
+    cache["j"] = 2
+    clock = mocker.patch("app.cache.time.time", return_value=10**10)
+    with pytest.raises(KeyError):
+        cache["k"]
+    clock.return_value = 0
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_sqlite_cache_lease(tmp_path, mocker):
+    path = str(tmp_path / "c.sqlite3")
+    worker_a = SQLiteCache(path, "x", ttl=10)
+    worker_b = SQLiteCache(path, "x", ttl=10)
+    assert worker_a.claim(60)
+    assert not worker_b.claim(60)
+    worker_a.release()
+    assert worker_b.claim(60)
+    mocker.patch("app.cache.time.time", return_value=10**10)
+    assert worker_a.claim(60)
+
+
+def test_sqlite_lock_timeout_is_a_miss(tmp_path, mocker):
+    mocker.patch.object(settings, "sqlite_timeout", 0.05)
+    path = str(tmp_path / "c.sqlite3")
+    cache = SQLiteCache(path, "x", ttl=100)
+    cache["k"] = 1
+    other = sqlite3.connect(path)
+    other.execute("BEGIN EXCLUSIVE")
+
+    start = time.monotonic()
+    cache["j"] = 2
+    other.rollback()
+
+    assert time.monotonic() - start < 1
+    with pytest.raises(KeyError):
+        cache["j"]
+    mocker.patch.object(
+        cache, "_conn", side_effect=sqlite3.OperationalError("locked")
+    )
+    with pytest.raises(KeyError):
+        cache["k"]
+
+
+def test_redis_cache_roundtrip():
+    client = fakeredis.FakeRedis()
+    worker_a = RedisCache(client, "vix", ttl=100)
+    worker_b = RedisCache(client, "vix", ttl=100)
+
+    worker_a[()] = FedRate(value=15.5, date="2024-06-14")
+
+    assert worker_b[()].value == 15.5
+    assert len(worker_b) == 1
+    assert list(worker_b) == ["()"]
+    assert client.pttl("goldapp:cache:vix:()") > 0
+    del worker_b[()]
+    with pytest.raises(KeyError):
+        del worker_b[()]
+    worker_a["k"] = 1
+    worker_a.clear()
+    assert len(worker_a) == 0
+    worker_a.clear()
+
+
+def test_redis_cache_lease():
+    client = fakeredis.FakeRedis()
+    worker_a = RedisCache(client, "vix", ttl=100)
+    worker_b = RedisCache(client, "vix", ttl=100)
+    assert worker_a.claim(60)
+    assert not worker_b.claim(60)
+    worker_a.release()
+    assert worker_b.claim(60)
+
+
+def test_redis_outage_is_a_miss(mocker):
+    client = mocker.Mock()
+    client.get.side_effect = ConnectionError
+    client.set.side_effect = ConnectionError
+    cache = RedisCache(client, "vix", ttl=100)
+    cache[()] = 1
+    with pytest.raises(KeyError):
+        cache[()]
+
+
+def test_redis_outage_grants_lease_and_empties_namespace(mocker):
+    client = mocker.Mock()
+    client.set.side_effect = ConnectionError
+    client.delete.side_effect = ConnectionError
+    client.scan_iter.side_effect = ConnectionError
+    cache = RedisCache(client, "vix", ttl=100)
+    assert cache.claim(60)
+    cache.release()
+    assert len(cache) == 0
+    cache.clear()
+    with pytest.raises(KeyError):
+        del cache[()]
+
+
+def test_unresponsive_redis_times_out(mocker):
+    mocker.patch.object(settings, "redis_timeout", 0.05)
+    mocker.patch.object(cache_module, "_redis_client", None)
+    with socket.socket() as server:
+        server.bind(("127.0.0.1", 0))
+        server.listen()
+        host, port = server.getsockname()
+        mocker.patch.object(settings, "redis_url", f"redis://{host}:{port}/0")
+        cache = RedisCache(cache_module._get_redis_client(), "vix", ttl=100)
+
+        start = time.monotonic()
+        with pytest.raises(KeyError):
+            cache[()]
+
+    assert time.monotonic() - start < 1
+
+
+def test_make_cache_backends(tmp_path, mocker):
+    mocker.patch.object(settings, "cache_path", str(tmp_path / "c.sqlite3"))
+    mocker.patch.object(cache_module, "_redis_client", None)
+    mocker.patch("redis.Redis.from_url", return_value=fakeredis.FakeRedis())
+    assert isinstance(make_cache("x", 1, 10, "memory"), MemoryCache)
+    assert isinstance(make_cache("x", 1, 10, "sqlite"), SQLiteCache)
+    assert isinstance(make_cache("x", 1, 10, "redis"), RedisCache)
+    with pytest.raises(ValueError):
+        make_cache("x", 1, 10, "memcached")
+
+
+def test_memory_cache_claim_always_holds():
+    cache = MemoryCache(maxsize=1, ttl=10)
+    assert cache.claim(60)
+    cache.release()
+    assert cache.claim(60)
+
+
+@pytest.mark.asyncio
+async def test_scheduler_skips_refresh_leased_by_other_worker(tmp_path):
+    path = str(tmp_path / "c.sqlite3")
+    calls = []
+
+    def make_fetcher():
+        @cached(SQLiteCache(path, "x", ttl=100))
+        async def fetch():
+            calls.append(1)
+            return len(calls)
+
+        return fetch
+
+    worker_a = RefreshScheduler(build_jobs({"x": make_fetcher()}, 0.1))
+    worker_b = RefreshScheduler(build_jobs({"x": make_fetcher()}, 0.1))
+    for scheduler in (worker_a, worker_b):
+        await asyncio.gather(*scheduler.run_pending())
+        await scheduler.stop()
+
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_scheduler_releases_lease_on_failure(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "c.sqlite3"), "x", ttl=100)
+
+    @cached(cache)
+    async def fetch():
+        raise RuntimeError("down")
+
+    scheduler = RefreshScheduler(build_jobs({"x": fetch}, 0.1))
+    await asyncio.gather(*scheduler.run_pending())
+    await scheduler.stop()
+
+    assert cache.claim(60)
+
+
+@pytest.mark.asyncio
+async def test_scheduler_reschedules_job_when_lease_fails(mocker):
+    calls = []
+
+    @cached(MemoryCache(maxsize=1, ttl=100))
+    async def fetch():
+        calls.append(1)
+        return 1
+
+    mocker.patch.object(fetch.cache, "claim", side_effect=ConnectionError)
+    mocker.patch.object(fetch.cache, "release", side_effect=ConnectionError)
+    job = build_jobs({"x": fetch}, 0.1)[0]
+    scheduler = RefreshScheduler([job])
+    await asyncio.gather(*scheduler.run_pending())
+    await scheduler.stop()
+
+    assert calls == [1]
+    assert not job.running
+    assert job.next_run > time.monotonic() + 60
+
+
+@pytest.mark.asyncio
+async def test_scheduler_reschedules_job_when_refresh_errors(mocker):
+    @cached(MemoryCache(maxsize=1, ttl=100))
+    async def fetch():
+        return 1
+
+    mocker.patch.object(fetch, "cache_refresh", return_value=None)
+    mocker.patch.object(fetch, "cache_peek", side_effect=OSError)
+    job = build_jobs({"x": fetch}, 0.1)[0]
+    scheduler = RefreshScheduler([job], retry_delay=5)
+    await asyncio.gather(*scheduler.run_pending())
+    await scheduler.stop()
+
+    assert not job.running
+    assert job.next_run <= time.monotonic() + 5
@@ -0,0 +1,102 @@
+import asyncio
+
+import msgpack
+import pytest
+from cachetools import TTLCache
+from httpx import AsyncClient, ASGITransport
+
+from app import crud
+from app.cache import cached
+from app.main import app
+from app.schemas import FedRate, VIXClose
+
+
+def _fetcher(result, started=None, release=None):
+    @cached(TTLCache(maxsize=1, ttl=100))
+    async def fetch():
+        if started is not None:
+            started.append(1)
+            await release.wait()
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    return fetch
+
+
+@pytest.fixture
+def fetchers(mocker):
+    fakes = {name: _fetcher(None) for name in crud.FETCHERS}
+    fakes["fed_rate"] = _fetcher(FedRate(value=5.0, date="2024-06-13"))
+    fakes["vix"] = _fetcher(RuntimeError("FRED unavailable"))
+    mocker.patch.dict(crud.FETCHERS, fakes)
+    return fakes
+
+
+@pytest.mark.asyncio
+async def test_dashboard_reports_status_per_indicator(fetchers):
+    data = await crud.fetch_dashboard()
+
+    assert data.fed_rate.status == "ok"
+    assert data.fed_rate.data.value == 5.0
+    assert data.fed_rate.age_seconds >= 0
+    assert data.fed_rate.updated_at is not None
+    assert data.vix.status == "error"
+    assert data.vix.error == "FRED unavailable"
+    assert data.vix.data is None
+    assert data.fomc_next.status == "ok"
+    assert data.fomc_next.data is None
+
+
+@pytest.mark.asyncio
+async def test_dashboard_fetches_cold_indicators_concurrently(mocker):
+    started = []
+    release = asyncio.Event()
+    fakes = {
+        name: _fetcher(None, started, release) for name in crud.FETCHERS
+    }
+    mocker.patch.dict(crud.FETCHERS, fakes)
+
+    task = asyncio.ensure_future(crud.fetch_dashboard())
+    while len(started) < len(fakes):
+        await asyncio.sleep(0)
+    release.set()
+    data = await task
+
+    assert data.vix.status == "ok"
+
+
+@pytest.mark.asyncio
+async def test_dashboard_serves_cached_values(fetchers):
+    first = await crud.fetch_dashboard()
+    second = await crud.fetch_dashboard()
+    assert first.fed_rate.updated_at == second.fed_rate.updated_at
+
+
+@pytest.mark.asyncio
+async def test_api_dashboard_partial_failure(fetchers):
+    crud.FETCHERS["vix"] = _fetcher(VIXClose(value=15.5, date="2024-06-14"))
+    crud.FETCHERS["pce"] = _fetcher(RuntimeError("BEA API key missing"))
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        resp = await ac.get("/api/v1/dashboard")
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["pce"]["status"] == "error"
+    assert body["vix"]["data"]["value"] == 15.5
+    assert body["fed_rate"]["data"]["source"] == "FRED"
+    assert "generated_at" in body
+
+
+@pytest.mark.asyncio
+async def test_api_dashboard_as_msgpack(fetchers):
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        resp = await ac.get(
+            "/api/v1/dashboard", headers={"Accept": "application/msgpack"}
+        )
+    assert resp.headers["content-type"] == "application/msgpack"
+    assert resp.headers["vary"] == "Accept, Accept-Encoding"
+    body = msgpack.unpackb(resp.content)
+    assert body["fed_rate"]["data"]["value"] == 5.0
+    assert body["vix"]["status"] == "error"
@@ -0,0 +1,113 @@
+import gzip
+import time
+from datetime import datetime, timezone
+
+import brotli
+import msgpack
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app import encoding
+from app.cache import CacheEntry
+from app.main import app
+from app.responses import entry_variants
+from app.schemas import Indicator, MarketIndices
+
+ALL = encoding.VARIANTS
+
+
+def _indices():
+    at = datetime(2024, 6, 14, 20, 0)
+    return MarketIndices(
+        dxy_proxy_uup=Indicator(
+            symbol="UUP", value=28.5, unit="USD", last_updated_utc=at
+        ),
+        volume_aggregated=Indicator(
+            symbol="US_VOLUME", value=1.5e8, unit="shares", last_updated_utc=at
+        ),
+    )
+
+
+@pytest.mark.parametrize(
+    "accept, accept_encoding, expected",
+    [
+        (None, None, None),
+        ("*/*", "gzip, deflate, br", "br"),
+        ("application/msgpack", "br", "msgpack"),
+        ("application/x-msgpack, application/json;q=0.5", None, "msgpack"),
+        ("application/json, application/msgpack;q=0.5", None, None),
+        ("*/*", "gzip", "gzip"),
+        ("*/*", "br;q=0, gzip;q=0.5", "gzip"),
+        ("*/*", "*", "br"),
+        ("*/*", "identity", None),
+    ],
+)
+def test_negotiate(accept, accept_encoding, expected):
+    assert encoding.negotiate(accept, accept_encoding, ALL) == expected
+
+
+def test_negotiate_skips_missing_variants():
+    assert encoding.negotiate(None, "br, gzip", {"msgpack": b""}) is None
+
+
+def test_variants_are_encoded_once_with_the_entry():
+    entry = CacheEntry(_indices(), time.time())
+
+    assert brotli.decompress(entry.variants["br"]) == entry.body
+    assert gzip.decompress(entry.variants["gzip"]) == entry.body
+    data = msgpack.unpackb(entry.variants["msgpack"], timestamp=3)
+    assert data["dxy_proxy_uup"]["last_updated_utc"] == datetime(
+        2024, 6, 14, 20, 0, tzinfo=timezone.utc
+    )
+    assert len(entry.variants["msgpack"]) < len(entry.body)
+
+
+def test_compression_skipped_when_not_smaller():
+    entry = CacheEntry(None, time.time())
+    assert entry.variants == {"msgpack": msgpack.packb(None)}
+
+
+def test_variants_of_entry_stored_without_them():
+    entry = CacheEntry(_indices(), time.time())
+    object.__setattr__(entry, "variants", None)
+    assert set(entry_variants(entry)) == {"msgpack", "br", "gzip"}
+
+
+@pytest.mark.asyncio
+async def test_api_negotiates_encoding(mocker):
+    entry = CacheEntry(_indices(), time.time())
+    mocker.patch(
+        "app.main.fetch_market_indices.cache_entry", return_value=entry
+    )
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as ac:
+        packed = await ac.get(
+            "/api/v1/market_indices",
+            headers={"Accept": "application/msgpack"},
+        )
+        compressed = await ac.get(
+            "/api/v1/market_indices", headers={"Accept-Encoding": "br"}
+        )
+        plain = await ac.get(
+            "/api/v1/market_indices", headers={"Accept-Encoding": "identity"}
+        )
+        revalidated = await ac.get(
+            "/api/v1/market_indices",
+            headers={
+                "Accept-Encoding": "br",
+                "If-None-Match": compressed.headers["etag"],
+            },
+        )
+
+    assert packed.headers["content-type"] == "application/msgpack"
+    assert packed.content == entry.variants["msgpack"]
+    assert compressed.headers["content-encoding"] == "br"
+    assert compressed.content == entry.body
+    assert plain.content == entry.body
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["vary"] == "Accept, Accept-Encoding"
+    tags = {r.headers["etag"] for r in (packed, compressed, plain)}
+    assert len(tags) == 3
+    assert revalidated.status_code == 304
+
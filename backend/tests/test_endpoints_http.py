@@ -1,8 +1,11 @@
+import time
+
 import pytest
 from datetime import datetime
 
 from httpx import AsyncClient, ASGITransport
 
+from app.cache import CacheEntry
 from app.main import app
 from app.schemas import (
     MarketIndices,
@@ -15,6 +18,10 @@ from app.schemas import (
 )
 
 
+def _entry(value):
+    return CacheEntry(value, time.time())
+
+
 @pytest.mark.asyncio
 async def test_api_market_indices_ok(mocker):
     payload = MarketIndices(
@@ -28,7 +35,7 @@ async def test_api_market_indices_ok(mocker):
             last_updated_utc=datetime.utcnow(),
         ),
     )
-    mocker.patch("app.main.fetch_market_indices", return_value=payload)
+    mocker.patch("app.main.fetch_market_indices.cache_entry", return_value=_entry(payload))
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
         resp = await ac.get("/api/v1/market_indices")
@@ -42,7 +49,7 @@ async def test_api_market_indices_error(mocker):
     from app.crud import fetch_market_indices
 
     fetch_market_indices.cache_clear()
-    mocker.patch("app.main.fetch_market_indices", side_effect=Exception)
+    mocker.patch("app.main.fetch_market_indices.cache_entry", side_effect=Exception)
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
         resp = await ac.get("/api/v1/market_indices")
@@ -54,7 +61,7 @@ async def test_api_market_indices_none(mocker):
     from app.crud import fetch_market_indices
 
     fetch_market_indices.cache_clear()
-    mocker.patch("app.main.fetch_market_indices", return_value=None)
+    mocker.patch("app.main.fetch_market_indices.cache_entry", return_value=_entry(None))
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
         resp = await ac.get("/api/v1/market_indices")
@@ -64,7 +71,7 @@ async def test_api_market_indices_none(mocker):
 @pytest.mark.asyncio
 async def test_api_latest_macro_ok(mocker):
     payload = LatestMacro(latest_macro=MacroStat(name="CPI", value=1.0, unit="i", date="2024-06", source="BLS"))
-    mocker.patch("app.main.fetch_latest_macro", return_value=payload)
+    mocker.patch("app.main.fetch_latest_macro.cache_entry", return_value=_entry(payload))
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
         resp = await ac.get("/api/v1/latest_macro")
@@ -74,7 +81,7 @@ async def test_api_latest_macro_ok(mocker):
 
 @pytest.mark.asyncio
 async def test_api_latest_macro_error(mocker):
-    mocker.patch("app.main.fetch_latest_macro", side_effect=RuntimeError)
+    mocker.patch("app.main.fetch_latest_macro.cache_entry", side_effect=RuntimeError)
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
         resp = await ac.get("/api/v1/latest_macro")
@@ -84,7 +91,7 @@ async def test_api_latest_macro_error(mocker):
 @pytest.mark.asyncio
 async def test_api_pce_ok(mocker):
     payload = PCEStat(name="PCE", value=0.1, unit="%", date="2024-06", source="BEA")
-    mocker.patch("app.main.fetch_pce", return_value=payload)
+    mocker.patch("app.main.fetch_pce.cache_entry", return_value=_entry(payload))
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
         resp = await ac.get("/api/v1/pce")
@@ -94,7 +101,7 @@ async def test_api_pce_ok(mocker):
 
 @pytest.mark.asyncio
 async def test_api_pce_error(mocker):
-    mocker.patch("app.main.fetch_pce", side_effect=RuntimeError)
+    mocker.patch("app.main.fetch_pce.cache_entry", side_effect=RuntimeError)
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
         resp = await ac.get("/api/v1/pce")
@@ -104,7 +111,7 @@ async def test_api_pce_error(mocker):
 @pytest.mark.asyncio
 async def test_api_fed_rate_ok(mocker):
     payload = FedRate(value=5.0, date="2024-06-13")
-    mocker.patch("app.main.fetch_fed_rate", return_value=payload)
+    mocker.patch("app.main.fetch_fed_rate.cache_entry", return_value=_entry(payload))
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
         resp = await ac.get("/api/v1/fed_rate")
@@ -114,7 +121,7 @@ async def test_api_fed_rate_ok(mocker):
 
 @pytest.mark.asyncio
 async def test_api_fed_rate_error(mocker):
-    mocker.patch("app.main.fetch_fed_rate", side_effect=RuntimeError)
+    mocker.patch("app.main.fetch_fed_rate.cache_entry", side_effect=RuntimeError)
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
         resp = await ac.get("/api/v1/fed_rate")
@@ -124,7 +131,7 @@ async def test_api_fed_rate_error(mocker):
 @pytest.mark.asyncio
 async def test_api_vix_ok(mocker):
     payload = VIXClose(value=15.5, date="2024-06-14")
-    mocker.patch("app.main.fetch_vix", return_value=payload)
+    mocker.patch("app.main.fetch_vix.cache_entry", return_value=_entry(payload))
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
         resp = await ac.get("/api/v1/vix")
@@ -134,7 +141,7 @@ async def test_api_vix_ok(mocker):
 
 @pytest.mark.asyncio
 async def test_api_vix_error(mocker):
-    mocker.patch("app.main.fetch_vix", side_effect=RuntimeError)
+    mocker.patch("app.main.fetch_vix.cache_entry", side_effect=RuntimeError)
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
         resp = await ac.get("/api/v1/vix")
@@ -146,7 +153,7 @@ async def test_api_fomc_next_ok(mocker):
     from app.schemas import FomcNext
 
     payload = FomcNext(date="2099-01-01", time="12:00", title="Meeting", url="u")
-    mocker.patch("app.main.fetch_fomc_next", return_value=payload)
+    mocker.patch("app.main.fetch_fomc_next.cache_entry", return_value=_entry(payload))
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
         resp = await ac.get("/api/v1/fomc_next")
@@ -156,7 +163,7 @@ async def test_api_fomc_next_ok(mocker):
 
 @pytest.mark.asyncio
 async def test_api_fomc_next_error(mocker):
-    mocker.patch("app.main.fetch_fomc_next", side_effect=RuntimeError)
+    mocker.patch("app.main.fetch_fomc_next.cache_entry", side_effect=RuntimeError)
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
         resp = await ac.get("/api/v1/fomc_next")
@@ -168,7 +175,7 @@ async def test_api_powell_speech_ok(mocker):
     from app.schemas import PowellSpeech
 
     payload = PowellSpeech(date="2099-01-01", time="12:00", title="Speech", url="u")
-    mocker.patch("app.main.fetch_powell_speech", return_value=payload)
+    mocker.patch("app.main.fetch_powell_speech.cache_entry", return_value=_entry(payload))
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
         resp = await ac.get("/api/v1/powell_speech")
@@ -178,7 +185,7 @@ async def test_api_powell_speech_ok(mocker):
 
 @pytest.mark.asyncio
 async def test_api_powell_speech_error(mocker):
-    mocker.patch("app.main.fetch_powell_speech", side_effect=RuntimeError)
+    mocker.patch("app.main.fetch_powell_speech.cache_entry", side_effect=RuntimeError)
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
         resp = await ac.get("/api/v1/powell_speech")
@@ -0,0 +1,119 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+
+from app import crud
+from app.events import EventIndex
+from app.main import app
+from app.schemas import EconomicEvent, FomcNext
+
+NOW = datetime.now(timezone.utc)
+
+
+def _event(days, kind="fomc"):
+    return EconomicEvent(
+        kind=kind,
+        starts_at=NOW + timedelta(days=days),
+        title=f"{kind} {days}",
+        url="u",
+    )
+
+
+def test_index_queries():
+    index = EventIndex([_event(3), _event(-1), _event(1), _event(2)])
+
+    assert len(index) == 4
+    assert index.next(NOW).title == "fomc 1"
+    assert [e.title for e in index.upcoming(2, NOW)] == ["fomc 1", "fomc 2"]
+    assert index.next(NOW + timedelta(days=5)) is None
+    window = index.between(NOW - timedelta(days=1), NOW + timedelta(days=2))
+    assert [e.title for e in window] == ["fomc -1", "fomc 1"]
+    assert len(index.between(NOW)) == 3
+
+
+def test_next_event_entry_expires_when_it_starts():
+    starts_at = datetime.now(timezone.utc) + timedelta(hours=1)
+    event = FomcNext(
+        date=starts_at.strftime("%Y-%m-%d"),
+        time=starts_at.strftime("%H:%M"),
+        title="t",
+        url="u",
+    )
+    expires = crud._until_start(86400)
+
+    assert expires(None) is None
+    assert expires(event) == pytest.approx(starts_at.timestamp(), abs=60)
+    assert crud._until_start(10)(event) < starts_at.timestamp() - 3000
+
+
+@pytest.mark.asyncio
+async def test_fomc_next_rolls_forward(mocker):
+    crud.FOMC_NEXT_CACHE.clear()
+    soon = _event(0)
+    soon.starts_at = datetime.now(timezone.utc) + timedelta(seconds=0.2)
+    index = EventIndex([soon, _event(2)])
+    mocker.patch(
+        "app.crud.fetch_fomc_events", mocker.AsyncMock(return_value=index)
+    )
+
+    first = await crud.fetch_fomc_next()
+    await asyncio.sleep(0.3)
+    second = await crud.fetch_fomc_next()
+
+    assert (first.title, second.title) == ("fomc 0", "fomc 2")
+    assert second.date == (NOW + timedelta(days=2)).strftime("%Y-%m-%d")
+
+
+@pytest.fixture
+def indexes(mocker):
+    fomc = EventIndex([_event(1), _event(5)])
+    powell = EventIndex([_event(3, "powell_speech")])
+    mocker.patch.dict(
+        crud.EVENT_FETCHERS,
+        {
+            "fomc": mocker.AsyncMock(return_value=fomc),
+            "powell_speech": mocker.AsyncMock(return_value=powell),
+        },
+    )
+
+
+@pytest.mark.asyncio
+async def test_fetch_events_merges_kinds(indexes):
+    events = await crud.fetch_events(limit=2)
+    assert [e.title for e in events] == ["fomc 1", "powell_speech 3"]
+    only_fomc = await crud.fetch_events(["fomc"])
+    assert [e.kind for e in only_fomc] == ["fomc", "fomc"]
+
+
+@pytest.mark.asyncio
+async def test_fetch_events_window(indexes):
+    start = (NOW + timedelta(days=2)).replace(tzinfo=None)
+    events = await crud.fetch_events(start=start)
+    assert [e.title for e in events] == ["powell_speech 3", "fomc 5"]
+    events = await crud.fetch_events(end=NOW + timedelta(days=4), limit=1)
+    assert [e.title for e in events] == ["fomc 1"]
+
+
+@pytest.mark.asyncio
+async def test_api_events(mocker):
+    mock = mocker.patch(
+        "app.main.fetch_events", return_value=[_event(1, "powell_speech")]
+    )
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as ac:
+        resp = await ac.get(
+            "/api/v1/events",
+            params={"kind": "powell_speech", "limit": 5},
+        )
+        bad = await ac.get("/api/v1/events", params={"kind": "ecb"})
+        mock.side_effect = RuntimeError("down")
+        down = await ac.get("/api/v1/events")
+
+    assert resp.status_code == 200
+    assert resp.json()[0]["kind"] == "powell_speech"
+    mock.assert_any_await(["powell_speech"], None, None, 5)
+    assert bad.status_code == 422
+    assert down.status_code == 503
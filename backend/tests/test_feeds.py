@@ -0,0 +1,77 @@
+from contextlib import asynccontextmanager
+
+import httpx
+import pytest
+
+from app.feeds import XMLFeed, iter_items
+
+FEED = (
+    b"<rss><channel>"
+    b"<item><title>A</title></item>"
+    b"<item><title>B</title></item>"
+    b"</channel></rss>"
+)
+
+
+async def _chunks(data, size=7):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+async def _titles(items):
+    return [item.findtext("title") async for item in items]
+
+
+def _mock_stream(mocker, *responses):
+    requests = []
+    responses = iter(responses)
+
+    @asynccontextmanager
+    async def stream(url, headers=None):
+        requests.append(headers)
+        status, body = next(responses)
+        yield httpx.Response(
+            status,
+            content=body,
+            headers={"ETag": '"v1"', "Last-Modified": "Mon, 01 Jan 2024"},
+            request=httpx.Request("GET", url),
+        )
+
+    mocker.patch("app.upstream.stream", side_effect=stream)
+    return requests
+
+
+@pytest.mark.asyncio
+async def test_iter_items_parses_chunks_incrementally():
+    assert await _titles(iter_items(_chunks(FEED))) == ["A", "B"]
+
+
+@pytest.mark.asyncio
+async def test_iter_items_rejects_truncated_feed():
+    with pytest.raises(Exception):
+        await _titles(iter_items(_chunks(b"<rss><channel><item>")))
+
+
+@pytest.mark.asyncio
+async def test_unchanged_feed_reuses_previous_result(mocker):
+    requests = _mock_stream(mocker, (200, FEED), (304, b""))
+    feed = XMLFeed("https://example.com/feed.xml")
+
+    first = await feed.fetch(_titles)
+    second = await feed.fetch(_titles)
+
+    assert first == second == ["A", "B"]
+    assert requests == [
+        {},
+        {
+            "If-None-Match": '"v1"',
+            "If-Modified-Since": "Mon, 01 Jan 2024",
+        },
+    ]
+
+
+@pytest.mark.asyncio
+async def test_error_status_raises(mocker):
+    _mock_stream(mocker, (500, b""))
+    with pytest.raises(httpx.HTTPStatusError):
+        await XMLFeed("https://example.com/feed.xml").fetch(_titles)
@@ -1,21 +1,30 @@
-import requests
+import httpx
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
 
 import pytest
 
-from app.crud import fetch_fomc_next, FOMC_NEXT_CACHE
+from app.crud import fetch_fomc_next, FOMC_NEXT_CACHE, FOMC_EVENTS_CACHE
 from app.schemas import FomcNext
 
 
-def _mock_response(mocker, text: str):
-    resp = mocker.Mock()
-    resp.text = text
-    resp.raise_for_status.return_value = None
-    return resp
+def _mock_stream(mocker, text: str, status_code: int = 200):
+    @asynccontextmanager
+    async def stream(url, headers=None):
+        yield httpx.Response(
+            status_code,
+            content=text.encode(),
+            headers={"ETag": '"v1"'},
+            request=httpx.Request("GET", url),
+        )
 
+    return mocker.patch("app.upstream.stream", side_effect=stream)
 
-def test_fomc_next_success(mocker):
+
+@pytest.mark.asyncio
+async def test_fomc_next_success(mocker):
     FOMC_NEXT_CACHE.clear()
+    FOMC_EVENTS_CACHE.clear()
     now = datetime.utcnow()
     dt1 = (now + timedelta(days=1)).strftime("%Y-%m-%dT%H:%M:%SZ")
     dt2 = (now + timedelta(days=2)).strftime("%Y-%m-%dT%H:%M:%SZ")
@@ -25,9 +34,9 @@ def test_fomc_next_success(mocker):
         <item><title>Second</title><link>https://b</link><start>{dt2}</start></item>
     </channel></rss>
     """
-    mocker.patch("requests.get", return_value=_mock_response(mocker, xml))
+    _mock_stream(mocker, xml)
 
-    data = fetch_fomc_next()
+    data = await fetch_fomc_next()
 
     assert isinstance(data, FomcNext)
     assert data.title == "First"
@@ -36,28 +45,34 @@ def test_fomc_next_success(mocker):
     assert data.time == (now + timedelta(days=1)).strftime("%H:%M")
 
 
-def test_fomc_next_none(mocker):
+@pytest.mark.asyncio
+async def test_fomc_next_none(mocker):
     FOMC_NEXT_CACHE.clear()
+    FOMC_EVENTS_CACHE.clear()
     now = datetime.utcnow()
     past = (now - timedelta(days=1)).strftime("%Y-%m-%dT%H:%M:%SZ")
     xml = f"<rss><channel><item><title>Past</title><link>x</link><start>{past}</start></item></channel></rss>"
-    mocker.patch("requests.get", return_value=_mock_response(mocker, xml))
+    _mock_stream(mocker, xml)
 
-    data = fetch_fomc_next()
+    data = await fetch_fomc_next()
 
     assert data is None
 
 
-def test_fomc_next_error(mocker):
+@pytest.mark.asyncio
+async def test_fomc_next_error(mocker):
     FOMC_NEXT_CACHE.clear()
-    mocker.patch("requests.get", side_effect=requests.RequestException)
+    FOMC_EVENTS_CACHE.clear()
+    mocker.patch("app.upstream.stream", side_effect=httpx.ConnectError("down"))
     with pytest.raises(RuntimeError):
-        fetch_fomc_next()
+        await fetch_fomc_next()
 
 
-def test_fomc_next_parse_error(mocker):
+@pytest.mark.asyncio
+async def test_fomc_next_parse_error(mocker):
     FOMC_NEXT_CACHE.clear()
+    FOMC_EVENTS_CACHE.clear()
     xml = "<rss><channel><item>"
-    mocker.patch("requests.get", return_value=_mock_response(mocker, xml))
+    _mock_stream(mocker, xml)
     with pytest.raises(RuntimeError):
-        fetch_fomc_next()
+        await fetch_fomc_next()
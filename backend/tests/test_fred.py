@@ -1,8 +1,22 @@
-import requests
-import pytest
+import time
 
-from app.crud import fetch_fed_rate, fetch_vix, FRED_RATE_CACHE, VIX_CACHE
+import httpx
+import pytest
+from httpx import AsyncClient, ASGITransport
+
+from app.cache import CacheEntry
+from app.crud import (
+    fetch_fed_rate,
+    fetch_vix,
+    FRED_RATE_CACHE,
+    VIX_CACHE,
+    FRED_FETCHERS,
+    FRED_SERIES,
+    REFRESH_TARGETS,
+)
 from app.config import settings
+from app.main import app
+from app.schemas import FredObservation
 
 
 def _mock_response(mocker, payload):
@@ -12,60 +26,122 @@ def _mock_response(mocker, payload):
     return resp
 
 
-def test_fed_rate_success(mocker):
+@pytest.mark.asyncio
+async def test_fed_rate_success(mocker):
     FRED_RATE_CACHE.clear()
-    mock_get = mocker.patch("requests.get")
+    mock_get = mocker.patch("app.upstream.get")
     payload = {"observations": [{"value": "5.0", "date": "2024-06-13"}]}
     mock_get.return_value = _mock_response(mocker, payload)
     mocker.patch.object(settings, "fred_api_key", "KEY")
 
-    data = fetch_fed_rate()
+    data = await fetch_fed_rate()
 
     assert data.value == 5.0
     assert data.date == "2024-06-13"
     assert data.source == "FRED"
 
 
-def test_fed_rate_no_key(mocker):
+@pytest.mark.asyncio
+async def test_fed_rate_no_key(mocker):
     FRED_RATE_CACHE.clear()
     mocker.patch.object(settings, "fred_api_key", None)
     with pytest.raises(RuntimeError):
-        fetch_fed_rate()
+        await fetch_fed_rate()
 
 
-def test_fed_rate_unavailable(mocker):
+@pytest.mark.asyncio
+async def test_fed_rate_unavailable(mocker):
     FRED_RATE_CACHE.clear()
     mocker.patch.object(settings, "fred_api_key", "KEY")
-    mocker.patch("requests.get", side_effect=requests.RequestException)
+    mocker.patch("app.upstream.get", side_effect=httpx.ConnectError("down"))
     with pytest.raises(RuntimeError):
-        fetch_fed_rate()
+        await fetch_fed_rate()
 
 
-def test_vix_success(mocker):
+@pytest.mark.asyncio
+async def test_vix_success(mocker):
     VIX_CACHE.clear()
-    mock_get = mocker.patch("requests.get")
+    mock_get = mocker.patch("app.upstream.get")
     payload = {"observations": [{"value": "15.5", "date": "2024-06-14"}]}
     mock_get.return_value = _mock_response(mocker, payload)
     mocker.patch.object(settings, "fred_api_key", "KEY")
 
-    data = fetch_vix()
+    data = await fetch_vix()
 
     assert data.value == 15.5
     assert data.date == "2024-06-14"
     assert data.source == "FRED"
 
 
-def test_vix_no_key(mocker):
+@pytest.mark.asyncio
+async def test_vix_no_key(mocker):
     VIX_CACHE.clear()
     mocker.patch.object(settings, "fred_api_key", None)
     with pytest.raises(RuntimeError):
-        fetch_vix()
+        await fetch_vix()
 
 
-def test_vix_unavailable(mocker):
+@pytest.mark.asyncio
+async def test_vix_unavailable(mocker):
     VIX_CACHE.clear()
     mocker.patch.object(settings, "fred_api_key", "KEY")
-    mocker.patch("requests.get", side_effect=requests.RequestException)
+    mocker.patch("app.upstream.get", side_effect=httpx.ConnectError("down"))
     with pytest.raises(RuntimeError):
-        fetch_vix()
+        await fetch_vix()
+
 
+
+@pytest.mark.asyncio
+async def test_registered_series_uses_generic_path(mocker):
+    fetcher = FRED_FETCHERS["DFII10"]
+    fetcher.cache_clear()
+    mock_get = mocker.patch("app.upstream.get")
+    payload = {
+        "observations": [
+            {"value": ".", "date": "2024-06-14"},
+            {"value": "2.1", "date": "2024-06-13"},
+        ]
+    }
+    mock_get.return_value = _mock_response(mocker, payload)
+    mocker.patch.object(settings, "fred_api_key", "KEY")
+
+    data = await fetcher()
+
+    assert data.series_id == "DFII10"
+    assert data.value == 2.1
+    assert data.date == "2024-06-13"
+    assert data.unit == "%"
+    assert mock_get.call_args.kwargs["params"]["series_id"] == "DFII10"
+
+
+def test_every_registered_series_has_a_fetcher():
+    assert set(FRED_FETCHERS) == set(FRED_SERIES)
+    assert FRED_FETCHERS["FEDFUNDS"] is fetch_fed_rate
+    assert FRED_FETCHERS["M2SL"].cache.ttl == FRED_SERIES["M2SL"].ttl
+
+
+def test_refresh_targets_include_each_fetcher_once():
+    funcs = list(REFRESH_TARGETS.values())
+    assert len(funcs) == len(set(funcs))
+    assert FRED_FETCHERS["T10YIE"] in funcs
+    assert fetch_vix in funcs
+
+
+@pytest.mark.asyncio
+async def test_api_fred_series(mocker):
+    payload = FredObservation(
+        series_id="T10YIE", value=2.3, unit="%", date="2024-06-14"
+    )
+    mocker.patch.object(
+        FRED_FETCHERS["T10YIE"],
+        "cache_entry",
+        mocker.AsyncMock(return_value=CacheEntry(payload, time.time())),
+    )
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        resp = await ac.get("/api/v1/fred/t10yie")
+        missing = await ac.get("/api/v1/fred/UNKNOWN")
+    assert resp.status_code == 200
+    assert resp.json()["series_id"] == "T10YIE"
+    assert "etag" in resp.headers
+    assert missing.status_code == 404
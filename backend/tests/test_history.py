@@ -0,0 +1,140 @@
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+from httpx import AsyncClient, ASGITransport
+
+from app import history
+from app.config import settings
+from app.crud import FRED_RATE_CACHE, fetch_fed_rate, read_history
+from app.history import HistoryStore, downsample, observation_time
+from app.main import app
+
+
+def _ts(day):
+    return datetime.fromisoformat(day).replace(tzinfo=timezone.utc)
+
+
+def test_observation_time():
+    assert observation_time("2024-06") == _ts("2024-06-01").timestamp()
+    assert observation_time("2024-06-13") == _ts("2024-06-13").timestamp()
+
+
+def test_append_merges_sorts_and_revises(tmp_path):
+    store = HistoryStore(str(tmp_path))
+
+    assert store.append("CPI", [(2.0, 20.0), (1.0, 10.0)]) == 2
+    assert store.append("CPI", [(2.0, 21.0), (3.0, 30.0)]) == 3
+
+    data = store.read("CPI")
+    assert data["t"].tolist() == [1.0, 2.0, 3.0]
+    assert data["v"].tolist() == [10.0, 21.0, 30.0]
+    assert store.read("CPI", start=2.0, end=3.0)["v"].tolist() == [21.0]
+    assert store.series() == ["CPI"]
+    assert len(store.read("NFP")) == 0
+
+
+def test_unchanged_append_does_not_rewrite(tmp_path, mocker):
+    store = HistoryStore(str(tmp_path))
+    store.append("CPI", [(1.0, 10.0)])
+    replace = mocker.patch("app.history.os.replace")
+
+    store.append("CPI", [(1.0, 10.0)])
+
+    replace.assert_not_called()
+
+
+def test_reads_are_memory_mapped_and_see_other_writers(tmp_path):
+    reader = HistoryStore(str(tmp_path))
+    writer = HistoryStore(str(tmp_path))
+    writer.append("CPI", [(1.0, 10.0)])
+
+    assert isinstance(reader.read("CPI").base, np.memmap)
+    writer.append("CPI", [(2.0, 20.0)])
+    assert len(reader.read("CPI")) == 2
+
+
+def test_invalid_series_name(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    with pytest.raises(ValueError):
+        store.read("../etc/passwd")
+    store.record("../x", [(1.0, 1.0)])  # logged, not raised
+
+
+def test_downsample_averages_buckets():
+    data = np.array([(t, t * 10) for t in range(10)], dtype=history.POINT)
+
+    out = downsample(data, 3)
+
+    assert out["t"].tolist() == [0.0, 3.0, 6.0]
+    assert out["v"].tolist() == [10.0, 40.0, 75.0]
+    assert downsample(data, 20) is data
+
+
+def test_read_history_aliases_and_range():
+    history.get_store().append(
+        "FEDFUNDS",
+        [(_ts(day).timestamp(), v) for day, v in (
+            ("2024-01-01", 5.0), ("2024-02-01", 5.25), ("2024-03-01", 5.5)
+        )],
+    )
+
+    result = read_history("fed_rate", start=datetime(2024, 2, 1))
+
+    assert result.indicator == "FEDFUNDS"
+    assert [p.value for p in result.points] == [5.25, 5.5]
+    assert read_history("fedfunds", points=1).points[0].value == 5.25
+    assert read_history("NOPE") is None
+    assert read_history("../x") is None
+
+
+@pytest.mark.asyncio
+async def test_fetchers_record_history(mocker):
+    FRED_RATE_CACHE.clear()
+    mocker.patch.object(settings, "fred_api_key", "KEY")
+    resp = mocker.Mock()
+    resp.json.return_value = {
+        "observations": [
+            {"date": "2024-06-01", "value": "5.33"},
+            {"date": "2024-05-01", "value": "."},
+            {"date": "2024-04-01", "value": "5.30"},
+        ]
+    }
+    mocker.patch("app.upstream.get", return_value=resp)
+
+    await fetch_fed_rate()
+
+    data = history.get_store().read("FEDFUNDS")
+    assert data["v"].tolist() == [5.30, 5.33]
+
+
+@pytest.mark.asyncio
+async def test_unusable_history_path_does_not_fail_fetch(tmp_path, mocker):
+    FRED_RATE_CACHE.clear()
+    blocker = tmp_path / "blocker"
+    blocker.write_text("")
+    mocker.patch.object(settings, "history_path", str(blocker / "history"))
+    mocker.patch.object(settings, "fred_api_key", "KEY")
+    resp = mocker.Mock()
+    resp.json.return_value = {
+        "observations": [{"date": "2024-06-01", "value": "5.33"}]
+    }
+    mocker.patch("app.upstream.get", return_value=resp)
+
+    assert (await fetch_fed_rate()).value == 5.33
+
+
+@pytest.mark.asyncio
+async def test_api_history():
+    history.get_store().append("CPI", [(_ts("2024-06-01").timestamp(), 1)])
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as ac:
+        ok = await ac.get(
+            "/api/v1/history/cpi", params={"from": "2024-01-01", "points": 5}
+        )
+        missing = await ac.get("/api/v1/history/gold")
+
+    assert ok.status_code == 200
+    assert ok.json()["points"][0]["value"] == 1.0
+    assert missing.status_code == 404
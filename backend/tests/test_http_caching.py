@@ -0,0 +1,110 @@
+import time
+from dataclasses import replace
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from httpx import AsyncClient, ASGITransport
+
+from app.cache import CacheEntry
+from app.main import app
+from app.responses import cache_headers, entry_body, etag, etag_matches
+from app.schemas import FedRate
+
+
+def test_etag_is_stable_and_content_based():
+    first = etag(FedRate(value=5.0, date="2024-06-13"))
+    assert first == etag(FedRate(value=5.0, date="2024-06-13"))
+    assert first != etag(FedRate(value=5.25, date="2024-06-13"))
+    assert first.startswith('"') and first.endswith('"')
+    assert etag(None) != first
+
+
+def test_etag_matches():
+    tag = '"abc"'
+    assert etag_matches('"abc"', tag)
+    assert etag_matches('"x", W/"abc"', tag)
+    assert etag_matches("*", tag)
+    assert not etag_matches('"x"', tag)
+    assert not etag_matches(None, tag)
+
+
+def test_cache_headers_max_age_from_remaining_ttl():
+    entry = CacheEntry(None, time.time() - 100)
+    headers = cache_headers(entry, ttl=300)
+    assert headers["Cache-Control"] in ("public, max-age=199", "public, max-age=200")
+    assert headers["Last-Modified"].endswith("GMT")
+    expired = cache_headers(CacheEntry(None, time.time() - 1000), ttl=300)
+    assert expired["Cache-Control"] == "public, max-age=0"
+
+
+@pytest.mark.asyncio
+async def test_api_conditional_get(mocker):
+    payload = FedRate(value=5.0, date="2024-06-13")
+    mocker.patch(
+        "app.main.fetch_fed_rate.cache_entry",
+        return_value=CacheEntry(payload, time.time()),
+    )
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        first = await ac.get("/api/v1/fed_rate")
+        tag = first.headers["etag"]
+        second = await ac.get(
+            "/api/v1/fed_rate", headers={"If-None-Match": tag}
+        )
+        stale = await ac.get(
+            "/api/v1/fed_rate", headers={"If-None-Match": '"other"'}
+        )
+
+    assert first.status_code == 200
+    assert first.headers["cache-control"].startswith("public, max-age=")
+    assert "last-modified" in first.headers
+    assert second.status_code == 304
+    assert second.content == b""
+    assert second.headers["etag"] == tag
+    assert stale.status_code == 200
+    assert stale.json()["value"] == 5.0
+
+
+@pytest.mark.asyncio
+async def test_api_conditional_get_nullable(mocker):
+    mocker.patch(
+        "app.main.fetch_fomc_next.cache_entry",
+        return_value=CacheEntry(None, time.time()),
+    )
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        first = await ac.get("/api/v1/fomc_next")
+        second = await ac.get(
+            "/api/v1/fomc_next",
+            headers={"If-None-Match": first.headers["etag"]},
+        )
+    assert first.status_code == 200
+    assert first.json() is None
+    assert second.status_code == 304
+
+
+@pytest.mark.asyncio
+async def test_api_serves_body_encoded_once(mocker):
+    payload = FedRate(value=5.0, date="2024-06-13")
+    entry = replace(CacheEntry(payload, time.time()), stale=True)
+    assert entry.body == payload.model_dump_json().encode()
+    mocker.patch("app.main.fetch_fed_rate.cache_entry", return_value=entry)
+    dump = mocker.spy(FedRate, "model_dump_json")
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        first = await ac.get("/api/v1/fed_rate")
+        second = await ac.get("/api/v1/fed_rate")
+
+    assert dump.call_count == 0
+    assert first.content == second.content == entry.body
+    assert first.headers["content-type"] == "application/json"
+    assert first.json() == jsonable_encoder(payload)
+
+
+def test_entry_body_of_entry_stored_without_body():
+    payload = FedRate(value=5.0, date="2024-06-13")
+    entry = CacheEntry(payload, time.time())
+    object.__setattr__(entry, "body", None)
+
+    assert entry_body(entry) == payload.model_dump_json().encode()
+    assert CacheEntry({"x": 1}, time.time()).body is None
@@ -1,8 +1,20 @@
-import requests
+import asyncio
+
+import httpx
 
 import pytest
 
-from app.crud import fetch_latest_macro, MACRO_CACHE
+from app import history
+from app.config import settings
+from app.crud import (
+    fetch_latest_macro,
+    fetch_bls_series,
+    refresh_bls_series,
+    MACRO_CACHE,
+    BLS_SERIES_CACHE,
+    BLS_CPI_SERIES,
+    BLS_NFP_SERIES,
+)
 
 
 def _mock_response(mocker, payload):
@@ -12,35 +24,143 @@ def _mock_response(mocker, payload):
     return resp
 
 
-def test_latest_macro_success(mocker):
-    """Return the most recent between CPI and NFP."""
+def _bls_payload(cpi_period="M05", nfp_period="M06"):
+    return {
+        "status": "REQUEST_SUCCEEDED",
+        "Results": {
+            "series": [
+                {
+                    "seriesID": BLS_CPI_SERIES,
+                    "data": [
+                        {"year": "2024", "period": cpi_period, "value": "310"},
+                        {"year": "2024", "period": "M04", "value": "309"},
+                    ],
+                },
+                {
+                    "seriesID": BLS_NFP_SERIES,
+                    "data": [
+                        {"year": "2024", "period": nfp_period, "value": "150000"}
+                    ],
+                },
+            ]
+        },
+    }
+
+
+@pytest.fixture(autouse=True)
+def _clear_caches():
     MACRO_CACHE.clear()
-    mock_get = mocker.patch("requests.get")
+    BLS_SERIES_CACHE.clear()
 
-    cpi_payload = {
-        "Results": {"series": [{"data": [{"year": "2024", "period": "M05", "value": "310"}]}]}
-    }
-    nfp_payload = {
-        "Results": {"series": [{"data": [{"year": "2024", "period": "M06", "value": "150000"}]}]}
-    }
 
-    mock_get.side_effect = [
-        _mock_response(mocker, cpi_payload),
-        _mock_response(mocker, nfp_payload),
-    ]
+@pytest.mark.asyncio
+async def test_latest_macro_success(mocker):
+    """Return the most recent between CPI and NFP."""
+    mock_post = mocker.patch("app.upstream.post")
+    mock_post.return_value = _mock_response(mocker, _bls_payload())
 
-    data = fetch_latest_macro()
+    data = await fetch_latest_macro()
 
     assert data.latest_macro.name == "NFP"
     assert data.latest_macro.date == "2024-06"
     assert data.latest_macro.unit == "k jobs"
 
 
-def test_latest_macro_unavailable(mocker):
+@pytest.mark.asyncio
+async def test_latest_macro_skips_unpublished_months(mocker):
+    payload = _bls_payload()
+    cpi = payload["Results"]["series"][0]["data"]
+    cpi.append({"year": "2023", "period": "M10", "value": "-"})
+    mocker.patch(
+        "app.upstream.post", return_value=_mock_response(mocker, payload)
+    )
+
+    data = await fetch_latest_macro()
+
+    assert data.latest_macro.name == "NFP"
+    assert history.get_store().read("CPI")["v"].tolist() == [309, 310]
+
+
+@pytest.mark.asyncio
+async def test_latest_macro_unavailable(mocker):
     """Any request error should bubble up as RuntimeError."""
-    MACRO_CACHE.clear()
-    mock_get = mocker.patch("requests.get", side_effect=requests.RequestException)
+    mocker.patch("app.upstream.post", side_effect=httpx.ConnectError("down"))
 
     with pytest.raises(RuntimeError):
-        fetch_latest_macro()
+        await fetch_latest_macro()
+
+
+@pytest.mark.asyncio
+async def test_bls_series_fetched_in_one_request(mocker):
+    mocker.patch.object(settings, "bls_api_key", "KEY")
+    mock_post = mocker.patch("app.upstream.post")
+    mock_post.return_value = _mock_response(mocker, _bls_payload())
+
+    await fetch_latest_macro()
+
+    assert mock_post.await_count == 1
+    payload = mock_post.call_args.kwargs["json"]
+    assert set(payload["seriesid"]) == {BLS_CPI_SERIES, BLS_NFP_SERIES}
+    assert payload["registrationkey"] == "KEY"
+    assert BLS_SERIES_CACHE[BLS_CPI_SERIES].value.value == 310
+    assert BLS_SERIES_CACHE[BLS_NFP_SERIES].value.name == "NFP"
+
+
+@pytest.mark.asyncio
+async def test_bls_request_is_urgent_after_release(mocker):
+    near = mocker.patch("app.crud.near_release", return_value=True)
+    mock_post = mocker.patch("app.upstream.post")
+    mock_post.return_value = _mock_response(mocker, _bls_payload())
+
+    await refresh_bls_series()
+
+    assert mock_post.call_args.kwargs["urgent"] is True
+    assert set(near.call_args.args[0]) == {"CPI", "NFP"}
+
+
+@pytest.mark.asyncio
+async def test_fetch_bls_series_uses_per_series_cache(mocker):
+    mock_post = mocker.patch("app.upstream.post")
+    mock_post.return_value = _mock_response(mocker, _bls_payload())
+
+    first = await fetch_bls_series(BLS_CPI_SERIES)
+    second = await fetch_bls_series(BLS_CPI_SERIES, BLS_NFP_SERIES)
+
+    assert first[BLS_CPI_SERIES].date == "2024-05"
+    assert second[BLS_NFP_SERIES].date == "2024-06"
+    assert mock_post.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_bls_refreshes_share_one_request(mocker):
+    mock_post = mocker.patch("app.upstream.post")
+    mock_post.return_value = _mock_response(mocker, _bls_payload())
+
+    await asyncio.gather(refresh_bls_series(), refresh_bls_series())
+
+    assert mock_post.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_bls_request_not_processed(mocker):
+    payload = {"status": "REQUEST_NOT_PROCESSED", "message": ["quota"]}
+    mocker.patch(
+        "app.upstream.post", return_value=_mock_response(mocker, payload)
+    )
+
+    with pytest.raises(RuntimeError):
+        await fetch_latest_macro()
+    assert len(BLS_SERIES_CACHE) == 0
+
+
+@pytest.mark.asyncio
+async def test_macro_entries_expire_at_next_release(mocker):
+    expiry = mocker.patch("app.crud.release_expiry", return_value=1e10)
+    mock_post = mocker.patch("app.upstream.post")
+    mock_post.return_value = _mock_response(mocker, _bls_payload())
+
+    entry = await fetch_latest_macro.cache_entry()
 
+    assert entry.expires_at == 1e10
+    assert BLS_SERIES_CACHE[BLS_CPI_SERIES].expires_at == 1e10
+    expiry.assert_called_with({"CPI": "2024-05", "NFP": "2024-06"})
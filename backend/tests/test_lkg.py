@@ -0,0 +1,199 @@
+import asyncio
+import time
+
+import fakeredis
+import pytest
+
+from app import lkg
+from app.cache import (
+    CacheEntry,
+    MemoryCache,
+    RedisCache,
+    SQLiteCache,
+    cached,
+)
+from app.config import settings
+from app.crud import _dashboard_item
+from app.responses import cache_headers
+from app.schemas import FedRate
+
+
+def _rate(value):
+    return FedRate(value=value, date="2024-06-13")
+
+
+def _fetcher(cache, results):
+    it = iter(results)
+
+    @cached(cache)
+    async def fetch():
+        result = next(it)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    return fetch
+
+
+def test_store_roundtrip(tmp_path):
+    store = lkg.LastKnownGoodStore(str(tmp_path / "lkg.sqlite3"))
+    entry = CacheEntry(_rate(5.0), 123.0)
+
+    store.save("fed_rate", (), entry)
+
+    assert store.get("fed_rate", ()) == entry
+    assert store.get("vix", ()) is None
+    assert store.load("fed_rate") == {(): entry}
+    store.close()
+    store.save("fed_rate", (), entry)  # logged, not raised
+    assert store.get("fed_rate", ()) is None
+    assert store.load("fed_rate") == {}
+
+
+def test_get_store_follows_settings(mocker):
+    assert lkg.get_store() is lkg.get_store()
+    mocker.patch.object(settings, "lkg_enabled", False)
+    assert lkg.get_store() is None
+
+
+@pytest.mark.asyncio
+async def test_unavailable_store_does_not_fail_fetches(tmp_path, mocker):
+    path = str(tmp_path / "missing" / "lkg.sqlite3")
+    mocker.patch.object(settings, "lkg_path", path)
+    fetch = _fetcher(
+        MemoryCache(maxsize=1, ttl=100, name="fed_rate"), [_rate(5.0)]
+    )
+
+    assert fetch.cache_warm() == 0
+    assert (await fetch()).value == 5.0
+    assert lkg.get_store() is None
+
+
+@pytest.mark.asyncio
+async def test_failed_miss_serves_last_known_good():
+    fetch = _fetcher(
+        MemoryCache(maxsize=1, ttl=100, name="fed_rate"),
+        [_rate(5.0), RuntimeError("down")],
+    )
+    await fetch()
+    fetch.cache_clear()
+
+    entry = await fetch.cache_entry()
+
+    assert entry.value.value == 5.0
+    assert entry.stale
+    assert entry.expires_at == pytest.approx(
+        time.time() + settings.stale_ttl, abs=1
+    )
+    assert fetch.cache_peek() is entry
+
+
+@pytest.mark.asyncio
+async def test_failed_miss_without_history_raises():
+    fetch = _fetcher(
+        MemoryCache(maxsize=1, ttl=100, name="fed_rate"),
+        [RuntimeError("down")],
+    )
+    with pytest.raises(RuntimeError):
+        await fetch()
+
+
+@pytest.mark.asyncio
+async def test_failed_refresh_keeps_cached_entry():
+    fetch = _fetcher(
+        MemoryCache(maxsize=1, ttl=100, name="fed_rate"),
+        [_rate(5.0), RuntimeError("down")],
+    )
+    first = await fetch.cache_entry()
+
+    with pytest.raises(RuntimeError):
+        await fetch.cache_refresh()
+
+    assert fetch.cache_peek() == first
+
+
+@pytest.mark.asyncio
+async def test_miss_coalesced_onto_failed_refresh_serves_last_known_good():
+    release = asyncio.Event()
+    calls = 0
+
+    @cached(MemoryCache(maxsize=1, ttl=100, name="fed_rate"))
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            return _rate(5.0)
+        await release.wait()
+        raise RuntimeError("down")
+
+    await fetch()
+    fetch.cache_clear()
+    refresh = asyncio.create_task(fetch.cache_refresh())
+    await asyncio.sleep(0)
+    miss = asyncio.create_task(fetch.cache_entry())
+    await asyncio.sleep(0)
+    release.set()
+
+    with pytest.raises(RuntimeError):
+        await refresh
+    entry = await miss
+
+    assert calls == 2
+    assert entry.value.value == 5.0
+    assert entry.stale
+
+
+def test_warm_start_restores_fresh_and_stale_entries():
+    store = lkg.get_store()
+    now = time.time()
+    store.save("fed_rate", ("fresh",), CacheEntry(_rate(5.0), now - 10))
+    store.save("fed_rate", ("old",), CacheEntry(_rate(4.0), now - 1000))
+    cache = MemoryCache(maxsize=4, ttl=100, name="fed_rate")
+    cache[("fresh",)] = CacheEntry(_rate(5.25), now)
+    fetch = _fetcher(cache, [])
+
+    assert fetch.cache_warm() == 1
+    assert fetch.cache_peek("fresh").value.value == 5.25
+    old = fetch.cache_peek("old")
+    assert old.stale and old.value.value == 4.0
+
+
+def test_warm_start_needs_named_cache(mocker):
+    from cachetools import TTLCache
+
+    assert _fetcher(TTLCache(maxsize=1, ttl=10), []).cache_warm() == 0
+    mocker.patch.object(settings, "lkg_enabled", False)
+    cache = MemoryCache(maxsize=1, ttl=10, name="fed_rate")
+    assert _fetcher(cache, []).cache_warm() == 0
+
+
+def test_backends_honour_entry_expiry(tmp_path):
+    now = time.time()
+    expired = CacheEntry(1, now - 10, expires_at=now - 1)
+    memory = MemoryCache(maxsize=1, ttl=100)
+    sqlite = SQLiteCache(str(tmp_path / "c.sqlite3"), "x", ttl=100)
+    for cache in (memory, sqlite):
+        cache["k"] = expired
+        with pytest.raises(KeyError):
+            cache["k"]
+
+    client = fakeredis.FakeRedis()
+    RedisCache(client, "x", ttl=100)["k"] = CacheEntry(1, now, False, now + 1)
+    assert 0 < client.pttl("goldapp:cache:x:'k'") <= 1000
+
+
+def test_stale_entry_headers_and_dashboard_item():
+    now = time.time()
+    entry = CacheEntry(_rate(5.0), now - 1000, True, now + 60)
+
+    headers = cache_headers(entry, ttl=300)
+    item = _dashboard_item(entry)
+
+    assert headers["Cache-Control"] in (
+        "public, max-age=59",
+        "public, max-age=60",
+    )
+    assert headers["X-Data-Stale"] == "true"
+    assert int(headers["X-Data-Age"]) >= 1000
+    assert item.stale and item.status == "ok"
+    assert "X-Data-Stale" not in cache_headers(CacheEntry(None, now), 300)
@@ -1,8 +1,13 @@
+import time
+from unittest import mock
+
 import pytest
-from app.crud import fetch_market_indices, CACHE
+from app.config import settings
+from app.crud import fetch_market_indices, fetch_quotes, CACHE
 
 
-def test_market_values_positive(mocker):
+@pytest.mark.asyncio
+async def test_market_values_positive(mocker):
     """fetch_market_indices should aggregate mocked yfinance data"""
     CACHE.clear()
     mock_ticker = mocker.patch("yfinance.Ticker")
@@ -11,16 +16,81 @@ def test_market_values_positive(mocker):
         "last_volume": 1_000_000,
     }
 
-    data = fetch_market_indices()
+    data = await fetch_market_indices()
 
     assert data.dxy_proxy_uup.value == 100
     assert data.volume_aggregated.value == 2_000_000
 
 
-def test_market_indices_error(mocker):
+@pytest.mark.asyncio
+async def test_market_indices_error(mocker):
     """Any yfinance issue should raise RuntimeError and clear cache."""
     CACHE.clear()
     mocker.patch("yfinance.Ticker", side_effect=Exception)
     with pytest.raises(RuntimeError):
-        fetch_market_indices()
+        await fetch_market_indices()
     assert len(CACHE) == 0
+
+
+def _ticker_with(values, delay=0.0):
+    def make(symbol):
+        if delay:
+            time.sleep(delay)
+        if isinstance(values.get(symbol), Exception):
+            raise values[symbol]
+        ticker = mock.Mock()
+        ticker.fast_info = {"last_price": values.get(symbol), "last_volume": values.get(symbol)}
+        return ticker
+
+    return make
+
+
+@pytest.mark.asyncio
+async def test_quotes_fetched_concurrently(mocker):
+    mocker.patch(
+        "yfinance.Ticker",
+        side_effect=_ticker_with({"UUP": 1, "SPY": 2, "QQQ": 3}, delay=0.2),
+    )
+
+    start = time.monotonic()
+    quotes = await fetch_quotes(
+        {"UUP": "last_price", "SPY": "last_volume", "QQQ": "last_volume"}
+    )
+
+    assert quotes == {"UUP": 1.0, "SPY": 2.0, "QQQ": 3.0}
+    assert time.monotonic() - start < 0.5
+
+
+@pytest.mark.asyncio
+async def test_quotes_partial_results(mocker):
+    mocker.patch(
+        "yfinance.Ticker",
+        side_effect=_ticker_with({"UUP": 1, "SPY": RuntimeError(), "QQQ": None}),
+    )
+
+    quotes = await fetch_quotes(
+        {"UUP": "last_price", "SPY": "last_volume", "QQQ": "last_volume"}
+    )
+
+    assert quotes == {"UUP": 1.0}
+
+
+@pytest.mark.asyncio
+async def test_quotes_per_symbol_timeout(mocker):
+    mocker.patch.object(settings, "quote_timeout", 0.05)
+    mocker.patch("yfinance.Ticker", side_effect=_ticker_with({"UUP": 1}, 0.2))
+
+    quotes = await fetch_quotes({"UUP": "last_price"})
+
+    assert quotes == {}
+
+
+@pytest.mark.asyncio
+async def test_market_indices_missing_volume_symbol(mocker):
+    CACHE.clear()
+    mocker.patch(
+        "yfinance.Ticker",
+        side_effect=_ticker_with({"UUP": 1, "SPY": 2, "QQQ": RuntimeError()}),
+    )
+    with pytest.raises(RuntimeError):
+        await fetch_market_indices()
@@ -0,0 +1,139 @@
+import asyncio
+
+import httpx
+import pytest
+from cachetools import TTLCache
+from httpx import AsyncClient, ASGITransport
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app import metrics, upstream
+from app.cache import cached
+from app.main import app
+from app.warmup import WarmupReport
+
+
+def _value(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@pytest.mark.asyncio
+async def test_cache_hits_misses_and_errors_are_counted():
+    results = iter([1, RuntimeError("down")])
+
+    @cached(TTLCache(maxsize=1, ttl=100))
+    async def metered():
+        result = next(results)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    labels = {"cache": "metered"}
+    hits = _value("goldapp_cache_requests_total", result="hit", **labels)
+    misses = _value("goldapp_cache_requests_total", result="miss", **labels)
+
+    await metered()
+    await metered()
+    metered.cache_clear()
+    with pytest.raises(RuntimeError):
+        await metered()
+
+    assert _value(
+        "goldapp_cache_requests_total", result="hit", **labels
+    ) == hits + 1
+    assert _value(
+        "goldapp_cache_requests_total", result="miss", **labels
+    ) == misses + 2
+    assert _value(
+        "goldapp_fetch_errors_total", exception="RuntimeError", **labels
+    ) >= 1
+    assert _value("goldapp_fetches_in_progress", **labels) == 0
+
+
+@pytest.mark.asyncio
+async def test_coalesced_fetches_are_counted():
+    release = asyncio.Event()
+
+    @cached(TTLCache(maxsize=1, ttl=100))
+    async def coalesced():
+        await release.wait()
+        return 1
+
+    labels = {"cache": "coalesced"}
+    executions = _value("goldapp_fetch_executions_total", **labels)
+    waiters = _value("goldapp_fetch_coalesced_total", **labels)
+
+    tasks = [asyncio.ensure_future(coalesced()) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(*tasks)
+
+    assert _value(
+        "goldapp_fetch_executions_total", **labels
+    ) == executions + 1
+    assert _value(
+        "goldapp_fetch_coalesced_total", **labels
+    ) == waiters + 2
+
+
+@pytest.mark.asyncio
+async def test_upstream_latency_and_errors(mocker):
+    url = "https://api.example.com/data"
+    host = {"upstream": "api.example.com"}
+    mocker.patch.object(upstream.settings, "upstream_retries", 0)
+    client = upstream.get_client(url)
+    mocker.patch.object(
+        client, "get", return_value=httpx.Response(500)
+    )
+    count = _value("goldapp_upstream_request_seconds_count", **host)
+
+    await upstream.get(url)
+    mocker.patch.object(client, "post", side_effect=httpx.ConnectError("x"))
+    with pytest.raises(httpx.ConnectError):
+        await upstream.post(url)
+
+    assert _value("goldapp_upstream_request_seconds_count", **host) == (
+        count + 2
+    )
+    assert _value(
+        "goldapp_upstream_errors_total", exception="HTTP 500", **host
+    ) >= 1
+    assert _value(
+        "goldapp_upstream_errors_total", exception="ConnectError", **host
+    ) >= 1
+    await upstream.aclose()
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_and_route_latency(mocker):
+    mocker.patch("app.main.read_history", return_value=None)
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as ac:
+        await ac.get("/api/v1/history/gold")
+        resp = await ac.get("/metrics")
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    assert (
+        'goldapp_http_request_seconds_count{method="GET",'
+        'route="/api/v1/history/{indicator}",status="404"}'
+    ) in resp.text
+
+
+def test_render_aggregates_workers(tmp_path, monkeypatch):
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    payload, content_type = metrics.render()
+    assert isinstance(payload, bytes)
+    assert content_type.startswith("text/plain")
+
+
+def test_startup_time_is_recorded(mocker):
+    mocker.patch(
+        "app.main.warmup.prefetch", return_value=(WarmupReport(), set())
+    )
+    with TestClient(app):
+        ready = _value("goldapp_startup_seconds", phase="ready")
+        imported = _value("goldapp_startup_seconds", phase="import")
+
+    assert ready >= imported > 0
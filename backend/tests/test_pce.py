@@ -1,6 +1,7 @@
-import requests
+import httpx
 import pytest
 
+from app import history
 from app.crud import fetch_pce, PCE_CACHE
 from app.config import settings
 
@@ -12,16 +13,23 @@ def _mock_response(mocker, payload):
     return resp
 
 
-def test_pce_success(mocker):
+@pytest.mark.asyncio
+async def test_pce_success(mocker):
     """fetch_pce should return the most recent PCE value."""
     PCE_CACHE.clear()
-    mock_get = mocker.patch("requests.get")
+    mock_get = mocker.patch("app.upstream.get")
     payload = {
         "BEAAPI": {
             "Results": {
                 "Data": [
-                    {"TimePeriod": "2024M04", "DataValue": "0.2"},
-                    {"TimePeriod": "2024M05", "DataValue": "0.1"},
+                    {"LineNumber": "1", "TimePeriod": "2024M04",
+                     "DataValue": "0.2"},
+                    {"LineNumber": "1", "TimePeriod": "2024M05",
+                     "DataValue": "0.1"},
+                    {"LineNumber": "2", "TimePeriod": "2024M05",
+                     "DataValue": "-1.5"},
+                    {"LineNumber": "2", "TimePeriod": "2024M06",
+                     "DataValue": "2.4"},
                 ]
             }
         }
@@ -29,27 +37,30 @@ def test_pce_success(mocker):
     mock_get.return_value = _mock_response(mocker, payload)
     mocker.patch.object(settings, "bea_api_key", "KEY")
 
-    data = fetch_pce()
+    data = await fetch_pce()
 
     assert data.name == "PCE"
     assert data.value == 0.1
     assert data.date == "2024-05"
     assert data.unit == "%"
     assert data.source == "BEA"
+    assert history.get_store().read("PCE")["v"].tolist() == [0.2, 0.1]
 
 
-def test_pce_no_key(mocker):
+@pytest.mark.asyncio
+async def test_pce_no_key(mocker):
     """Missing API key should raise RuntimeError."""
     PCE_CACHE.clear()
     mocker.patch.object(settings, "bea_api_key", None)
     with pytest.raises(RuntimeError):
-        fetch_pce()
+        await fetch_pce()
 
 
-def test_pce_unavailable(mocker):
+@pytest.mark.asyncio
+async def test_pce_unavailable(mocker):
     """Network issues should bubble up as RuntimeError."""
     PCE_CACHE.clear()
     mocker.patch.object(settings, "bea_api_key", "KEY")
-    mocker.patch("requests.get", side_effect=requests.RequestException)
+    mocker.patch("app.upstream.get", side_effect=httpx.ConnectError("down"))
     with pytest.raises(RuntimeError):
-        fetch_pce()
+        await fetch_pce()
@@ -1,21 +1,30 @@
-import requests
+import httpx
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
 
 import pytest
 
-from app.crud import fetch_powell_speech, POWELL_SPEECH_CACHE
+from app.crud import fetch_powell_speech, POWELL_SPEECH_CACHE, POWELL_EVENTS_CACHE
 from app.schemas import PowellSpeech
 
 
-def _mock_response(mocker, text: str):
-    resp = mocker.Mock()
-    resp.text = text
-    resp.raise_for_status.return_value = None
-    return resp
+def _mock_stream(mocker, text: str, status_code: int = 200):
+    @asynccontextmanager
+    async def stream(url, headers=None):
+        yield httpx.Response(
+            status_code,
+            content=text.encode(),
+            headers={"ETag": '"v1"'},
+            request=httpx.Request("GET", url),
+        )
 
+    return mocker.patch("app.upstream.stream", side_effect=stream)
 
-def test_powell_speech_success(mocker):
+
+@pytest.mark.asyncio
+async def test_powell_speech_success(mocker):
     POWELL_SPEECH_CACHE.clear()
+    POWELL_EVENTS_CACHE.clear()
     now = datetime.utcnow()
     dt1 = (now + timedelta(days=1)).strftime("%a, %d %b %Y %H:%M:%S +0000")
     xml = (
@@ -23,9 +32,9 @@ def test_powell_speech_success(mocker):
         f"<item><title>Powell remarks</title><link>https://a</link><description>x</description><pubDate>{dt1}</pubDate></item>"
         "</channel></rss>"
     )
-    mocker.patch("requests.get", return_value=_mock_response(mocker, xml))
+    _mock_stream(mocker, xml)
 
-    data = fetch_powell_speech()
+    data = await fetch_powell_speech()
 
     assert isinstance(data, PowellSpeech)
     assert data.title == "Powell remarks"
@@ -34,8 +43,10 @@ def test_powell_speech_success(mocker):
     assert data.time == (now + timedelta(days=1)).strftime("%H:%M")
 
 
-def test_powell_speech_none(mocker):
+@pytest.mark.asyncio
+async def test_powell_speech_none(mocker):
     POWELL_SPEECH_CACHE.clear()
+    POWELL_EVENTS_CACHE.clear()
     now = datetime.utcnow()
     past = (now - timedelta(days=1)).strftime("%a, %d %b %Y %H:%M:%S +0000")
     xml = (
@@ -43,40 +54,46 @@ def test_powell_speech_none(mocker):
         f"<item><title>No powell</title><link>x</link><description></description><pubDate>{past}</pubDate></item>"
         "</channel></rss>"
     )
-    mocker.patch("requests.get", return_value=_mock_response(mocker, xml))
+    _mock_stream(mocker, xml)
 
-    data = fetch_powell_speech()
+    data = await fetch_powell_speech()
 
     assert data is None
 
 
-def test_powell_speech_error(mocker):
+@pytest.mark.asyncio
+async def test_powell_speech_error(mocker):
     POWELL_SPEECH_CACHE.clear()
-    mocker.patch("requests.get", side_effect=requests.RequestException)
+    POWELL_EVENTS_CACHE.clear()
+    mocker.patch("app.upstream.stream", side_effect=httpx.ConnectError("down"))
     with pytest.raises(RuntimeError):
-        fetch_powell_speech()
+        await fetch_powell_speech()
 
 
-def test_powell_speech_parse_error(mocker):
+@pytest.mark.asyncio
+async def test_powell_speech_parse_error(mocker):
     POWELL_SPEECH_CACHE.clear()
+    POWELL_EVENTS_CACHE.clear()
     xml = "<rss><channel><item>"
-    mocker.patch("requests.get", return_value=_mock_response(mocker, xml))
+    _mock_stream(mocker, xml)
     with pytest.raises(RuntimeError):
-        fetch_powell_speech()
+        await fetch_powell_speech()
 
 
-def test_powell_speech_cache(mocker):
+@pytest.mark.asyncio
+async def test_powell_speech_cache(mocker):
     POWELL_SPEECH_CACHE.clear()
+    POWELL_EVENTS_CACHE.clear()
     future = (datetime.utcnow() + timedelta(days=1)).strftime("%a, %d %b %Y %H:%M:%S +0000")
     xml = (
         "<rss><channel>"
         f"<item><title>Powell</title><link>u</link><description></description><pubDate>{future}</pubDate></item>"
         "</channel></rss>"
     )
-    mock_get = mocker.patch("requests.get", return_value=_mock_response(mocker, xml))
+    mock_get = _mock_stream(mocker, xml)
 
-    first = fetch_powell_speech()
-    second = fetch_powell_speech()
+    first = await fetch_powell_speech()
+    second = await fetch_powell_speech()
 
     assert first is second
     assert mock_get.call_count == 1
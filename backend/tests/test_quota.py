@@ -0,0 +1,104 @@
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app import quota
+from app.config import settings
+from app.main import app
+from app.quota import BLS_HOST, QuotaExceeded, get_bucket
+
+
+@pytest.fixture
+def clock(mocker):
+    now = [1000.0]
+    mocker.patch("app.quota.time.monotonic", side_effect=lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def no_bls_key(mocker):
+    mocker.patch.object(settings, "bls_api_key", None)
+
+
+def test_limits_depend_on_api_key(mocker, no_bls_key):
+    mocker.patch.object(settings, "fred_api_key", None)
+    assert get_bucket(BLS_HOST).limit.calls == 25
+    assert get_bucket(quota.FRED_HOST) is None
+
+    mocker.patch.object(settings, "bls_api_key", "key")
+    mocker.patch.object(settings, "quota_workers", 4)
+    bucket = get_bucket(BLS_HOST)
+    assert bucket.limit.calls == 125
+    assert bucket.keyed
+
+    mocker.patch.object(settings, "quota_enabled", False)
+    assert get_bucket(BLS_HOST) is None
+
+
+@pytest.mark.asyncio
+async def test_reserve_is_kept_for_urgent_calls(mocker, clock, no_bls_key):
+    mocker.patch.object(settings, "quota_reserve", 0.25)
+    bucket = get_bucket(BLS_HOST)
+    assert bucket.capacity == 3
+
+    await quota.acquire(BLS_HOST)
+    await quota.acquire(BLS_HOST)
+    with pytest.raises(QuotaExceeded) as exc:
+        await quota.acquire(BLS_HOST)
+    # 0.75 token short, refilled at 22 calls a day.
+    assert exc.value.retry_after == pytest.approx(0.75 * 86400 / 22)
+
+    await quota.acquire(BLS_HOST, urgent=True)
+    assert bucket.remaining() == 0
+
+
+@pytest.mark.asyncio
+async def test_acquire_waits_within_timeout(mocker, clock):
+    mocker.patch.object(settings, "fred_api_key", "key")
+    bucket = get_bucket(quota.FRED_HOST)
+    bucket.tokens = 0.0
+
+    sleep = mocker.patch("app.quota.asyncio.sleep")
+    await quota.acquire(quota.FRED_HOST, urgent=True, timeout=5)
+
+    sleep.assert_awaited_once_with(pytest.approx(60 / 108))
+    assert bucket.tokens == -1
+    with pytest.raises(QuotaExceeded):
+        await quota.acquire(quota.FRED_HOST, urgent=True, timeout=1)
+
+
+def test_retry_after_follows_causes():
+    try:
+        try:
+            raise QuotaExceeded("x", 120)
+        except QuotaExceeded as exc:
+            raise RuntimeError("BLS unavailable") from exc
+    except RuntimeError as exc:
+        assert quota.retry_after(exc) == 120
+    assert quota.retry_after(RuntimeError("down")) is None
+
+
+@pytest.mark.asyncio
+async def test_upstreams_endpoint_reports_quota(mocker, no_bls_key):
+    mocker.patch.object(settings, "bea_api_key", None)
+    mocker.patch.object(settings, "fred_api_key", None)
+    await quota.acquire(BLS_HOST)
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as ac:
+        resp = await ac.get("/api/v1/upstreams")
+
+    assert resp.json() == [
+        {
+            "name": BLS_HOST,
+            "state": "closed",
+            "failures": 0,
+            "retry_in": 0.0,
+            "quota": {
+                "calls": 25,
+                "period": 86400.0,
+                "keyed": False,
+                "remaining": 2,
+            },
+        }
+    ]
@@ -0,0 +1,83 @@
+from datetime import datetime
+
+import pytest
+
+from app.config import settings
+from app.crud import PCE_CACHE, fetch_pce
+from app.releases import RELEASE_TIME, RELEASES, expected_period
+from app.releases import near_release, release_expiry
+
+
+def _at(day, hour=8, minute=30):
+    return datetime.fromisoformat(day).replace(
+        hour=hour, minute=minute, tzinfo=RELEASE_TIME.tzinfo
+    ).timestamp()
+
+
+def test_schedule_is_sorted_and_complete():
+    for releases in RELEASES.values():
+        assert releases == sorted(releases)
+    assert set(RELEASES) == {"CPI", "NFP", "PCE"}
+
+
+def test_expected_period_is_previous_month():
+    assert expected_period(_at("2026-11-12")) == "2026-10"
+    assert expected_period(_at("2027-01-08")) == "2026-12"
+
+
+def test_current_print_expires_at_next_release():
+    now = _at("2026-11-20", hour=12)
+    assert release_expiry({"CPI": "2026-10"}, now) == _at("2026-12-16")
+    assert release_expiry({"CPI": "2026-10", "NFP": "2026-10"}, now) == (
+        _at("2026-12-04")
+    )
+
+
+def test_missing_print_is_polled_after_release():
+    now = _at("2026-11-12", minute=35)
+    expiry = release_expiry({"CPI": "2026-09"}, now)
+    assert expiry == now + settings.release_poll_interval
+
+
+def test_near_release_covers_poll_window():
+    release = _at("2026-11-12")
+    assert near_release(["CPI"], release + 60)
+    assert not near_release(["CPI"], release - 60)
+    assert not near_release(["NFP"], release + 60)
+    assert not near_release(
+        ["CPI"], release + settings.release_poll_window
+    )
+
+
+def test_falls_back_to_ttl():
+    late = _at("2026-11-13")
+    assert release_expiry({"CPI": "2026-09"}, late) is None
+    assert release_expiry({"CPI": "2027-12"}, _at("2028-01-05")) is None
+    assert release_expiry({"GDP": "2026-09"}, late) is None
+    assert release_expiry({}) is None
+
+
+@pytest.mark.asyncio
+async def test_pce_entry_expires_at_next_release(mocker):
+    PCE_CACHE.clear()
+    mocker.patch.object(settings, "bea_api_key", "KEY")
+    mocker.patch("app.crud.release_expiry", return_value=1e10)
+    resp = mocker.Mock()
+    resp.json.return_value = {
+        "BEAAPI": {
+            "Results": {
+                "Data": [
+                    {
+                        "LineNumber": "1",
+                        "TimePeriod": "2026M09",
+                        "DataValue": "0.2",
+                    }
+                ]
+            }
+        }
+    }
+    mocker.patch("app.upstream.get", return_value=resp)
+
+    entry = await fetch_pce.cache_entry()
+
+    assert entry.expires_at == 1e10
@@ -0,0 +1,195 @@
+import asyncio
+import time
+
+import pytest
+from cachetools import TTLCache
+from fastapi.testclient import TestClient
+
+from app.cache import cached
+from app.quota import QuotaExceeded
+from app.scheduler import RefreshScheduler, build_jobs, refresh
+from app.warmup import WarmupReport
+
+
+def _make_fetcher(values, ttl=100):
+    it = iter(values)
+
+    @cached(TTLCache(maxsize=1, ttl=ttl))
+    async def fetch():
+        value = next(it)
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    return fetch
+
+
+def test_build_jobs_interval_from_ttl():
+    fetch = _make_fetcher([1], ttl=300)
+    jobs = build_jobs({"x": fetch}, margin=0.1)
+    assert jobs[0].name == "x"
+    assert jobs[0].interval == 270
+
+
+@pytest.mark.asyncio
+async def test_refresh_replaces_cached_value():
+    fetch = _make_fetcher([1, 2])
+    assert await fetch() == 1
+    assert await refresh(fetch) == 2
+    assert await fetch() == 2
+
+
+@pytest.mark.asyncio
+async def test_previous_value_served_during_refresh():
+    started = asyncio.Event()
+    release = asyncio.Event()
+    values = iter([1, 2])
+
+    @cached(TTLCache(maxsize=1, ttl=100))
+    async def fetch():
+        value = next(values)
+        if value == 2:
+            started.set()
+            await release.wait()
+        return value
+
+    assert await fetch() == 1
+    scheduler = RefreshScheduler(build_jobs({"x": fetch}, 0.1))
+    tasks = scheduler.run_pending()
+    await started.wait()
+    assert await fetch() == 1
+    release.set()
+    await asyncio.gather(*tasks)
+    assert await fetch() == 2
+    await scheduler.stop()
+
+
+@pytest.mark.asyncio
+async def test_run_pending_skips_jobs_not_due():
+    fetch = _make_fetcher([1, 2])
+    scheduler = RefreshScheduler(build_jobs({"x": fetch}, 0.1))
+    await asyncio.gather(*scheduler.run_pending())
+    assert scheduler.run_pending() == []
+    assert scheduler.jobs[0].next_run > 0
+    await scheduler.stop()
+
+
+@pytest.mark.asyncio
+async def test_failed_refresh_is_retried_sooner():
+    fetch = _make_fetcher([RuntimeError("down")], ttl=1000)
+    scheduler = RefreshScheduler(build_jobs({"x": fetch}, 0.1), retry_delay=5)
+    await asyncio.gather(*scheduler.run_pending(now=0))
+    job = scheduler.jobs[0]
+    assert not job.running
+    assert job.next_run <= time.monotonic() + 5
+    await scheduler.stop()
+
+
+@pytest.mark.asyncio
+async def test_refresh_over_quota_waits_for_budget():
+    try:
+        raise QuotaExceeded("api.bls.gov quota exhausted", 3600)
+    except QuotaExceeded as exc:
+        error = RuntimeError("BLS unavailable")
+        error.__cause__ = exc
+    fetch = _make_fetcher([error], ttl=1000)
+    scheduler = RefreshScheduler(build_jobs({"x": fetch}, 0.1), retry_delay=5)
+    await asyncio.gather(*scheduler.run_pending(now=0))
+    assert scheduler.jobs[0].next_run == pytest.approx(
+        time.monotonic() + 3600, abs=1
+    )
+    await scheduler.stop()
+
+
+@pytest.mark.asyncio
+async def test_entry_expiry_sets_next_run(mocker):
+    expires_at = time.time() + 500
+    cache = TTLCache(maxsize=1, ttl=100)
+    cache.claim = mocker.Mock(return_value=True)
+    cache.release = mocker.Mock()
+
+    @cached(cache, expires=lambda value: expires_at)
+    async def fetch():
+        return 1
+
+    scheduler = RefreshScheduler(build_jobs({"x": fetch}, 0.1))
+    await asyncio.gather(*scheduler.run_pending())
+    job = scheduler.jobs[0]
+    assert job.next_run == pytest.approx(time.monotonic() + 450, abs=1)
+    cache.release.assert_called_once()
+
+    # The early refresh kept the expiry: refresh again when it is reached.
+    job.next_run = 0
+    await asyncio.gather(*scheduler.run_pending())
+    assert job.next_run == pytest.approx(time.monotonic() + 500, abs=1)
+
+    # Another worker holds the lease: come back when the entry expires.
+    cache.claim.return_value = False
+    job.next_run = 0
+    await asyncio.gather(*scheduler.run_pending())
+    assert job.next_run == pytest.approx(time.monotonic() + 500, abs=1)
+    await scheduler.stop()
+
+
+@pytest.mark.asyncio
+async def test_polled_entry_is_refreshed_before_expiry():
+    @cached(
+        TTLCache(maxsize=1, ttl=1000),
+        expires=lambda value: time.time() + 300,
+    )
+    async def fetch():
+        return 1
+
+    await fetch()
+    scheduler = RefreshScheduler(build_jobs({"x": fetch}, 0.1))
+    scheduler.start()
+    job = scheduler.jobs[0]
+    assert job.next_run == pytest.approx(time.monotonic() + 270, abs=1)
+
+    job.next_run = 0
+    await asyncio.gather(*scheduler.run_pending())
+    assert job.next_run == pytest.approx(time.monotonic() + 270, abs=1)
+    assert fetch.cache_peek().expires_at > time.time() + 299
+    await scheduler.stop()
+
+
+@pytest.mark.asyncio
+async def test_start_runs_jobs_immediately():
+    done = asyncio.Event()
+
+    @cached(TTLCache(maxsize=1, ttl=100))
+    async def fetch():
+        done.set()
+        return 1
+
+    scheduler = RefreshScheduler(build_jobs({"x": fetch}, 0.1), tick=0.01)
+    scheduler.start()
+    await asyncio.wait_for(done.wait(), 5)
+    await scheduler.stop()
+    assert await fetch() == 1
+
+
+@pytest.mark.asyncio
+async def test_fresh_entries_are_not_refetched_on_start():
+    fetch = _make_fetcher([1, 2], ttl=1000)
+    await fetch()
+    scheduler = RefreshScheduler(build_jobs({"x": fetch}, 0.1))
+    scheduler.start()
+    job = scheduler.jobs[0]
+    assert job.next_run == pytest.approx(time.monotonic() + 900, abs=1)
+    assert scheduler.run_pending() == []
+    await scheduler.stop()
+
+
+def test_lifespan_starts_and_stops_scheduler(mocker):
+    from app import main
+
+    mocker.patch.object(main.settings, "refresh_enabled", True)
+    mocker.patch(
+        "app.main.warmup.prefetch", return_value=(WarmupReport(), set())
+    )
+    scheduler_cls = mocker.patch("app.main.RefreshScheduler")
+    scheduler_cls.return_value.stop = mocker.AsyncMock()
+    with TestClient(main.app):
+        scheduler_cls.return_value.start.assert_called_once()
+    scheduler_cls.return_value.stop.assert_awaited_once()
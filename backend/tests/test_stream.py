@@ -0,0 +1,143 @@
+from datetime import datetime
+
+import pytest
+from cachetools import TTLCache
+from fastapi import HTTPException
+
+from app import main
+from app.cache import cached
+from app.schemas import FedRate, Indicator, MarketIndices
+from app.stream import IndicatorWatcher, Subscription, sse_events
+
+
+def _fetcher(values):
+    it = iter(values)
+
+    @cached(TTLCache(maxsize=1, ttl=100))
+    async def fetch():
+        return next(it)
+
+    return fetch
+
+
+def _rate(value):
+    return FedRate(value=value, date="2024-06-13")
+
+
+@pytest.mark.asyncio
+async def test_subscribe_sends_current_cached_values():
+    fed_rate = _fetcher([_rate(5.0)])
+    vix = _fetcher([_rate(15.0)])
+    await fed_rate()
+    watcher = IndicatorWatcher({"fed_rate": fed_rate, "vix": vix}, 1)
+
+    sub = watcher.subscribe({"fed_rate", "vix"})
+
+    pending = await sub.next(1)
+    assert set(pending) == {"fed_rate"}
+    assert b'"value":5.0' in pending["fed_rate"]
+
+
+@pytest.mark.asyncio
+async def test_only_changed_values_are_pushed():
+    fed_rate = _fetcher([_rate(5.0), _rate(5.0), _rate(5.25)])
+    vix = _fetcher([_rate(15.0)])
+    await fed_rate()
+    await vix()
+    watcher = IndicatorWatcher({"fed_rate": fed_rate, "vix": vix}, 1)
+    sub = watcher.subscribe({"fed_rate"})
+    await sub.next(1)
+
+    await fed_rate.cache_refresh()
+    watcher.check()
+    assert await sub.next(0.01) == {}
+
+    await fed_rate.cache_refresh()
+    watcher.check()
+    pending = await sub.next(1)
+    assert list(pending) == ["fed_rate"]
+    assert b"5.25" in pending["fed_rate"]
+
+    watcher.unsubscribe(sub)
+    watcher.check()
+    assert await sub.next(0.01) == {}
+
+
+@pytest.mark.asyncio
+async def test_new_refresh_time_alone_is_not_pushed():
+    def indices(price, at):
+        return MarketIndices(
+            dxy_proxy_uup=Indicator(
+                symbol="UUP", value=price, unit="USD", last_updated_utc=at
+            ),
+            volume_aggregated=Indicator(
+                symbol="US_VOLUME", value=1e8, unit="shares",
+                last_updated_utc=at,
+            ),
+        )
+
+    fetch = _fetcher([
+        indices(28.5, datetime(2024, 6, 15, 12, 0)),
+        indices(28.5, datetime(2024, 6, 15, 12, 5)),
+        indices(28.6, datetime(2024, 6, 17, 14, 0)),
+    ])
+    await fetch()
+    watcher = IndicatorWatcher({"market_indices": fetch}, 1)
+    sub = watcher.subscribe({"market_indices"})
+    await sub.next(1)
+
+    await fetch.cache_refresh()
+    watcher.check()
+    assert await sub.next(0.01) == {}
+
+    await fetch.cache_refresh()
+    watcher.check()
+    pending = await sub.next(1)
+    assert b"28.6" in pending["market_indices"]
+
+
+@pytest.mark.asyncio
+async def test_watcher_start_stop():
+    watcher = IndicatorWatcher({}, 0.01)
+    watcher.start()
+    await watcher.stop()
+    await watcher.stop()
+
+
+@pytest.mark.asyncio
+async def test_sse_events_frames_and_keepalive():
+    sub = Subscription({"vix"})
+    sub.push("vix", '"t"', b"null")
+    disconnected = iter([False, False, True])
+
+    async def is_disconnected():
+        return next(disconnected)
+
+    frames = [f async for f in sse_events(sub, 0.01, is_disconnected)]
+
+    assert frames == [b"event: vix\ndata: null\n\n", b": keepalive\n\n"]
+
+
+@pytest.mark.asyncio
+async def test_api_stream_rejects_unknown_indicator(mocker):
+    with pytest.raises(HTTPException) as exc:
+        await main.get_stream(mocker.Mock(), "vix,gold")
+    assert exc.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_api_stream_emits_cached_values(mocker):
+    fed_rate = _fetcher([_rate(5.0)])
+    await fed_rate()
+    mocker.patch.dict(main.watcher.fetchers, {"fed_rate": fed_rate})
+    request = mocker.Mock()
+    request.is_disconnected = mocker.AsyncMock(return_value=False)
+
+    resp = await main.get_stream(request, "fed_rate")
+    first = await resp.body_iterator.__anext__()
+    await resp.body_iterator.aclose()
+
+    assert resp.media_type == "text/event-stream"
+    assert resp.headers["x-accel-buffering"] == "no"
+    assert first.startswith(b"event: fed_rate\ndata: {")
+    assert not main.watcher._subscriptions
@@ -0,0 +1,139 @@
+import asyncio
+import logging
+import os
+import time
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app import timing
+from app.cache import CacheEntry
+from app.config import settings
+from app.crud import FRED_RATE_CACHE
+from app.main import app
+from app.schemas import FedRate
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    FRED_RATE_CACHE.clear()
+
+
+def _fred_response(mocker):
+    resp = mocker.Mock()
+    resp.json.return_value = {
+        "observations": [{"date": "2024-06-13", "value": "5.33"}]
+    }
+    resp.raise_for_status.return_value = None
+    return resp
+
+
+def _stages(header: str) -> dict[str, float]:
+    stages = {}
+    for item in header.split(", "):
+        name, dur = item.split(";dur=")
+        stages[name] = float(dur)
+    return stages
+
+
+def test_stage_outside_a_request_records_nothing():
+    with timing.stage("cache"):
+        pass
+
+
+def test_timings_header_adds_repeated_stages():
+    timings = timing.Timings()
+    timings.add("fred", 0.010)
+    timings.add("fred", 0.0025)
+    timings.add("encode", 0.0001)
+
+    assert timings.header(0.02) == (
+        "fred;dur=12.50, encode;dur=0.10, app;dur=20.00"
+    )
+
+
+@pytest.mark.asyncio
+async def test_server_timing_lists_the_stages_of_a_miss(mocker, caplog):
+    mocker.patch.object(settings, "fred_api_key", "key")
+    mocker.patch("app.upstream.get", return_value=_fred_response(mocker))
+    caplog.set_level(logging.INFO, logger="app.timing")
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as ac:
+        miss = await ac.get("/api/v1/fed_rate")
+        hit = await ac.get("/api/v1/fed_rate")
+
+    stages = _stages(miss.headers["server-timing"])
+    assert list(stages) == [
+        "cache", "fred", "fred_decode", "history", "fetch", "encode", "app"
+    ]
+    assert stages["app"] >= stages["fetch"] >= stages["fred"]
+    assert list(_stages(hit.headers["server-timing"])) == [
+        "cache", "encode", "app"
+    ]
+    record = caplog.records[0]
+    assert record.levelname == "INFO"
+    assert record.route == "/api/v1/fed_rate"
+    assert record.status == 200
+    assert set(record.stages_ms) == set(stages) - {"app"}
+    assert record.profile is None
+
+
+async def _slow_entry():
+    await asyncio.sleep(0.1)
+    return CacheEntry(FedRate(value=5.0, date="2024-06-13"), time.time())
+
+
+@pytest.mark.asyncio
+async def test_slow_request_is_profiled(mocker, caplog):
+    mocker.patch("app.main.fetch_fed_rate.cache_entry", _slow_entry)
+    mocker.patch.object(settings, "slow_request_seconds", 0.03)
+    mocker.patch.object(settings, "profile_interval", 0.005)
+    caplog.set_level(logging.INFO, logger="app.timing")
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as ac:
+        resp = await ac.get("/api/v1/fed_rate")
+
+    assert resp.status_code == 200
+    record = caplog.records[0]
+    assert record.levelname == "WARNING"
+    assert record.duration_ms >= 100
+    with open(record.profile) as f:
+        lines = f.read().splitlines()
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 1
+    assert stack.endswith(
+        "app.main:get_fed_rate;app.main:_serve;"
+        "tests.test_timing:_slow_entry;"
+        "asyncio.tasks:sleep"
+    )
+
+
+@pytest.mark.asyncio
+async def test_fast_request_is_not_profiled(mocker):
+    mocker.patch.object(settings, "slow_request_seconds", 10.0)
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as ac:
+        await ac.get("/api/v1/upstreams")
+
+    assert not os.path.exists(settings.profile_path)
+
+
+
+@pytest.mark.asyncio
+async def test_profiles_beyond_the_cap_are_deleted(mocker):
+    mocker.patch.object(settings, "profile_max_files", 2)
+    profiler = timing.Profiler(asyncio.current_task(), 60)
+    profiler.stop()
+    profiler.samples["app.main:get_vix"] = 1
+
+    paths = []
+    for _ in range(3):
+        paths.append(profiler.save("/api/v1/vix"))
+        await asyncio.sleep(0.001)
+
+    assert sorted(os.listdir(settings.profile_path)) == [
+        os.path.basename(path) for path in paths[1:]
+    ]
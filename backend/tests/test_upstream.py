@@ -0,0 +1,196 @@
+import asyncio
+
+import httpx
+import pytest
+import pytest_asyncio
+
+from app import upstream
+from app.breaker import CircuitOpen, get_breaker
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def _reset_clients():
+    await upstream.aclose()
+    yield
+    await upstream.aclose()
+
+
+@pytest.mark.asyncio
+async def test_one_pooled_client_per_host():
+    bls = upstream.get_client("https://api.bls.gov/publicAPI/v2/a")
+    assert upstream.get_client("https://api.bls.gov/other") is bls
+    fred = upstream.get_client("https://api.stlouisfed.org/fred/x")
+    assert fred is not bls
+
+
+@pytest.mark.asyncio
+async def test_closed_client_is_replaced():
+    client = upstream.get_client("https://apps.bea.gov/api/data/")
+    await upstream.aclose()
+    assert client.is_closed
+    assert upstream.get_client("https://apps.bea.gov/api/data/") is not client
+
+
+@pytest.mark.asyncio
+async def test_get_goes_through_pooled_client(mocker):
+    url = "https://www.federalreserve.gov/feeds/press_all.xml"
+    client = upstream.get_client(url)
+    response = httpx.Response(200, text="<rss/>")
+    client_get = mocker.patch.object(client, "get", return_value=response)
+
+    resp = await upstream.get(url, params={"a": 1})
+
+    assert resp is response
+    client_get.assert_awaited_once_with(url, params={"a": 1})
+
+
+@pytest.mark.asyncio
+async def test_post_goes_through_pooled_client(mocker):
+    url = "https://api.bls.gov/publicAPI/v2/timeseries/data/"
+    client = upstream.get_client(url)
+    response = httpx.Response(200, json={})
+    client_post = mocker.patch.object(client, "post", return_value=response)
+
+    resp = await upstream.post(url, json={"seriesid": ["X"]})
+
+    assert resp is response
+    client_post.assert_awaited_once_with(url, json={"seriesid": ["X"]})
+
+
+@pytest.mark.asyncio
+async def test_stream_goes_through_pooled_client():
+    url = "https://www.federalreserve.gov/feeds/meetingcalendar.xml"
+    seen = []
+
+    def handler(request):
+        seen.append(request.headers.get("if-none-match"))
+        return httpx.Response(304)
+
+    upstream._clients["www.federalreserve.gov"] = httpx.AsyncClient(
+        transport=httpx.MockTransport(handler)
+    )
+
+    async with upstream.stream(url, headers={"If-None-Match": '"v1"'}) as r:
+        assert r.status_code == 304
+    assert seen == ['"v1"']
+
+
+@pytest.mark.asyncio
+async def test_stream_error_propagates():
+    def handler(request):
+        raise httpx.ConnectError("down")
+
+    upstream._clients["www.federalreserve.gov"] = httpx.AsyncClient(
+        transport=httpx.MockTransport(handler)
+    )
+
+    with pytest.raises(httpx.ConnectError):
+        async with upstream.stream("https://www.federalreserve.gov/x"):
+            pass
+    assert get_breaker("www.federalreserve.gov").failures == 1
+
+
+@pytest.mark.asyncio
+async def test_stream_server_error_counts_as_failure():
+    upstream._clients["www.federalreserve.gov"] = httpx.AsyncClient(
+        transport=httpx.MockTransport(lambda request: httpx.Response(503))
+    )
+
+    async with upstream.stream("https://www.federalreserve.gov/x") as r:
+        assert r.status_code == 503
+    assert get_breaker("www.federalreserve.gov").failures == 1
+
+
+@pytest.fixture
+def no_backoff(mocker):
+    return mocker.patch("app.upstream.asyncio.sleep")
+
+
+@pytest.mark.asyncio
+async def test_get_retries_server_errors(mocker, no_backoff):
+    url = "https://api.stlouisfed.org/fred/series/observations"
+    client = upstream.get_client(url)
+    client_get = mocker.patch.object(
+        client,
+        "get",
+        side_effect=[httpx.Response(503), httpx.Response(200, json={})],
+    )
+
+    resp = await upstream.get(url)
+
+    assert resp.status_code == 200
+    assert client_get.await_count == 2
+    no_backoff.assert_awaited_once()
+    assert get_breaker("api.stlouisfed.org").failures == 0
+
+
+@pytest.mark.asyncio
+async def test_retries_are_bounded(mocker, no_backoff):
+    url = "https://api.bls.gov/publicAPI/v2/timeseries/data/"
+    mocker.patch.object(upstream.settings, "upstream_retries", 2)
+    mocker.patch.object(upstream.settings, "quota_enabled", False)
+    client = upstream.get_client(url)
+    client_post = mocker.patch.object(
+        client, "post", side_effect=httpx.ConnectError("down")
+    )
+
+    with pytest.raises(httpx.ConnectError):
+        await upstream.post(url, json={})
+
+    assert client_post.await_count == 3
+    assert get_breaker("api.bls.gov").failures == 1
+
+
+@pytest.mark.asyncio
+async def test_last_error_response_is_returned(mocker, no_backoff):
+    url = "https://apps.bea.gov/api/data/"
+    client = upstream.get_client(url)
+    mocker.patch.object(client, "get", return_value=httpx.Response(502))
+
+    resp = await upstream.get(url)
+
+    assert resp.status_code == 502
+    assert get_breaker("apps.bea.gov").failures == 1
+
+
+@pytest.mark.asyncio
+async def test_client_errors_are_not_retried(mocker, no_backoff):
+    url = "https://apps.bea.gov/api/data/"
+    client = upstream.get_client(url)
+    client_get = mocker.patch.object(
+        client, "get", return_value=httpx.Response(404)
+    )
+
+    assert (await upstream.get(url)).status_code == 404
+    client_get.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_deadline_bounds_slow_upstream(mocker):
+    url = "https://api.stlouisfed.org/fred/series/observations"
+    mocker.patch.object(upstream.settings, "upstream_deadline", 0.05)
+    client = upstream.get_client(url)
+
+    async def slow(*args, **kwargs):
+        await asyncio.sleep(5)
+
+    mocker.patch.object(client, "get", side_effect=slow)
+
+    with pytest.raises(httpx.TimeoutException):
+        await asyncio.wait_for(upstream.get(url), 1)
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_fails_fast(mocker):
+    url = "https://www.federalreserve.gov/feeds/press_all.xml"
+    mocker.patch.object(upstream.settings, "breaker_failures", 1)
+    get_breaker("www.federalreserve.gov").record_failure()
+    client = upstream.get_client(url)
+    client_get = mocker.patch.object(client, "get")
+
+    with pytest.raises(CircuitOpen):
+        await upstream.get(url)
+    with pytest.raises(httpx.TransportError):
+        async with upstream.stream(url):
+            pass
+    client_get.assert_not_called()
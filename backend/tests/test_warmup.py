@@ -0,0 +1,139 @@
+import asyncio
+import time
+
+import pytest
+from cachetools import TTLCache
+from fastapi.testclient import TestClient
+from httpx import ASGITransport, AsyncClient
+
+from app import crud, main
+from app.cache import CacheEntry, cached
+from app.config import settings
+from app.warmup import Readiness, prefetch
+
+
+def _fetcher(result, delay=0.0):
+    calls = []
+
+    @cached(TTLCache(maxsize=1, ttl=100))
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    fetch.calls = calls
+    return fetch
+
+
+@pytest.mark.asyncio
+async def test_prefetch_reports_each_indicator():
+    fresh = _fetcher(1)
+    await fresh()
+    stale = _fetcher(2)
+    stale.cache[stale.cache_key()] = CacheEntry(1, time.time(), stale=True)
+    fetchers = {
+        "ok": _fetcher(1),
+        "fresh": fresh,
+        "stale": stale,
+        "down": _fetcher(RuntimeError("BLS unavailable")),
+        "slow": _fetcher(1, delay=5),
+    }
+
+    report, pending = await prefetch(fetchers, timeout=0.2)
+
+    assert sorted(report.warmed) == ["fresh", "ok", "stale"]
+    assert report.failed == {"down": "RuntimeError: BLS unavailable"}
+    assert report.pending == ["slow"]
+    assert len(fresh.calls) == 1
+    assert await stale() == 2
+    assert len(pending) == 1
+    for task in pending:
+        task.cancel()
+
+
+def test_readiness_waits_for_critical_indicators(mocker):
+    mocker.patch.object(settings, "critical_indicators", ["a"])
+    fetchers = {"a": _fetcher(1), "b": _fetcher(2)}
+    readiness = Readiness(fetchers)
+
+    assert not readiness.check()
+    assert readiness.missing() == ["a"]
+
+    fetchers["a"].cache[fetchers["a"].cache_key()] = CacheEntry(
+        1, time.time()
+    )
+    assert readiness.check()
+    # Once ready, a worker stays in rotation even if its cache empties.
+    fetchers["a"].cache_clear()
+    assert readiness.check()
+
+    mocker.patch.object(settings, "critical_indicators", ["c"])
+    with pytest.raises(ValueError):
+        Readiness(fetchers).missing()
+
+
+def test_readiness_skips_indicators_without_api_key(mocker, caplog):
+    mocker.patch.object(settings, "critical_indicators", ["a", "fed_rate"])
+    mocker.patch.object(settings, "fred_api_key", None)
+    fetchers = {"a": _fetcher(1), "fed_rate": _fetcher(2)}
+    fetchers["a"].cache[fetchers["a"].cache_key()] = CacheEntry(
+        1, time.time()
+    )
+    readiness = Readiness(fetchers, {"fed_rate": "fred_api_key"})
+
+    assert readiness.check()
+    assert readiness.missing() == []
+    readiness.missing()
+    warnings = [r.message for r in caplog.records if r.levelname == "WARNING"]
+    assert warnings == [
+        "Readiness does not wait for fed_rate: FRED_API_KEY is not set"
+    ]
+
+    mocker.patch.object(settings, "fred_api_key", "KEY")
+    assert readiness.missing() == ["fed_rate"]
+
+
+def test_api_keys_of_indicators():
+    assert crud.API_KEYS["pce"] == "bea_api_key"
+    assert crud.API_KEYS["vix"] == "fred_api_key"
+    assert crud.API_KEYS["fred_M2SL"] == "fred_api_key"
+    assert "latest_macro" not in crud.API_KEYS
+
+
+@pytest.mark.asyncio
+async def test_ready_endpoint(mocker):
+    mocker.patch.object(settings, "critical_indicators", ["fed_rate"])
+    mocker.patch.object(main, "readiness", Readiness(main.REFRESH_TARGETS))
+    fed_rate = main.REFRESH_TARGETS["fed_rate"]
+    fed_rate.cache_clear()
+
+    async with AsyncClient(
+        transport=ASGITransport(app=main.app), base_url="http://test"
+    ) as ac:
+        before = await ac.get("/ready")
+        fed_rate.cache[fed_rate.cache_key()] = CacheEntry(1, time.time())
+        after = await ac.get("/ready")
+    fed_rate.cache_clear()
+
+    assert before.status_code == 503
+    assert before.json()["missing"] == ["fed_rate"]
+    assert after.status_code == 200
+    assert after.json()["ready"] is True
+
+
+def test_lifespan_prefetches_before_serving(mocker):
+    fetchers = {"fed_rate": _fetcher(1), "slow": _fetcher(1, delay=5)}
+    mocker.patch.object(settings, "critical_indicators", ["fed_rate"])
+    mocker.patch.object(settings, "refresh_enabled", False)
+    mocker.patch.object(settings, "warmup_timeout", 0.2)
+    mocker.patch.object(main, "REFRESH_TARGETS", fetchers)
+    mocker.patch.object(main, "readiness", Readiness(fetchers))
+
+    with TestClient(main.app) as client:
+        resp = client.get("/ready")
+
+    assert resp.status_code == 200
+    assert resp.json()["warmup"]["warmed"] == ["fed_rate"]
+    assert resp.json()["warmup"]["pending"] == ["slow"]